@@ -2,7 +2,6 @@
 
 import sys
 import uuid
-import copy
 import xml.etree.ElementTree as ET
 import re
 import logging
@@ -86,19 +85,6 @@ _CHANNEL_MAPPING_ = 'CAN-PHYSICAL-CHANNEL', 'ETHERNET-PHYSICAL-CHANNEL'
 
 NAMESPACE = {'ns': 'http://autosar.org/schema/r4.0'}
 
-def is_xml_tag_present(xml_file_path, tag_name):
-    try:
-        # Parse the XML file
-        tree = ET.parse(xml_file_path)
-        root = tree.getroot()
-
-        # Check if the specified tag is present
-        return bool(util.xml_elem_find(root,tag_name) is not None)
-
-    except ET.ParseError as e:
-        print("Error parsing XML file:", e)
-        return False
-
 def xml_get_physical_channel(arxml, ch_type, name):
     # Get PhysicalChannel of given type and name
 
@@ -126,6 +112,7 @@ def fetch_pdu(src_arxml):
 
     return pdus
 
+@util.timed_stage('communication packages')
 def copy_communication_packages(src_arxml, dst_arxml):
     # Copy Communication source to destination packages
     # enlisted in _COMMUNICATION_PACKAGES_
@@ -139,8 +126,6 @@ def copy_communication_packages(src_arxml, dst_arxml):
     assert dst_com is not None, "Destination Communication "\
                                 "package is not found!"
     pdus = []
-    isig_pdus_len = []
-    frame_len = []
     for name in _COMMUNICATION_PACKAGES_:
         src = util.xml_ar_package_find(src_com, name)
         dst = util.xml_ar_package_find(dst_com, name)
@@ -151,7 +136,7 @@ def copy_communication_packages(src_arxml, dst_arxml):
         if dst is None:
             # No destination package found; create AR-PACKAGE
             # and append it to the destination AR-PACKAGES
-            dst = factory.xml_ar_package_create(name, str(uuid.uuid4()) +
+            dst = factory.xml_ar_package_create(name, util.new_uuid('/Communication/' + name, 'AR-PACKAGE') +
                                         '-Communication-' + name)
             util.assert_elem_tag(dst_com[1], 'AR-PACKAGES')
             util.xml_elem_append(dst_com[1], dst, dst_arxml.parents)
@@ -162,29 +147,8 @@ def copy_communication_packages(src_arxml, dst_arxml):
             util.xml_elem_extend(isig_pdus, dst[1], src_arxml, dst_arxml)
             # Save isignal pdus for pdu filtering
             pdus = [pdu[0].text for pdu in isig_pdus]
-            # Fetch the pdu length and the pdu name
-            isig_pdus_len = [(util.xml_elem_find(pdu, "LENGTH").text, pdu[0].text) for pdu in isig_pdus]
-            # Sort List by PDU Name
-            isig_pdus_len = sorted(isig_pdus_len, key=lambda x: x[1])
-
-            frames = util.xml_elem_findall(src_com, 'CAN-FRAME')
-            if frames is not None:
-                # Fetch the frame length and the pdu name
-                frame_len = [(util.xml_elem_find(frame, "FRAME-LENGTH").text,
-                              util.xml_elem_find(frame, "PDU-REF").text.split("/")[-1]) \
-                             for frame in frames]
-                # Sort List by PDU Name
-                frame_len = sorted(frame_len, key=lambda x: x[1])
-
-            if len(frame_len) > 0 \
-                    and len(isig_pdus_len) > 0:
-                # Loop on those two lists and break once a difference is found
-                # This indicates a length mismatch between the pdu and its corresponding frame
-                for i, pdu_cfg in enumerate(isig_pdus_len):
-                    if frame_len[i] != pdu_cfg:
-                        logging.warning("Found a mismatch: in PDU: %s, frame length: %s, PDU length: %s",\
-                            pdu_cfg[1], frame_len[i][0], pdu_cfg[0])
-                        break
+            # Compare the pdu lengths with the lengths of their frames
+            util.pdu_frame_lengths_check(src_com, src_arxml.filename)
             continue
 
         # Copy source elements
@@ -209,6 +173,7 @@ def copy_communication_packages(src_arxml, dst_arxml):
     return pdus
 
 
+@util.timed_stage('fibex')
 def copy_fibex_elements(src_arxml, dst_arxml, pdus):
     # Copy source to destination Communication related Fibex elements
     # found in _COMMUNICATION_PACKAGES_
@@ -245,6 +210,7 @@ def copy_fibex_elements(src_arxml, dst_arxml, pdus):
     util.xml_elem_extend(list(cond_elems), dst_fibex, src_arxml, dst_arxml)
 
 
+@util.timed_stage('triggerings')
 def copy_isignal_and_pdu_triggerings(src_arxml,
                                      dst_arxml, pdus,
                                      dst_eth_physical_channel, graceful):
@@ -338,9 +304,9 @@ def copy_isignal_and_pdu_triggerings(src_arxml,
     assert src_trig is not None, "Source %s:PDU-TRIGGERINGS "\
                                  "is not found!" % _CHANNEL_MAPPING_[0]
     # Remove non-relevant pdu triggerings
+    has_pdu = util.substring_matcher(pdus)
     util.xml_elem_child_remove_all(src_trig, [trig for trig in src_trig
-                                         if not any(pdu in trig[0].text
-                                                    for pdu in pdus)])
+                                              if not has_pdu(trig[0].text)])
     # Transform pdu port refs
     refs = util.xml_elem_findall(src_trig, 'I-PDU-PORT-REF')
     assert refs is not None, "There is no I-PDU-PORT-REF refs found "\
@@ -442,6 +408,7 @@ def prepare_ethernet_physical_channel(dst_arxml, dst_eth_physical_channel):
         dst_arxml.parents[dst_soad_config] = dst_ch
 
 
+@util.timed_stage('endpoints')
 def copy_network_endpoint(src_arxml, dst_arxml, dst_eth_physical_channel):
     # Copies an Ethernet DP's NetworkEndpoint to given destination channel
 
@@ -487,6 +454,7 @@ def copy_network_endpoint(src_arxml, dst_arxml, dst_eth_physical_channel):
     return path_map
 
 
+@util.timed_stage('bundles')
 def copy_socket_connection_bundles(src_arxml, dst_arxml,
                                    dst_eth_physical_channel,
                                    sock_addr_map, isig_pdu_path_map):
@@ -539,6 +507,7 @@ def copy_socket_connection_bundles(src_arxml, dst_arxml,
                     dst_name=lambda el: util.xml_elem_find(el, 'SHORT-NAME').text)
 
 
+@util.timed_stage('sockets')
 def copy_socket_addresses(src_arxml, dst_arxml,
                           dst_eth_physical_channel,
                           net_ends_path_map):
@@ -595,8 +564,10 @@ def copy_socket_addresses(src_arxml, dst_arxml,
     return path_map
 
 
+@util.timed_stage('bundles')
 def create_socket_connection_bundle(bundle, src_arxml, dst_arxml,
-                                    frames, pdus, dst_eth_physical_channel):
+                                    frames, pdus, dst_eth_physical_channel,
+                                    net_end_refs=None):
     # Creates various socket adapter elements such as:
     # SO-AD-ROUTING-GROUP, NETWORK-ENDPOINT, SOCKET-ADDRESS
     # and SOCKET-CONNECTION-BUNDLE with corresponding
@@ -631,7 +602,7 @@ def create_socket_connection_bundle(bundle, src_arxml, dst_arxml,
         # No package found; create AR-PACKAGE
         # and append it to the AR-PACKAGES
         name = 'SoAdRoutingGroup'
-        dst_rgroups = factory.xml_ar_package_create(name, str(uuid.uuid4()) +
+        dst_rgroups = factory.xml_ar_package_create(name, util.new_uuid('/Communication/' + name, 'AR-PACKAGE') +
                                             '-Communication-' + name)
         util.assert_elem_tag(dst_com[1], 'AR-PACKAGES')
         util.xml_elem_append(dst_com[1], dst_rgroups, dst_arxml.parents)
@@ -674,9 +645,9 @@ def create_socket_connection_bundle(bundle, src_arxml, dst_arxml,
     # Get network endpoing path
     net_end_path = util.xml_elem_get_abs_path(net_end, dst_arxml)
     # Get network endpoint reference
-    net_end_ref = util.xml_elem_type_find(dst_arxml.xml.getroot(),
-                                     'NETWORK-ENDPOINT-REF',
-                                     net_end_path)
+    if net_end_refs is None:
+        net_end_refs = util.XmlRefIndex(dst_arxml, 'NETWORK-ENDPOINT-REF')
+    net_end_ref = net_end_refs.get(net_end_path)
     assert net_end_ref is not None, "Destination element "\
                                     "NETWORK-ENDPOINTS-REF:%s is "\
                                     "not found!" % net_end_path
@@ -728,32 +699,32 @@ def create_socket_connection_bundle(bundle, src_arxml, dst_arxml,
     dst_trig = util.xml_elem_find(dst_ch, 'PDU-TRIGGERINGS')
     assert dst_trig is not None, "Destination %s:PDU-TRIGGERINGS "\
                                  "is not found!" % _CHANNEL_MAPPING_[0]
+    dst_trig_path = util.xml_elem_get_abs_path(dst_trig, dst_arxml)
     # Filter only new ones
-    dst_trig = [trig for trig in dst_trig
-                if any(pdu in trig[0].text
-                       for pdu in pdus)]
+    has_pdu = util.substring_matcher(pdus)
+    dst_trig = [trig for trig in dst_trig if has_pdu(trig[0].text)]
     # Create socket connection ipdu triggerings
-    ipdus = []
+    trig_specs = []
     for trig in dst_trig:
-        util.assert_elem_tag(trig[1], 'I-PDU-PORT-REFS')
-        assert len(trig[1]) == 1, "Invalid number of I-PDU-PORT-REFs "\
-                                  "in the PDU-TRIGGERING:%s!" % trig[0].text
-        frame = [frames[pdu] for pdu in frames.keys() if pdu == trig[0].text.replace('PduTr', '')]
-        assert len(frame) == 1, "The PDU-TRIGGERING:%s can't be matched!"\
-                                % trig[0].text
-        trig_spec = [frame[0]['id'],
-                     trig[1][0].text,
-                     util.xml_elem_get_abs_path(trig, dst_arxml),
-                     rgroup_path]
-        ipdu = factory.xml_socket_connection_ipdu_id_create(*trig_spec)
-        util.xml_elem_append(ipdus, ipdu, dst_arxml.parents)
+        _, port_refs, _ = util.PDU_TRIGGERING_SHAPE.get(trig)
+        assert len(port_refs) == 1, "Invalid number of I-PDU-PORT-REFs "\
+                                    "in the PDU-TRIGGERING:%s!" % trig[0].text
+        frame = frames.get(trig[0].text.replace('PduTr', ''))
+        assert frame is not None, "The PDU-TRIGGERING:%s can't be matched!"\
+                                  % trig[0].text
+        trig_specs.append((frame['id'],
+                           port_refs[0].text,
+                           dst_trig_path + '/' + trig[0].text,
+                           rgroup_path))
+    ipdus = [factory.xml_socket_connection_ipdu_id_create(*trig_spec)
+             for trig_spec in trig_specs]
 
     # Create socket connection bundle
     bundle = factory.xml_socket_connection_bundle_create(get_name(bundle['name']),
                                                  client_ref, server_ref)
     # Get bundles pdus elem
     bpdus = util.xml_elem_find(bundle, 'PDUS')
-    bpdus.extend(ipdus)
+    util.xml_elem_append(bpdus, ipdus, dst_arxml.parents)
 
     # Get connection bundles
     dst_bundles = util.xml_elem_find(dst_ch, 'CONNECTION-BUNDLES')
@@ -770,21 +741,20 @@ def fetch_can_frame_triggering_info(src_arxml):
     # Returns dictionary with the frames information
 
     can_frames = {}
+    # Check the shapes of the source elements in one pass, they are read
+    # below without checking them again
+    util.xml_shapes_check(src_arxml, util.XML_FRAME_INFO_SHAPES)
     frames = util.xml_elem_findall(src_arxml.xml.getroot(), 'CAN-FRAME-TRIGGERING')
     for frame in frames:
-        # Integrity check
-        util.assert_elem_tag(frame[0], 'SHORT-NAME')
-        util.assert_elem_tag(frame[2], 'FRAME-REF')
-        util.assert_elem_tag(frame[4], 'CAN-ADDRESSING-MODE')
-        util.assert_elem_tag(frame[5], ('CAN-FRAME-RX-BEHAVIOR',
-                                   'CAN-FRAME-TX-BEHAVIOR'))
-        util.assert_elem_tag(frame[6], 'IDENTIFIER')
+        # Checked above
+        short_name, frame_ref, mode, behavior, identifier = \
+            util.CAN_FRAME_TRIGGERING_SHAPE.fields_get(frame)
 
         # Let's figure out which pdu is referenced by this frame
         # triggering so we can save packing order and pdu reference
 
         # Get frame name from the ref
-        name = frame[2].text[frame[2].text.rfind('/') + 1:]
+        name = frame_ref.text[frame_ref.text.rfind('/') + 1:]
         # Get can frame
         src_frame = util.xml_elem_type_find(src_arxml.xml.getroot(),
                                        'CAN-FRAME', name)
@@ -798,11 +768,11 @@ def fetch_can_frame_triggering_info(src_arxml):
         # Get first and only child
         src_map = src_map[0]
 
-        # Integrity check
-        util.assert_elem_tag(src_map[2], 'PDU-REF')
+        # Checked above
+        _, pdu_ref = util.PDU_TO_FRAME_MAPPING_SHAPE.fields_get(src_map)
 
         # Finally, add entry
-        pdu = src_map[2].text[src_map[2].text.rfind('/') + 1:]
+        pdu = pdu_ref.text[pdu_ref.text.rfind('/') + 1:]
         assert can_frames.get(pdu, None) is None, "The entry already "\
                                                   "exist with name %s!" % pdu
         packing = ''
@@ -812,20 +782,21 @@ def fetch_can_frame_triggering_info(src_arxml):
             imap = util.xml_elem_find(ipdu, 'I-SIGNAL-TO-I-PDU-MAPPING')
             assert imap is not None, "Source I-SIGNAL-I-PDU:"\
                                      "I-SIGNAL-TO-I-PDU-MAPPING is not found!"
-            util.assert_elem_tag(imap[2], 'PACKING-BYTE-ORDER')
-            packing = imap[2].text
+            _, packing_order, _ = util.I_SIGNAL_TO_I_PDU_MAPPING_SHAPE.fields_get(imap)
+            packing = packing_order.text
 
         # Order items by pdu (reference)
-        can_frames[pdu] = {'name': frame[0].text,
-                           'mode': frame[4].text,
-                           'type': frame[5].text,
-                           'tx': util.is_elem_tag(frame[5],
+        can_frames[pdu] = {'name': short_name.text,
+                           'mode': mode.text,
+                           'type': behavior.text,
+                           'tx': util.is_elem_tag(behavior,
                                              'CAN-FRAME-TX-BEHAVIOR'),
-                           'id': frame[6].text,
+                           'id': identifier.text,
                            'packing': packing}
     return can_frames
 
 
+@util.timed_stage('mr com flavour')
 def add_mr_com_flavour(dst_arxml, can_frames, can_pdus,
                        dst_eth_physical_channel):
     # Add MR COM protocol support by enriching dst_arxml with
@@ -883,12 +854,31 @@ def add_mr_com_flavour(dst_arxml, can_frames, can_pdus,
     assert pdu_trigs is not None, "Destination %s:PDU-TRIGGERINGS "\
                                   "is not found!" % _CHANNEL_MAPPING_[1]
 
+    # Precompute the lookups once, so the loop below is linear in the CAN
+    # pdus (the first element of a name wins, as with xml_elem_type_find)
+    ipdus = {}
+    for ipdu in util.xml_elem_findall(dst_pdu, 'I-SIGNAL-I-PDU'):
+        ipdus.setdefault(ipdu[0].text, ipdu)
+    pdu_trigs_by_pdu = {}
+    for trig in pdu_trigs:
+        pdu_trigs_by_pdu.setdefault(trig[0].text.replace('PduTr', ''),
+                                    []).append(trig)
+    port_paths = [(port[0].text[port[0].text.rfind('_') + 1:],
+                   util.xml_elem_get_abs_path(port, dst_arxml))
+                  for port in dst_ports]
+    sig_path = util.xml_elem_get_abs_path(sig, dst_arxml)
+    # The new elements are appended in batches after the loop, their paths
+    # are known from their containers
+    isig_pkg_path = util.xml_elem_get_abs_path(dst_isig, dst_arxml)
+    dst_trigs_path = util.xml_elem_get_abs_path(dst_trigs, dst_arxml)
+    new_isigs, new_isig_trigs, new_fibex = [], [], []
+
     for index, pdu in enumerate(can_pdus):
         # Add iSignal
         _args = ['32',
                  '/DataType/DataTypeSemantics/SwBaseTypes/SIGMrCommHdrPartB',
                  '/DataType/DataTypeSemantics/uint32',
-                 util.xml_elem_get_abs_path(sig, dst_arxml)]
+                 sig_path]
 
         key = can_frames[pdu]['type'], can_frames[pdu]['mode']
         if can_frames[pdu]['packing'] == 'MOST-SIGNIFICANT-BYTE-FIRST':
@@ -897,13 +887,11 @@ def add_mr_com_flavour(dst_arxml, can_frames, can_pdus,
         else:
             isig = factory.xml_isignal_create(_ISIGNAL_INIT_VAL_LTLEND_[key][1] + str(index),
                                       _ISIGNAL_INIT_VAL_LTLEND_[key][0], *_args)
-
-        util.xml_elem_extend(isig, dst_isig[1], dst_arxml, dst_arxml,
-                        src_name=lambda el: el.text,
-                        dst_name=lambda el: el.text)
+        new_isigs.append(isig)
+        isig_path = isig_pkg_path + '/' + isig[0].text
 
         # Add I-SIGNAL-TO-PDU-MAPPING to each Pdu
-        ipdu = util.xml_elem_type_find(dst_pdu, 'I-SIGNAL-I-PDU', pdu)
+        ipdu = ipdus.get(pdu)
         assert ipdu is not None, "Destination I-SIGNAL-I-PDU:%s is not found!"\
                                  % pdu
         pdu_maps = util.xml_elem_find(ipdu, 'I-SIGNAL-TO-PDU-MAPPINGS')
@@ -911,8 +899,8 @@ def add_mr_com_flavour(dst_arxml, can_frames, can_pdus,
                                      " is not found!" % pdu_maps
         # Offset start position by 32
         for pdu_map in pdu_maps:
-            util.assert_elem_tag(pdu_map[3], 'START-POSITION')
-            pdu_map[3].text = str(int(pdu_map[3].text) + 32)
+            _, _, start = util.I_SIGNAL_TO_I_PDU_MAPPING_SHAPE.get(pdu_map)
+            start.text = str(int(start.text) + 32)
             # check for UPDATE-INDICATION-BIT-POSITION
             upd_bit = util.xml_elem_find(pdu_map, 'UPDATE-INDICATION-BIT-POSITION')
             if upd_bit is not None:
@@ -924,7 +912,7 @@ def add_mr_com_flavour(dst_arxml, can_frames, can_pdus,
         length.text = str(int(length.text) + 4)
         # Add new entry
         _args = [isig[0].text + ('_mtx' if can_frames[pdu]['tx'] else '_mrx'),
-                 util.xml_elem_get_abs_path(isig, dst_arxml),
+                 isig_path,
                  can_frames[pdu]['packing'],
                  '7' if can_frames[pdu]['packing'] ==
                  'MOST-SIGNIFICANT-BYTE-FIRST' else 0,
@@ -936,40 +924,41 @@ def add_mr_com_flavour(dst_arxml, can_frames, can_pdus,
 
         # Add I-SIGNAL-TRIGGERINGs for each ISignal
         isig_trigs = {}
-        for index, port in enumerate(dst_ports):
-            _args = [isig[0].text + '_' + str(index),
-                     util.xml_elem_get_abs_path(port, dst_arxml),
-                     util.xml_elem_get_abs_path(isig, dst_arxml)]
-            direction = port[0].text[port[0].text.rfind('_') + 1:]
-            isig_trigs[direction] = factory.xml_isignal_triggering_create(*_args)
-            util.xml_elem_extend(isig_trigs[direction], dst_trigs, dst_arxml,
-                            dst_arxml, src_name=lambda el: el.text,
-                            dst_name=lambda el: el.text)
+        for port_index, (direction, port_path) in enumerate(port_paths):
+            isig_trig = factory.xml_isignal_triggering_create(
+                isig[0].text + '_' + str(port_index), port_path, isig_path)
+            new_isig_trigs.append(isig_trig)
+            isig_trigs[direction] = isig_trig
 
         # Add FIBEX-ELEMENT-REF-CONDITIONAL referencing new ISignals
-        signal_ref = util.xml_elem_get_abs_path(isig, dst_arxml)
-        fibex = factory.xml_fibex_elem_ref_conditional_create(signal_ref)
-        util.xml_elem_extend(fibex, dst_fibex, dst_arxml, dst_arxml,
-                        src_name=lambda el: el.text,
-                        dst_name=lambda el: el.text)
+        new_fibex.append(factory.xml_fibex_elem_ref_conditional_create(isig_path))
 
         # Add I-SIGNAL-TRIGGERING-REF to PDU-TRIGGERING:I-SIGNAL-TRIGGERINGS
-        dst_trig = [trig for trig in pdu_trigs if pdu == trig[0].text.replace('PduTr', '')]
+        dst_trig = pdu_trigs_by_pdu.get(pdu, [])
         assert len(dst_trig) == 1, "The %s can't be matched in destination "\
                                    "%s:PDU-TRIGGERINGS "\
                                    % (pdu, _CHANNEL_MAPPING_[1])
         trig = dst_trig[0]
-        util.assert_elem_tag(trig[1], 'I-PDU-PORT-REFS')
-        assert len(trig[1]) == 1, "Invalid number of I-PDU-PORT-REFs "\
-                                  "in the PDU-TRIGGERING:%s!" % trig[0].text
-        util.assert_elem_tag(trig[3], 'I-SIGNAL-TRIGGERINGS')
-        direction = trig[1][0].text[trig[1][0].text.rfind('_') + 1:]
-        signal_ref = util.xml_elem_get_abs_path(isig_trigs[direction], dst_arxml)
+        _, port_refs, isig_trig_refs = util.PDU_TRIGGERING_SHAPE.get(trig)
+        assert len(port_refs) == 1, "Invalid number of I-PDU-PORT-REFs "\
+                                    "in the PDU-TRIGGERING:%s!" % trig[0].text
+        if isig_trig_refs is None:
+            raise util.XmlShapeError("PDU-TRIGGERING:%s:I-SIGNAL-TRIGGERINGS "
+                                     "is not found!" % trig[0].text)
+        direction = port_refs[0].text[port_refs[0].text.rfind('_') + 1:]
+        signal_ref = dst_trigs_path + '/' + isig_trigs[direction][0].text
         ref = factory.xml_isignal_triggering_ref_conditional_create(signal_ref)
-        util.xml_elem_extend(ref, trig[3], dst_arxml, dst_arxml,
+        util.xml_elem_extend(ref, isig_trig_refs, dst_arxml, dst_arxml,
                         src_name=lambda el: el.text,
                         dst_name=lambda el: el.text)
 
+    # Append the new ISignals, I-SIGNAL-TRIGGERINGs and FIBEX-ELEMENTs once.
+    # They were never checked for name clashes (one by one their names were
+    # their children's texts), so they are appended without the check.
+    util.xml_elem_append(dst_isig[1], new_isigs, dst_arxml.parents)
+    util.xml_elem_append(dst_trigs, new_isig_trigs, dst_arxml.parents)
+    util.xml_elem_append(dst_fibex, new_fibex, dst_arxml.parents)
+
 
 def fix_ihfa_ihra_naming(src_arxml):
     prefix_map = {
@@ -1019,7 +1008,7 @@ def fix_ihfa_ihra_naming(src_arxml):
 
 def add_swbasetype_arpackage(swc_dp_arxmls,dst_arxml):
     # Create a new AR package - DataType in com_merged arxml
-    dst_datatype = factory.xml_ar_package_create('DataType', str(uuid.uuid4()) +
+    dst_datatype = factory.xml_ar_package_create('DataType', util.new_uuid('/DataType', 'AR-PACKAGE') +
                                         '-DataType')
     util.xml_elem_add_ar_packages(dst_datatype, dst_arxml.parents)
     util.xml_elem_append(dst_arxml.xml.getroot()[0], dst_datatype, dst_arxml.parents)
@@ -1028,13 +1017,13 @@ def add_swbasetype_arpackage(swc_dp_arxmls,dst_arxml):
     dst_datatype_package = util.xml_ar_package_find(dst_arxml.xml.getroot(), 'DataType')
 
     # Create and add a new AR package - DataTypeSemantics as a child in Datatype package
-    dst = factory.xml_ar_package_create('DataTypeSemantics', str(uuid.uuid4()) +
+    dst = factory.xml_ar_package_create('DataTypeSemantics', util.new_uuid('/DataType/DataTypeSemantics', 'AR-PACKAGE') +
                                         '-DataType-DataTypeSemantics')
     util.xml_elem_add_ar_packages(dst, dst_arxml.parents)
     util.xml_elem_append(dst_datatype_package[2], dst, dst_arxml.parents)
 
     for arxml in swc_dp_arxmls:
-        src_arxml = autosar.arxml.load(arxml)
+        src_arxml = util.arxml_load(arxml)
         # Get source package
         src_swbasetype = util.xml_ar_package_find(src_arxml.xml.getroot(), 'SwBaseTypes')
         assert src_swbasetype is not None, "Source SwBaseTypes package is not found!"
@@ -1056,8 +1045,8 @@ def copy_ecpi_to_ethernet_connectors(dst_arxml):
         # Check if the connector already has an ECU-COMM-PORT-INSTANCES element
         existing_ecpi = util.xml_elem_find(connector, 'ECU-COMM-PORT-INSTANCES')
         if existing_ecpi is None:
-            # Create a deep copy of the original tag
-            copied_ecpi = copy.deepcopy(dst_ecpi)
+            # Clone the original tag, sharing its leaves (e.g. port SHORT-NAMEs)
+            copied_ecpi = util.xml_elem_shared_clone(dst_ecpi)
             # Insert the ECU-COMM-PORT-INSTANCES element to the Ethernet-communication-connector at third index
             util.xml_elem_append_at_index(connector, copied_ecpi, 3, dst_arxml.parents)
 
@@ -1125,20 +1114,7 @@ def copy_and_append_data_mappings(src_arxml, dest_arxml):
                 elem.text = update_reference(elem.text)
         dest_mappings.append(mapping)
 
-def main(args):
-    # Prepare the script options and load the files
-    help_desc = {'i': ('input_arxml', "A comma separated list of input files: "
-                                      " file1, file2, file3 etc. where file1 "
-                                      "is the HI ECU COM arxml and rest are "
-                                      "the MR ECU COM arxmls."),
-                 'o': ('output_arxml', "A path to the output HI ECU COM "
-                                       "arxml file.")}
-    options = util.ScriptOptions.get(args, description="Script to merge "
-                                "COM extracts.", version=VERSION,
-                                help_desc=help_desc)
-
-    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
-
+def merge(options):
     # Get list of input files
     arxmls = options.input_arxml.split(',')
 
@@ -1161,7 +1137,7 @@ def main(args):
     # from Capital Networks for our HI COM-SYSTEM. We consider this
     # to be the "base" or "destination" .arxml and everything else
     # gets added on top of it.
-    dst_arxml = autosar.arxml.load(tmp_base_arxml)
+    dst_arxml = util.arxml_load(tmp_base_arxml, shared=False)
     logging.info('Using %s as base .arxml', arxmls[0])
 
     # TODO: Maintain a separate file where the Device Proxy type is
@@ -1173,15 +1149,18 @@ def main(args):
     swc_dp_arxmls = arxmls[1:]
     graceful = False
     for arxml_name in arxmls[2:]:
-        if is_xml_tag_present(arxml_name,"ETHERNET-CLUSTER"):
+        if util.is_xml_tag_present(arxml_name,"ETHERNET-CLUSTER"):
             eth_dp_arxmls.append(arxml_name)
-        if is_xml_tag_present(arxml_name,"CAN-CLUSTER"):
+        if util.is_xml_tag_present(arxml_name,"CAN-CLUSTER"):
             can_dp_arxmls.append(arxml_name)
 
     for arxml in eth_dp_arxmls:
 
         # Load Ethernet DP .arxml
-        src_arxml = autosar.arxml.load(arxml)
+        util.stage_dp(arxml)
+        src_arxml = util.arxml_load(arxml)
+        # Released below, its elements are moved instead of copied
+        util.arxml_consume(src_arxml)
         logging.info('Processing %s', arxml)
 
         if "SRSR" in src_arxml.filename:
@@ -1227,13 +1206,19 @@ def main(args):
             src_arxml, dst_arxml,
             vlan,
             sock_addr_map, isig_pdu_path_map)
+        util.arxml_release(src_arxml)
 
     # Merge MR COM extracts into HI COM extract
     can_frames, can_pdus = {}, []
     vlan = _VLAN_[1]
+    # NETWORK-ENDPOINT-REFs of the merged document, indexed once per merge
+    net_end_refs = util.XmlRefIndex(dst_arxml, 'NETWORK-ENDPOINT-REF')
     for arxml in can_dp_arxmls:
         # Load MR COM extract
-        src_arxml = autosar.arxml.load(arxml)
+        util.stage_dp(arxml)
+        src_arxml = util.arxml_load(arxml)
+        # Released below, its elements are moved instead of copied
+        util.arxml_consume(src_arxml)
         logging.info('Processing %s', arxml)
 
         graceful = bool("SRSR" in src_arxml.filename)
@@ -1258,10 +1243,12 @@ def main(args):
         # Create socket connection bundle to dst_arxml
         create_socket_connection_bundle(_SOCKET_CONNECTION_BUNDLE_,
                                         src_arxml, dst_arxml,
-                                        frames, pdus, vlan)
+                                        frames, pdus, vlan, net_end_refs)
         can_pdus += pdus
         # Todo: check for keys collision
         can_frames.update(frames)
+        util.arxml_release(src_arxml)
+    util.stage_dp(None)
     # Add protocol support
     add_mr_com_flavour(dst_arxml, can_frames, can_pdus,
                        vlan)
@@ -1291,8 +1278,38 @@ def main(args):
 
     util.ensure_unique_uuids(dst_arxml)
 
+    # Summarize the PDU/frame length issues of all the DPs
+    util.pdu_frame_lengths_summary()
+
+    # Report references that don't resolve in the merged extract
+    util.xml_refs_check(dst_arxml)
+
     # Save merged COM extract arxml
-    dst_arxml.save(options.output_arxml)
+    with util.stage('save'):
+        dst_arxml.save(options.output_arxml)
+
+
+def main(args):
+    # Prepare the script options and load the files
+    help_desc = {'i': ('input_arxml', "A comma separated list of input files: "
+                                      " file1, file2, file3 etc. where file1 "
+                                      "is the HI ECU COM arxml and rest are "
+                                      "the MR ECU COM arxmls."),
+                 'o': ('output_arxml', "A path to the output HI ECU COM "
+                                       "arxml file.")}
+    options = util.ScriptOptions.get(args, description="Script to merge "
+                                "COM extracts.", version=VERSION,
+                                help_desc=help_desc)
+
+    util.logging_setup(logging.INFO)
+
+    # Save the profile report and stop the profilers even if the merge
+    # asserts
+    try:
+        merge(options)
+    finally:
+        util.profile_report_save(options.output_arxml)
+        util.search_counters_summary()
 
 
 # Run COM merger
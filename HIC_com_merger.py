@@ -3,7 +3,6 @@ import logging
 import sys
 import os
 import uuid
-import copy
 import xml.etree.ElementTree as ET
 import re
 import autosar
@@ -93,18 +92,8 @@ _REF_MAPPING_ =\
 # Define disallowed PDU names that should not be copied
 _DISALLOWED_PDU_NAMES_ = ('N-PDU', 'DCM-I-PDU')
 
-def is_xml_tag_present(xml_file_path, tag_name):
-    try:
-        # Parse the XML file
-        tree = ET.parse(xml_file_path)
-        root = tree.getroot()
-
-        # Check if the specified tag is present
-        return bool(util.xml_elem_find(root,tag_name) is not None)
-
-    except ET.ParseError as e:
-        print("Error parsing XML file:", e)
-        return False
+# Containers removed from the merged extract when they are left empty
+_EMPTY_CONTAINERS_ = ('I-SIGNAL-TRIGGERINGS', )
 
 def replace_prefix(old_prefix, new_prefix):
     # Split old and new prefixes into parts
@@ -206,7 +195,7 @@ def copy_vehicletopology_packages(src_arxml, dst_arxml):
     for can_cluster in can_clusters:
         veh_sec_can_package = util.xml_ar_package_find(dst_vehicletopology, 'HIAsystemVehSecCANMAIN')
         if veh_sec_can_package is None:
-            veh_sec_can_package = factory.xml_ar_package_create('HIAsystemVehSecCANMAIN', str(uuid.uuid4()) +
+            veh_sec_can_package = factory.xml_ar_package_create('HIAsystemVehSecCANMAIN', util.new_uuid('/vehicletopology/HIAsystemVehSecCANMAIN', 'AR-PACKAGE') +
                                                 '-vehicletopology-' + 'HIAsystemVehSecCANMAIN')
             logging.info(" Copying CAN Cluster %s to %s",  util.xml_elem_find(can_cluster, 'SHORT-NAME').text, veh_sec_can_package[0].text)
             util.xml_elem_append(veh_sec_can_package[1], can_cluster, dst_arxml.parents)
@@ -221,6 +210,7 @@ def copy_vehicletopology_packages(src_arxml, dst_arxml):
     return can_cluster_list
 
 
+@util.timed_stage('communication packages')
 def copy_communication_packages(src_arxml, dst_arxml):
     # Copy Communication source to destination packages
     # enlisted in _COMMUNICATION_PACKAGES_
@@ -233,8 +223,6 @@ def copy_communication_packages(src_arxml, dst_arxml):
     assert dst_com is not None, "Destination Communication "\
                                 "package is not found!"
     pdus = []
-    isig_pdus_len = []
-    frame_len = []
     for name in _COMMUNICATION_PACKAGES_:
         src = util.xml_ar_package_find(src_com, name)
         dst = util.xml_ar_package_find(dst_com, name)
@@ -245,7 +233,7 @@ def copy_communication_packages(src_arxml, dst_arxml):
         if dst is None:
             # No destination package found; create AR-PACKAGE
             # and append it to the destination AR-PACKAGES
-            dst = factory.xml_ar_package_create(name, str(uuid.uuid4()) +
+            dst = factory.xml_ar_package_create(name, util.new_uuid('/Communication/' + name, 'AR-PACKAGE') +
                                         '-Communication-' + name)
             util.assert_elem_tag(dst_com[1], 'AR-PACKAGES')
             util.xml_elem_append(dst_com[1], dst, dst_arxml.parents)
@@ -258,27 +246,8 @@ def copy_communication_packages(src_arxml, dst_arxml):
             util.xml_elem_extend(pdus_to_copy, dst[1], src_arxml, dst_arxml, graceful=True)
             # Save isignal pdus for pdu filtering
             pdus = [pdu[0].text for pdu in pdus_to_copy]
-            # Fetch the pdu length and the pdu name
-            isig_pdus_len = [(util.xml_elem_find(pdu, "LENGTH").text, pdu[0].text) for pdu in pdus_to_copy]
-            # Sort List by PDU Name
-            isig_pdus_len = sorted(isig_pdus_len, key=lambda x: x[1])
-            frames = util.xml_elem_findall(src_com, 'CAN-FRAME')
-            if frames is not None:
-                # Fetch the frame length and the pdu name
-                frame_len = [(util.xml_elem_find(frame, "FRAME-LENGTH").text,
-                              util.xml_elem_find(frame, "PDU-REF").text.split("/")[-1]) \
-                             for frame in frames]
-                # Sort List by PDU Name
-                frame_len = sorted(frame_len, key=lambda x: x[1])
-            if len(frame_len) > 0 \
-                    and len(isig_pdus_len) > 0:
-                # Loop on those two lists and break once a difference is found
-                # This indicates a length mismatch between the pdu and its corresponding frame
-                for i, pdu_cfg in enumerate(isig_pdus_len):
-                    if frame_len[i] != pdu_cfg:
-                        logging.warning("Found a mismatch: in PDU: %s, frame length: %s, PDU length: %s",\
-                            pdu_cfg[1], frame_len[i][0], pdu_cfg[0])
-                        break
+            # Compare the pdu lengths with the lengths of their frames
+            util.pdu_frame_lengths_check(src_com, src_arxml.filename, ('I-SIGNAL-I-PDU', 'NM-PDU'))
             continue
         # Copy source elements
         util.assert_elem_tag(src[1], 'ELEMENTS')
@@ -315,6 +284,7 @@ def get_filtered_frames(src, disallowed_pdu_names):
     return frames_to_copy
 
 
+@util.timed_stage('fibex')
 def copy_fibex_elements(src_arxml, dst_arxml, pdus):
     # Copy source to destination Communication related Fibex elements
     # found in _COMMUNICATION_PACKAGES_
@@ -351,6 +321,7 @@ def copy_fibex_elements(src_arxml, dst_arxml, pdus):
     util.xml_elem_extend(list(cond_elems), dst_fibex, src_arxml, dst_arxml)
 
 
+@util.timed_stage('triggerings')
 def copy_isignal_and_pdu_triggerings(src_arxml,
                                      dst_arxml, pdus,
                                      dst_eth_physical_channel, graceful):
@@ -446,9 +417,10 @@ def copy_isignal_and_pdu_triggerings(src_arxml,
          and util.xml_elem_find(trig, 'I-PDU-REF').text is not None
          and util.xml_elem_find(trig, 'I-PDU-REF').text.split('/')[-1] in _DISALLOWED_PDU_NAMES_])
     # Remove non-relevant PDU triggerings (those not in the allowed pdus list)
+    has_pdu = util.substring_matcher(pdus)
     util.xml_elem_child_remove_all(
         src_trig,
-        [trig for trig in src_trig if not any(pdu in trig[0].text for pdu in pdus)])
+        [trig for trig in src_trig if not has_pdu(trig[0].text)])
     # Transform pdu port refs
     refs = util.xml_elem_findall(src_trig, 'I-PDU-PORT-REF')
     assert refs is not None, "There is no I-PDU-PORT-REF refs found "\
@@ -533,6 +505,7 @@ def prepare_ethernet_physical_channel(dst_arxml, dst_eth_physical_channel):
         dst_arxml.parents[dst_soad_config] = dst_ch
 
 
+@util.timed_stage('endpoints')
 def copy_network_endpoint(src_arxml, dst_arxml, dst_eth_physical_channel):
     # Copies an Ethernet DP's NetworkEndpoint to given destination channel
     # Note that this function makes the following assumptions:
@@ -574,6 +547,7 @@ def copy_network_endpoint(src_arxml, dst_arxml, dst_eth_physical_channel):
     return path_map
 
 
+@util.timed_stage('bundles')
 def copy_socket_connection_bundles(src_arxml, dst_arxml,
                                    dst_eth_physical_channel,
                                    sock_addr_map, isig_pdu_path_map):
@@ -645,6 +619,7 @@ def copy_socket_connection_bundles(src_arxml, dst_arxml,
                          dst_name=lambda el: util.xml_elem_find(el, 'SHORT-NAME').text, graceful=True)
 
 
+@util.timed_stage('sockets')
 def copy_socket_addresses(src_arxml, dst_arxml,
                           dst_eth_physical_channel,
                           net_ends_path_map):
@@ -695,8 +670,10 @@ def copy_socket_addresses(src_arxml, dst_arxml,
     return path_map
 
 
+@util.timed_stage('bundles')
 def create_socket_connection_bundle(bundle, src_arxml, dst_arxml,
-                                    frames, pdus, dst_eth_physical_channel):
+                                    frames, pdus, dst_eth_physical_channel,
+                                    net_end_refs=None):
     # Creates various socket adapter elements such as:
     # SO-AD-ROUTING-GROUP, NETWORK-ENDPOINT, SOCKET-ADDRESS
     # and SOCKET-CONNECTION-BUNDLE with corresponding
@@ -717,7 +694,7 @@ def create_socket_connection_bundle(bundle, src_arxml, dst_arxml,
         # No package found; create AR-PACKAGE
         # and append it to the AR-PACKAGES
         name = 'SoAdRoutingGroup'
-        dst_rgroups = factory.xml_ar_package_create(name, str(uuid.uuid4()) +
+        dst_rgroups = factory.xml_ar_package_create(name, util.new_uuid('/Communication/' + name, 'AR-PACKAGE') +
                                             '-Communication-' + name)
         util.assert_elem_tag(dst_com[1], 'AR-PACKAGES')
         util.xml_elem_append(dst_com[1], dst_rgroups, dst_arxml.parents)
@@ -756,9 +733,9 @@ def create_socket_connection_bundle(bundle, src_arxml, dst_arxml,
     # Get network endpoint path
     net_end_path = util.xml_elem_get_abs_path(net_end, dst_arxml)
     # Get network endpoint reference
-    net_end_ref = util.xml_elem_type_find(dst_arxml.xml.getroot(),
-                                     'NETWORK-ENDPOINT-REF',
-                                     net_end_path)
+    if net_end_refs is None:
+        net_end_refs = util.XmlRefIndex(dst_arxml, 'NETWORK-ENDPOINT-REF')
+    net_end_ref = net_end_refs.get(net_end_path)
     assert net_end_ref is not None, "Destination element "\
                                     "NETWORK-ENDPOINTS-REF:%s is "\
                                     "not found!" % net_end_path
@@ -803,31 +780,31 @@ def create_socket_connection_bundle(bundle, src_arxml, dst_arxml,
     dst_trig = util.xml_elem_find(dst_ch, 'PDU-TRIGGERINGS')
     assert dst_trig is not None, "Destination %s:PDU-TRIGGERINGS "\
                                  "is not found!" % _CHANNEL_MAPPING_[0]
+    dst_trig_path = util.xml_elem_get_abs_path(dst_trig, dst_arxml)
     # Filter only new ones
-    dst_trig = [trig for trig in dst_trig
-                if any(pdu in trig[0].text
-                       for pdu in pdus)]
+    has_pdu = util.substring_matcher(pdus)
+    dst_trig = [trig for trig in dst_trig if has_pdu(trig[0].text)]
     # Create socket connection ipdu triggerings
-    ipdus = []
+    trig_specs = []
     for trig in dst_trig:
-        util.assert_elem_tag(trig[1], 'I-PDU-PORT-REFS')
-        assert len(trig[1]) == 1, "Invalid number of I-PDU-PORT-REFs "\
-                                  "in the PDU-TRIGGERING:%s!" % trig[0].text
-        frame = [frames[pdu] for pdu in frames.keys() if pdu == trig[0].text.replace('PduTr', '')]
-        assert len(frame) == 1, "The PDU-TRIGGERING:%s can't be matched!"\
-                                % trig[0].text
-        trig_spec = [frame[0]['id'],
-                     trig[1][0].text,
-                     util.xml_elem_get_abs_path(trig, dst_arxml),
-                     rgroup_path]
-        ipdu = factory.xml_socket_connection_ipdu_id_create(*trig_spec)
-        util.xml_elem_append(ipdus, ipdu, dst_arxml.parents)
+        _, port_refs, _ = util.PDU_TRIGGERING_SHAPE.get(trig)
+        assert len(port_refs) == 1, "Invalid number of I-PDU-PORT-REFs "\
+                                    "in the PDU-TRIGGERING:%s!" % trig[0].text
+        frame = frames.get(trig[0].text.replace('PduTr', ''))
+        assert frame is not None, "The PDU-TRIGGERING:%s can't be matched!"\
+                                  % trig[0].text
+        trig_specs.append((frame['id'],
+                           port_refs[0].text,
+                           dst_trig_path + '/' + trig[0].text,
+                           rgroup_path))
+    ipdus = [factory.xml_socket_connection_ipdu_id_create(*trig_spec)
+             for trig_spec in trig_specs]
     # Create socket connection bundle
     bundle = factory.xml_socket_connection_bundle_create(get_name(bundle['name']),
                                                  client_ref, server_ref)
     # Get bundles pdus elem
     bpdus = util.xml_elem_find(bundle, 'PDUS')
-    bpdus.extend(ipdus)
+    util.xml_elem_append(bpdus, ipdus, dst_arxml.parents)
     # Get connection bundles
     dst_bundles = util.xml_elem_find(dst_ch, 'CONNECTION-BUNDLES')
     assert dst_bundles is not None, "Destination %s:CONNECTION-BUNDLES "\
@@ -842,19 +819,18 @@ def fetch_can_frame_triggering_info(src_arxml, is_mrcom_arxml):
     # identifier
     # Returns dictionary with the frames information
     can_frames = {}
+    # Check the shapes of the source elements in one pass, they are read
+    # below without checking them again
+    util.xml_shapes_check(src_arxml, util.XML_FRAME_INFO_SHAPES)
     frames = util.xml_elem_findall(src_arxml.xml.getroot(), 'CAN-FRAME-TRIGGERING')
     for frame in frames:
-        # Integrity check
-        util.assert_elem_tag(frame[0], 'SHORT-NAME')
-        util.assert_elem_tag(frame[2], 'FRAME-REF')
-        util.assert_elem_tag(frame[4], 'CAN-ADDRESSING-MODE')
-        util.assert_elem_tag(frame[5], ('CAN-FRAME-RX-BEHAVIOR',
-                                   'CAN-FRAME-TX-BEHAVIOR'))
-        util.assert_elem_tag(frame[6], 'IDENTIFIER')
+        # Checked above
+        short_name, frame_ref, mode, behavior, identifier = \
+            util.CAN_FRAME_TRIGGERING_SHAPE.fields_get(frame)
         # Let's figure out which pdu is referenced by this frame
         # triggering so we can save packing order and pdu reference
         # Get frame name from the ref
-        name = frame[2].text[frame[2].text.rfind('/') + 1:]
+        name = frame_ref.text[frame_ref.text.rfind('/') + 1:]
         # Get can frame
         src_frame = util.xml_elem_type_find(src_arxml.xml.getroot(),
                                        'CAN-FRAME', name)
@@ -867,10 +843,10 @@ def fetch_can_frame_triggering_info(src_arxml, is_mrcom_arxml):
                                   "in the CAN-FRAME:%s!" % name
         # Get first and only child
         src_map = src_map[0]
-        # Integrity check
-        util.assert_elem_tag(src_map[2], 'PDU-REF')
+        # Checked above
+        _, pdu_ref = util.PDU_TO_FRAME_MAPPING_SHAPE.fields_get(src_map)
         # Finally, add entry
-        pdu = src_map[2].text[src_map[2].text.rfind('/') + 1:]
+        pdu = pdu_ref.text[pdu_ref.text.rfind('/') + 1:]
         assert can_frames.get(pdu, None) is None, "The entry already "\
                                                   "exist with name %s!" % pdu
         if is_mrcom_arxml:
@@ -881,19 +857,20 @@ def fetch_can_frame_triggering_info(src_arxml, is_mrcom_arxml):
                 imap = util.xml_elem_find(ipdu, 'I-SIGNAL-TO-I-PDU-MAPPING')
                 assert imap is not None, "Source I-SIGNAL-I-PDU:"\
                                         "I-SIGNAL-TO-I-PDU-MAPPING is not found!"
-                util.assert_elem_tag(imap[2], 'PACKING-BYTE-ORDER')
-                packing = imap[2].text
+                _, packing_order, _ = util.I_SIGNAL_TO_I_PDU_MAPPING_SHAPE.fields_get(imap)
+                packing = packing_order.text
             # Order items by pdu (reference)
-            can_frames[pdu] = {'name': frame[0].text,
-                            'mode': frame[4].text,
-                            'type': frame[5].text,
-                            'tx': util.is_elem_tag(frame[5],
+            can_frames[pdu] = {'name': short_name.text,
+                            'mode': mode.text,
+                            'type': behavior.text,
+                            'tx': util.is_elem_tag(behavior,
                                                 'CAN-FRAME-TX-BEHAVIOR'),
-                            'id': frame[6].text,
+                            'id': identifier.text,
                             'packing': packing}
     return can_frames
 
 
+@util.timed_stage('mr com flavour')
 def add_mr_com_flavour(dst_arxml, can_frames, can_pdus,
                        dst_eth_physical_channel):
     # Add MR COM protocol support by enriching dst_arxml with
@@ -944,12 +921,30 @@ def add_mr_com_flavour(dst_arxml, can_frames, can_pdus,
     pdu_trigs = util.xml_elem_find(dst_ch, 'PDU-TRIGGERINGS')
     assert pdu_trigs is not None, "Destination %s:PDU-TRIGGERINGS "\
                                   "is not found!" % _CHANNEL_MAPPING_[1]
+    # Precompute the lookups once, so the loop below is linear in the CAN
+    # pdus (the first element of a name wins, as with xml_elem_type_find)
+    ipdus = {}
+    for ipdu in util.xml_elem_findall(dst_pdu, 'I-SIGNAL-I-PDU'):
+        ipdus.setdefault(ipdu[0].text, ipdu)
+    pdu_trigs_by_pdu = {}
+    for trig in pdu_trigs:
+        pdu_trigs_by_pdu.setdefault(trig[0].text.replace('PduTr', ''),
+                                    []).append(trig)
+    port_paths = [(port[0].text[port[0].text.rfind('_') + 1:],
+                   util.xml_elem_get_abs_path(port, dst_arxml))
+                  for port in dst_ports]
+    sig_path = util.xml_elem_get_abs_path(sig, dst_arxml)
+    # The new elements are appended in batches after the loop, their paths
+    # are known from their containers
+    isig_pkg_path = util.xml_elem_get_abs_path(dst_isig, dst_arxml)
+    dst_trigs_path = util.xml_elem_get_abs_path(dst_trigs, dst_arxml)
+    new_isigs, new_isig_trigs, new_fibex = [], [], []
     for index, pdu in enumerate(can_pdus):
         # Add iSignal
         _args = ['32',
                  '/DataType/DataTypeSemantics/SwBaseTypes/SIGMrCommHdrPartB',
                  '/DataType/DataTypeSemantics/uint32',
-                 util.xml_elem_get_abs_path(sig, dst_arxml)]
+                 sig_path]
         key = can_frames[pdu]['type'], can_frames[pdu]['mode']
         if can_frames[pdu]['packing'] == 'MOST-SIGNIFICANT-BYTE-FIRST':
             isig = factory.xml_isignal_create(_ISIGNAL_INIT_VAL_BIGEND[key][1] + str(index),
@@ -957,11 +952,10 @@ def add_mr_com_flavour(dst_arxml, can_frames, can_pdus,
         else:
             isig = factory.xml_isignal_create(_ISIGNAL_INIT_VAL_LTLEND_[key][1] + str(index),
                                       _ISIGNAL_INIT_VAL_LTLEND_[key][0], *_args)
-        util.xml_elem_extend(isig, dst_isig[1], dst_arxml, dst_arxml,
-                        src_name=lambda el: el.text,
-                        dst_name=lambda el: el.text, graceful=True)
+        new_isigs.append(isig)
+        isig_path = isig_pkg_path + '/' + isig[0].text
         # Add I-SIGNAL-TO-PDU-MAPPING to each Pdu
-        ipdu = util.xml_elem_type_find(dst_pdu, 'I-SIGNAL-I-PDU', pdu)
+        ipdu = ipdus.get(pdu)
         assert ipdu is not None, "Destination I-SIGNAL-I-PDU:%s is not found!"\
                                  % pdu
         pdu_maps = util.xml_elem_find(ipdu, 'I-SIGNAL-TO-PDU-MAPPINGS')
@@ -969,8 +963,8 @@ def add_mr_com_flavour(dst_arxml, can_frames, can_pdus,
                                      " is not found!" % pdu_maps
         # Offset start position by 32
         for pdu_map in pdu_maps:
-            util.assert_elem_tag(pdu_map[3], 'START-POSITION')
-            pdu_map[3].text = str(int(pdu_map[3].text) + 32)
+            _, _, start = util.I_SIGNAL_TO_I_PDU_MAPPING_SHAPE.get(pdu_map)
+            start.text = str(int(start.text) + 32)
             # check for UPDATE-INDICATION-BIT-POSITION
             upd_bit = util.xml_elem_find(pdu_map, 'UPDATE-INDICATION-BIT-POSITION')
             if upd_bit is not None:
@@ -982,7 +976,7 @@ def add_mr_com_flavour(dst_arxml, can_frames, can_pdus,
         length.text = str(int(length.text) + 4)
         # Add new entry
         _args = [isig[0].text + ('_mtx' if can_frames[pdu]['tx'] else '_mrx'),
-                 util.xml_elem_get_abs_path(isig, dst_arxml),
+                 isig_path,
                  can_frames[pdu]['packing'],
                  '7' if can_frames[pdu]['packing'] ==
                  'MOST-SIGNIFICANT-BYTE-FIRST' else 0,
@@ -990,40 +984,40 @@ def add_mr_com_flavour(dst_arxml, can_frames, can_pdus,
         isig_map = factory.xml_isignal_to_ipdu_mapping_create(*_args)
         util.xml_elem_extend(isig_map, pdu_maps, dst_arxml, dst_arxml,
                         src_name=lambda el: el.text,
-                        dst_name=lambda el: el.text,graceful=True)
+                        dst_name=lambda el: el.text, graceful=True)
         # Add I-SIGNAL-TRIGGERINGs for each ISignal
         isig_trigs = {}
-        for index, port in enumerate(dst_ports):
-            _args = [isig[0].text + '_' + str(index),
-                     util.xml_elem_get_abs_path(port, dst_arxml),
-                     util.xml_elem_get_abs_path(isig, dst_arxml)]
-            direction = port[0].text[port[0].text.rfind('_') + 1:]
-            isig_trigs[direction] = factory.xml_isignal_triggering_create(*_args)
-            util.xml_elem_extend(isig_trigs[direction], dst_trigs, dst_arxml,
-                            dst_arxml, src_name=lambda el: el.text,
-                            dst_name=lambda el: el.text)
+        for port_index, (direction, port_path) in enumerate(port_paths):
+            isig_trig = factory.xml_isignal_triggering_create(
+                isig[0].text + '_' + str(port_index), port_path, isig_path)
+            new_isig_trigs.append(isig_trig)
+            isig_trigs[direction] = isig_trig
         # Add FIBEX-ELEMENT-REF-CONDITIONAL referencing new ISignals
-        signal_ref = util.xml_elem_get_abs_path(isig, dst_arxml)
-        fibex = factory.xml_fibex_elem_ref_conditional_create(signal_ref)
-        util.xml_elem_extend(fibex, dst_fibex, dst_arxml, dst_arxml,
-                        src_name=lambda el: el.text,
-                        dst_name=lambda el: el.text)
+        new_fibex.append(factory.xml_fibex_elem_ref_conditional_create(isig_path))
         # Add I-SIGNAL-TRIGGERING-REF to PDU-TRIGGERING:I-SIGNAL-TRIGGERINGS
-        dst_trig = [trig for trig in pdu_trigs if pdu == trig[0].text.replace('PduTr', '')]
+        dst_trig = pdu_trigs_by_pdu.get(pdu, [])
         assert len(dst_trig) == 1, "The %s can't be matched in destination "\
                                    "%s:PDU-TRIGGERINGS "\
                                    % (pdu, _CHANNEL_MAPPING_[1])
         trig = dst_trig[0]
-        util.assert_elem_tag(trig[1], 'I-PDU-PORT-REFS')
-        assert len(trig[1]) == 1, "Invalid number of I-PDU-PORT-REFs "\
-                                  "in the PDU-TRIGGERING:%s!" % trig[0].text
-        util.assert_elem_tag(trig[3], 'I-SIGNAL-TRIGGERINGS')
-        direction = trig[1][0].text[trig[1][0].text.rfind('_') + 1:]
-        signal_ref = util.xml_elem_get_abs_path(isig_trigs[direction], dst_arxml)
+        _, port_refs, isig_trig_refs = util.PDU_TRIGGERING_SHAPE.get(trig)
+        assert len(port_refs) == 1, "Invalid number of I-PDU-PORT-REFs "\
+                                    "in the PDU-TRIGGERING:%s!" % trig[0].text
+        if isig_trig_refs is None:
+            raise util.XmlShapeError("PDU-TRIGGERING:%s:I-SIGNAL-TRIGGERINGS "
+                                     "is not found!" % trig[0].text)
+        direction = port_refs[0].text[port_refs[0].text.rfind('_') + 1:]
+        signal_ref = dst_trigs_path + '/' + isig_trigs[direction][0].text
         ref = factory.xml_isignal_triggering_ref_conditional_create(signal_ref)
-        util.xml_elem_extend(ref, trig[3], dst_arxml, dst_arxml,
+        util.xml_elem_extend(ref, isig_trig_refs, dst_arxml, dst_arxml,
                         src_name=lambda el: el.text,
                         dst_name=lambda el: el.text)
+    # Append the new ISignals, I-SIGNAL-TRIGGERINGs and FIBEX-ELEMENTs once.
+    # They were never checked for name clashes (one by one their names were
+    # their children's texts), so they are appended without the check.
+    util.xml_elem_append(dst_isig[1], new_isigs, dst_arxml.parents)
+    util.xml_elem_append(dst_trigs, new_isig_trigs, dst_arxml.parents)
+    util.xml_elem_append(dst_fibex, new_fibex, dst_arxml.parents)
 
 
 def fix_ihfa_ihra_naming(src_arxml):
@@ -1072,6 +1066,7 @@ def fix_ihfa_ihra_naming(src_arxml):
     )
 
 
+@util.timed_stage('triggerings')
 def update_isignal_and_pdu_triggerings(src_arxml,
                                      dst_arxml,
                                      dst_physical_channel):
@@ -1143,9 +1138,9 @@ def update_isignal_and_pdu_triggerings(src_arxml,
         assert dst_trig is not None, "Destination %s:PDU-TRIGGERINGS "\
                                     "is not found!" % _CHANNEL_MAPPING_[0]
         # Remove non-relevant pdu triggerings
+        has_pdu = util.substring_matcher(fetch_pdu(src_arxml))
         util.xml_elem_child_remove_all(src_trig, [trig for trig in src_trig
-                                             if not any(pdu in trig[0].text
-                                                      for pdu in fetch_pdu(src_arxml))])
+                                             if not has_pdu(trig[0].text)])
         # Transform pdu port refs
         refs = util.xml_elem_findall(src_trig, 'I-PDU-PORT-REF')
         assert refs is not None, "There is no I-PDU-PORT-REF refs found "\
@@ -1161,9 +1156,9 @@ def update_isignal_and_pdu_triggerings(src_arxml,
         assert dst_trig is not None, "Destination %s:FRAME-TRIGGERINGS " \
                                     "is not found!" % _CHANNEL_MAPPING_[0]
         # Remove non-relevant frame triggerings
+        has_frame = util.substring_matcher(fetch_can_frame(src_arxml))
         util.xml_elem_child_remove_all(src_trig, [trig for trig in src_trig
-                                             if not any(frame in trig[0].text
-                                                      for frame in fetch_can_frame(src_arxml ))])
+                                             if not has_frame(trig[0].text)])
 
 
 def fetch_can_frame(src_arxml):
@@ -1189,19 +1184,19 @@ def fetch_can_frame(src_arxml):
 
 def add_swbasetype_arpackage(swc_dp_arxmls,dst_arxml):
     # Create a new AR package - DataType in com_merged arxml
-    dst_datatype = factory.xml_ar_package_create('DataType', str(uuid.uuid4()) +
+    dst_datatype = factory.xml_ar_package_create('DataType', util.new_uuid('/DataType', 'AR-PACKAGE') +
                                         '-DataType')
     util.xml_elem_add_ar_packages(dst_datatype, dst_arxml.parents)
     util.xml_elem_append(dst_arxml.xml.getroot()[0], dst_datatype, dst_arxml.parents)
     # Get destination Datatype package
     dst_datatype_package = util.xml_ar_package_find(dst_arxml.xml.getroot(), 'DataType')
     # Create and add a new AR package - DataTypeSemantics as a child in Datatype package
-    dst = factory.xml_ar_package_create('DataTypeSemantics', str(uuid.uuid4()) +
+    dst = factory.xml_ar_package_create('DataTypeSemantics', util.new_uuid('/DataType/DataTypeSemantics', 'AR-PACKAGE') +
                                         '-DataType-DataTypeSemantics')
     util.xml_elem_add_ar_packages(dst, dst_arxml.parents)
     util.xml_elem_append(dst_datatype_package[2], dst, dst_arxml.parents)
     for arxml in swc_dp_arxmls:
-        src_arxml = autosar.arxml.load(arxml)
+        src_arxml = util.arxml_load(arxml)
         # Get source package
         src_swbasetype = util.xml_ar_package_find(src_arxml.xml.getroot(), 'SwBaseTypes')
         assert src_swbasetype is not None, "Source SwBaseTypes package is not found!"
@@ -1221,8 +1216,8 @@ def copy_ecpi_to_ethernet_connectors(dst_arxml):
         # Check if the connector already has an ECU-COMM-PORT-INSTANCES element
         existing_ecpi = util.xml_elem_find(connector, 'ECU-COMM-PORT-INSTANCES')
         if existing_ecpi is None:
-            # Create a deep copy of the original tag
-            copied_ecpi = copy.deepcopy(dst_ecpi)
+            # Clone the original tag, sharing its leaves (e.g. port SHORT-NAMEs)
+            copied_ecpi = util.xml_elem_shared_clone(dst_ecpi)
             # Insert the ECU-COMM-PORT-INSTANCES element to the Ethernet-communication-connector at third index
             util.xml_elem_append_at_index(connector, copied_ecpi, 3, dst_arxml.parents)
 
@@ -1263,6 +1258,7 @@ def process_gateway_and_remove_signals(src_arxml, dst_arxml):
             pdu_mappings[source_pdu_ref] = target_pdu_ref
     # Now process each PDU-TRIGGERING in the destination ARXML
     pdu_triggerings = util.xml_elem_findall(dst_arxml.xml.getroot(), 'PDU-TRIGGERING')
+    removed = 0
     for pdu_trig in pdu_triggerings:
         # Check if this PDU-TRIGGERING is a target in any of the mappings
         pdu_ref = util.xml_elem_find(pdu_trig, 'I-PDU-REF').text
@@ -1274,7 +1270,10 @@ def process_gateway_and_remove_signals(src_arxml, dst_arxml):
                     ref = util.xml_elem_find(i_signal_trig, 'I-SIGNAL-TRIGGERING-REF')
                     if ref and ref.text in pdu_mappings:  # Check if this I-SIGNAL should be removed
                         i_signal_triggerings.remove(i_signal_trig)
-                        logging.info("Removed I-SIGNAL-TRIGGERING {ref.text} as it is linked to a mapped PDU")
+                        removed += 1
+                        logging.debug("Removed I-SIGNAL-TRIGGERING %s as it is linked to a mapped PDU", ref.text)
+    if removed:
+        logging.info("Removed %d I-SIGNAL-TRIGGERINGs linked to mapped PDUs", removed)
 
 
 def update_reference(ref):
@@ -1329,7 +1328,8 @@ def check_defaulted_ports(dst_arxml):
             defaulted_addresses.add(socket_address[0].text)
     if defaulted_addresses:
         logging.warning("%d socket addresses defaulted to 1001 [%s]",
-                        len(defaulted_addresses), ', '.join(defaulted_addresses))
+                        len(defaulted_addresses),
+                        util.names_summary(sorted(defaulted_addresses)))
 
 def remove_unwanted_can_frames(dst_arxml):
     """
@@ -1348,80 +1348,52 @@ def remove_unwanted_can_frames(dst_arxml):
         logging.warning("Frame AR-PACKAGE not found. Skipping CAN-FRAME removal.")
         return  # If no frames exist, nothing to process
 
-    # Find all CAN-FRAME elements
-    for can_frame in list(util.xml_elem_findall(dst_frame_pkg, 'CAN-FRAME')):
-        frame_name_elem = util.xml_elem_find(can_frame, 'SHORT-NAME')
-        if frame_name_elem is None:
-            continue
-
-        pdu_mappings_elem = util.xml_elem_find(can_frame, 'PDU-TO-FRAME-MAPPINGS')
-        if pdu_mappings_elem is None:
-            continue
-
-        if should_remove_can_frame(frame_name_elem, can_frame, pdu_mappings_elem, _DISALLOWED_PDU_NAMES_, dst_frame_pkg):
-            continue  # Frame was removed, skip to next
-
+    # The frames are in the ELEMENTS of the package and of its sub-packages
+    elements_lists = util.xml_elem_findall(dst_frame_pkg, 'ELEMENTS')
+    if not elements_lists:
+        logging.warning("Frame AR-PACKAGE has no ELEMENTS. Skipping CAN-FRAME removal.")
+        return
 
-        pdu_mappings = util.xml_elem_findall(pdu_mappings_elem, 'PDU-TO-FRAME-MAPPING')
-        for mapping in pdu_mappings:
-            pdu_ref_elem = util.xml_elem_find(mapping, 'PDU-REF')
-            if pdu_ref_elem is None or pdu_ref_elem.get('DEST') not in _DISALLOWED_PDU_NAMES_:
+    # Index the frames of each ELEMENTS by the DESTs of their PDU-REFs in one
+    # pass and drop the ones referencing a disallowed PDU type. Every ELEMENTS
+    # list is rebuilt once (Element.remove is linear per frame).
+    ref_tag = f"{{{util.xml_get_namespace(dst_frame_pkg)}}}PDU-REF"
+    disallowed = set(_DISALLOWED_PDU_NAMES_)
+    removed = []
+    for elements in elements_lists:
+        unwanted = []
+        for can_frame in elements:
+            if not util.is_elem_tag(can_frame, 'CAN-FRAME'):
                 continue
-
-            logging.info("Removing CAN-FRAME: %s because it references %s", frame_name_elem.text, pdu_ref_elem.text)
-            try:
-                dst_frame_pkg[1].remove(can_frame)
-                logging.info("Successfully removed %s", frame_name_elem.text)
-            except ValueError:
-                logging.warning("Failed to remove %s, element not in list", frame_name_elem.text)
-            break  # Stop checking once we find an invalid reference
-
+            frame_name_elem = util.xml_elem_find(can_frame, 'SHORT-NAME')
+            pdu_mappings_elem = util.xml_elem_find(can_frame, 'PDU-TO-FRAME-MAPPINGS')
+            if frame_name_elem is None or pdu_mappings_elem is None:
+                continue
+            dests = {ref.get('DEST'): ref for ref in pdu_mappings_elem.iter(ref_tag)}
+            unwanted_dests = disallowed.intersection(dests)
+            if unwanted_dests:
+                logging.debug("Removing CAN-FRAME: %s because it references %s", frame_name_elem.text,
+                              dests[min(unwanted_dests)].text)
+                unwanted.append(can_frame)
+                removed.append(frame_name_elem.text)
+        util.xml_elem_child_remove_all(elements, unwanted)
+
+    if removed:
+        logging.info("Removed %d CAN-FRAMEs referencing %s: %s", len(removed),
+                     '/'.join(_DISALLOWED_PDU_NAMES_), util.names_summary(removed))
 
     # If the Frame package is now empty, remove it
-    if not util.xml_elem_findall(dst_frame_pkg, 'CAN-FRAME'):
+    if util.xml_elem_find(dst_frame_pkg, 'CAN-FRAME') is None:
         logging.info("Removing empty Frame AR-PACKAGE from Communication.")
         dst_com[1].remove(dst_frame_pkg)  # Explicitly remove the Frame AR-PACKAGE
 
 
-def should_remove_can_frame(frame_name_elem, can_frame, pdu_mappings_elem, _DISALLOWED_PDU_NAMES_, dst_frame_pkg):
-    pdu_mappings = util.xml_elem_findall(pdu_mappings_elem, 'PDU-TO-FRAME-MAPPING')
-    for mapping in pdu_mappings:
-        pdu_ref_elem = util.xml_elem_find(mapping, 'PDU-REF')
-        if pdu_ref_elem is not None and pdu_ref_elem.get('DEST') in _DISALLOWED_PDU_NAMES_:
-            logging.info("Removing CAN-FRAME: %s because it references %s", frame_name_elem.text, pdu_ref_elem.text)
-            try:
-                dst_frame_pkg[1].remove(can_frame)
-                logging.info("Successfully removed %s", frame_name_elem.text)
-            except ValueError:
-                logging.warning("Failed to remove %s, element not in list", frame_name_elem.text)
-            return True  # Frame removed
-    return False
-
-def remove_empty_triggerings(root):
-    ns = {'ns': 'http://autosar.org/schema/r4.0'}  # Match your ARXML namespace
-    # Iterate through all potential parent elements
-    for parent in root.findall(".//*"):
-        # Find direct children that are empty I-SIGNAL-TRIGGERINGS
-        empty_triggerings = [
-            child for child in parent
-            if child.tag == f'{{{ns["ns"]}}}I-SIGNAL-TRIGGERINGS' and len(child) == 0
-        ]
-        # Remove found elements
-        for triggering in empty_triggerings:
-            parent.remove(triggering)
+def remove_empty_triggerings(dst_arxml):
+    # Remove the containers left empty by the merge (see _EMPTY_CONTAINERS_)
+    removed = util.xml_empty_containers_prune(dst_arxml, _EMPTY_CONTAINERS_)
+    logging.info("Removed %d empty %s", removed, '/'.join(_EMPTY_CONTAINERS_))
 
-def main(args):
-    # Prepare the script options and load the files
-    help_desc = {'i': ('input_arxml', "A comma separated list of input files: "
-                                      " file1, file2, file3 etc. where file1 "
-                                      "is the HI ECU COM arxml and rest are "
-                                      "the MR ECU COM arxmls."),
-                 'o': ('output_arxml', "A path to the output HI ECU COM "
-                                       "arxml file.")}
-    options = util.ScriptOptions.get(args, description="Script to merge "
-                                "COM extracts.", version=VERSION,
-                                help_desc=help_desc)
-    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+def merge(options):
     # Get list of input files
     arxmls = options.input_arxml.split(',')
     stakeholder_directory = 'out/products/hic/deps/stakeholder/components/input/MR_DP/HIC/'
@@ -1444,7 +1416,7 @@ def main(args):
     # from Capital Networks for our HI COM-SYSTEM. We consider this
     # to be the "base" or "destination" .arxml and everything else
     # gets added on top of it.
-    dst_arxml = autosar.arxml.load(tmp_base_arxml)
+    dst_arxml = util.arxml_load(tmp_base_arxml, shared=False)
     logging.info('Using %s as base .arxml', arxmls[0])
     # TODO: Maintain a separate file where the Device Proxy type is
     # given since we can't rely on any naming convention. For now,
@@ -1455,13 +1427,16 @@ def main(args):
     swc_dp_arxmls = arxmls[1:]
     graceful = False
     for arxml_name in arxmls[2:]:
-        if is_xml_tag_present(arxml_name,"ETHERNET-CLUSTER"):
+        if util.is_xml_tag_present(arxml_name,"ETHERNET-CLUSTER"):
             eth_dp_arxmls.append(arxml_name)
-        if is_xml_tag_present(arxml_name,"CAN-CLUSTER"):
+        if util.is_xml_tag_present(arxml_name,"CAN-CLUSTER"):
             can_dp_arxmls.append(arxml_name)
     for arxml in eth_dp_arxmls:
         # Load Ethernet DP .arxml
-        src_arxml = autosar.arxml.load(arxml)
+        util.stage_dp(arxml)
+        src_arxml = util.arxml_load(arxml)
+        # Released below, its elements are moved instead of copied
+        util.arxml_consume(src_arxml)
         logging.info('Processing %s', arxml)
         if "SRSR" in src_arxml.filename:
             vlan = _VLAN_[1]
@@ -1498,6 +1473,7 @@ def main(args):
             src_arxml, dst_arxml,
             vlan,
             sock_addr_map, isig_pdu_path_map)
+        util.arxml_release(src_arxml)
     # Merge MR COM extracts into HI COM extract
     can_frames, can_pdus = {}, []
     vlan = _VLAN_[1]
@@ -1506,7 +1482,10 @@ def main(args):
         if any(node_name in arxml for node_name in special_handling_dp_arxmls):
             continue
         # Processing MR Node DP with pure CAN communication with HIC
-        src_arxml = autosar.arxml.load(arxml)
+        util.stage_dp(arxml)
+        src_arxml = util.arxml_load(arxml)
+        # Released below, its elements are moved instead of copied
+        util.arxml_consume(src_arxml)
         logging.info('Processing %s for Pure CAN Communication with HIC', arxml)
         fix_ihfa_ihra_naming(src_arxml)
         # This is to copy connectors and comm-controller from can dp arxmls as they don't exist in the com arxml
@@ -1527,12 +1506,18 @@ def main(args):
         for dst_physical_channel in dst_physical_channels:
             update_isignal_and_pdu_triggerings(src_arxml, dst_arxml,
                                             dst_physical_channel)
+        util.arxml_release(src_arxml)
+    # NETWORK-ENDPOINT-REFs of the merged document, indexed once per merge
+    net_end_refs = util.XmlRefIndex(dst_arxml, 'NETWORK-ENDPOINT-REF')
     for arxml in can_dp_arxmls:
         if not any(node_name in arxml for node_name in special_handling_dp_arxmls):
             continue
         vlan = _VLAN_[1]
         # Load MR COM extract
-        src_arxml = autosar.arxml.load(arxml)
+        util.stage_dp(arxml)
+        src_arxml = util.arxml_load(arxml)
+        # Released below, its elements are moved instead of copied
+        util.arxml_consume(src_arxml)
         logging.info('Processing %s for MRCOM Communication with HIC', arxml)
         fix_ihfa_ihra_naming(src_arxml)
         # Get frames info
@@ -1551,10 +1536,12 @@ def main(args):
         # Create socket connection bundle to dst_arxml
         create_socket_connection_bundle(_SOCKET_CONNECTION_BUNDLE_,
                                         src_arxml, dst_arxml,
-                                        frames, pdus, vlan)
+                                        frames, pdus, vlan, net_end_refs)
         can_pdus += pdus
         # Todo: check for keys collision
         can_frames.update(frames)
+        util.arxml_release(src_arxml)
+    util.stage_dp(None)
     add_mr_com_flavour(dst_arxml, can_frames, can_pdus, vlan)
     # Add SWBaseType AR Package in com_merged arxml from swc_merged arxml
     #add_swbasetype_arpackage(swc_dp_arxmls, dst_arxml)
@@ -1578,20 +1565,54 @@ def main(args):
         if file_name.endswith('.arxml'):
             arxml_path = os.path.join(stakeholder_directory, file_name)
             try:
-                src_arxml = autosar.arxml.load(arxml_path)
-                logging.info('Processing {file_name}: ')
+                util.stage_dp(arxml_path)
+                src_arxml = util.arxml_load(arxml_path)
+                # Released below, its elements are moved instead of copied
+                util.arxml_consume(src_arxml)
+                logging.info('Processing %s', file_name)
                 # function to process gateway AR.package and remove i-signals PDUs in each Stackholder ARXML file
                 process_gateway_and_remove_signals(src_arxml, dst_arxml )
+                util.arxml_release(src_arxml)
             except (IOError, ValueError) as e:
-                logging.error('Failed to process {file_name}: {str(e)}')
+                logging.error('Failed to process %s: %s', file_name, e)
+    util.stage_dp(None)
     # Removes any CAN frame with IPU refs to N-PDU' NM-PDU or DCM-I-PDU dest arxml
     remove_unwanted_can_frames(dst_arxml)
     update_all_routing_refs(dst_arxml)
     # Remove empty element - I-SIGNAL-TRIGGERINGS
-    remove_empty_triggerings(dst_arxml.xml.getroot())
+    remove_empty_triggerings(dst_arxml)
     util.ensure_unique_uuids(dst_arxml)
+    # Summarize the PDU/frame length issues of all the DPs
+    util.pdu_frame_lengths_summary()
+    # Report references that don't resolve in the merged extract
+    util.xml_refs_check(dst_arxml)
     # Save merged COM extract arxml
-    dst_arxml.save(options.output_arxml)
+    with util.stage('save'):
+        dst_arxml.save(options.output_arxml)
+
+
+def main(args):
+    # Prepare the script options and load the files
+    help_desc = {'i': ('input_arxml', "A comma separated list of input files: "
+                                      " file1, file2, file3 etc. where file1 "
+                                      "is the HI ECU COM arxml and rest are "
+                                      "the MR ECU COM arxmls."),
+                 'o': ('output_arxml', "A path to the output HI ECU COM "
+                                       "arxml file.")}
+    options = util.ScriptOptions.get(args, description="Script to merge "
+                                "COM extracts.", version=VERSION,
+                                help_desc=help_desc)
+    util.logging_setup(logging.INFO)
+
+    # Save the profile report and stop the profilers even if the merge
+    # asserts
+    try:
+        merge(options)
+    finally:
+        util.profile_report_save(options.output_arxml)
+        util.search_counters_summary()
+
+
 # Run COM merger
 if __name__ == "__main__":
     SystemExit(main(sys.argv[1:]))
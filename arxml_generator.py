@@ -0,0 +1,539 @@
+#!/usr/bin/python3
+
+import copy
+import logging
+import math
+import os
+import sys
+import xml.etree.ElementTree as ET
+from optparse import OptionParser
+
+import factory
+import util
+
+# This script's version
+VERSION = '0.1.0'
+
+# Element kinds that are scaled together: the count option, the tag the
+# count is given in and the tags cloned for it. References between the
+# cloned elements are moved to the clones, list references from the rest
+# of the document (FIBEX-ELEMENTS, I-SIGNAL-I-PDUS, PDUS...) get an entry
+# per clone. The triggerings follow their PDUs and signals.
+_UNITS_ = (('pdus', 'I-SIGNAL-I-PDU',
+            ('I-SIGNAL-I-PDU', 'NM-PDU', 'CAN-FRAME',
+             'CAN-FRAME-TRIGGERING', 'PDU-TRIGGERING')),
+           ('signals', 'I-SIGNAL',
+            ('I-SIGNAL', 'SYSTEM-SIGNAL', 'I-SIGNAL-TRIGGERING',
+             'I-SIGNAL-TO-I-PDU-MAPPING')),
+           ('endpoints', 'NETWORK-ENDPOINT',
+            ('NETWORK-ENDPOINT', )),
+           ('bundles', 'SOCKET-CONNECTION-BUNDLE',
+            ('SOCKET-CONNECTION-BUNDLE', 'SOCKET-ADDRESS')))
+
+# Device Proxy specific names: the units renamed in every DP so the DPs
+# don't clash with each other or with the base
+_DP_UNITS_ = ('pdus', 'signals')
+
+# Other elements renamed in every DP: the groups of the renamed units, which
+# would clash with the base's otherwise
+_DP_TAGS_ = ('SYSTEM-SIGNAL-GROUP', 'I-SIGNAL-GROUP', 'I-SIGNAL-I-PDU-GROUP')
+
+# Device Proxy file name. The mergers tell a DP's Ethernet side from its CAN
+# side by the file name, with "system" replaced by "Ethsystem" (see their
+# main), so it must have "system" in it.
+_DP_FILENAME_ = 'dp%d_system.arxml'
+
+# Numeric identifiers kept unique in the clones
+_ID_TAGS_ = ('IDENTIFIER', 'HEADER-ID')
+_ID_STRIDE_ = 4096
+
+# How far up a reference the list entry holding it is looked for
+_LIST_ENTRY_DEPTH_ = 3
+
+
+def _local(elem):
+    return elem.tag[elem.tag.rfind('}') + 1:]
+
+
+def _is_named(elem):
+    return len(elem) > 0 and _local(elem[0]) == 'SHORT-NAME'
+
+
+def _retarget(value, paths, suffix):
+    # Returns the reference value moved to the renamed element, or None if
+    # it doesn't point into one of paths
+    path = value
+    while path:
+        if path in paths:
+            return path + suffix + value[len(path):]
+        path = path[:path.rfind('/')]
+    return None
+
+
+def _retarget_refs(elem, paths, suffix):
+    for ref in elem.iter():
+        if len(ref) == 0 and ref.text and ref.text.startswith('/'):
+            value = _retarget(ref.text, paths, suffix)
+            if value is not None:
+                ref.text = value
+
+
+def _bump_ids(elem, copy_index):
+    for tag in _ID_TAGS_:
+        for ident in elem.iter(f"{{{util.xml_get_namespace(elem)}}}{tag}"):
+            if ident.text and ident.text.strip().isdigit():
+                ident.text = str(int(ident.text) + copy_index * _ID_STRIDE_)
+
+
+def _new_uuids(elem, path):
+    for sub in elem.iter():
+        if 'UUID' in sub.attrib:
+            name = sub[0].text if _is_named(sub) else _local(sub)
+            sub.set('UUID', util.new_uuid(path + '/' + name, 'SYNTHETIC'))
+
+
+def _list_entry(ref, parents):
+    # The entry of a plural container (tag ending with S) holding ref,
+    # None if ref is a single reference of a named element
+    item = ref
+    for _ in range(_LIST_ENTRY_DEPTH_):
+        parent = parents.get(item)
+        if parent is None or _is_named(parent):
+            return None
+        if _local(parent).endswith('S'):
+            return item
+        item = parent
+    return None
+
+
+def _units_find(root, tags):
+    # Returns path -> element of the named elements with one of tags
+    index = util.xml_path_index(root)
+    return {path: elem for path, elem in index.items()
+            if _local(elem) in tags}
+
+
+def units_clone(root: ET.Element, tags, copies: int) -> int:
+    """
+    Adds copies - 1 clones of every named element with one of tags.
+
+    Clone k is named <name>_k and its references to the cloned elements
+    point to the clones _k. List entries referencing the cloned elements
+    elsewhere in the document are cloned as well.
+
+    Args:
+        root (ET.Element): The document root, modified in place.
+        tags (Tuple): The tags of the elements to clone.
+        copies (int): The number of elements per original afterwards.
+
+    Returns:
+        int: The number of elements added.
+    """
+    units = _units_find(root, tags)
+    if copies < 2 or not units:
+        return 0
+    parents = {child: parent for parent in root.iter() for child in parent}
+    paths = set(units)
+    inside = set()
+    for elem in units.values():
+        inside.update(map(id, elem.iter()))
+
+    # The list entries from outside the units that reference them
+    entries = []
+    for ref in root.iter():
+        if len(ref) or id(ref) in inside or not ref.text \
+                or not ref.text.startswith('/') \
+                or _retarget(ref.text, paths, '') is None:
+            continue
+        entry = _list_entry(ref, parents)
+        if entry is not None:
+            entries.append(entry)
+
+    added = 0
+    for index in range(1, copies):
+        suffix = '_%d' % index
+        for path, elem in units.items():
+            clone = copy.deepcopy(elem)
+            clone[0].text += suffix
+            _retarget_refs(clone, paths, suffix)
+            _bump_ids(clone, index)
+            _new_uuids(clone, path + suffix)
+            parents[elem].append(clone)
+            added += 1
+        for entry in entries:
+            clone = copy.deepcopy(entry)
+            _retarget_refs(clone, paths, suffix)
+            _bump_ids(clone, index)
+            parents[entry].append(clone)
+    return added
+
+
+def units_rename(root: ET.Element, tags, suffix: str) -> int:
+    """
+    Appends suffix to the SHORT-NAME of every named element with one of tags
+    and moves all the references of the document along.
+
+    Returns:
+        int: The number of renamed elements.
+    """
+    units = _units_find(root, tags)
+    for elem in units.values():
+        elem[0].text += suffix
+    _retarget_refs(root, set(units), suffix)
+    return len(units)
+
+
+def ecu_sys_rename(root: ET.Element, suffix: str) -> None:
+    # Gives the ECU System (see util.xml_ecu_sys_name_get) its own name
+    ecu_sys = util.xml_ar_package_find(root, 'ECUSystem')
+    assert ecu_sys is not None, "Source ECUSystem package is not found!"
+    pkg = ecu_sys[1][0]
+    path = '/ECUSystem/' + pkg[0].text
+    pkg[0].text += suffix
+    _retarget_refs(root, {path}, suffix)
+
+
+def channels_complete(root: ET.Element) -> int:
+    """
+    Gives every ETHERNET-PHYSICAL-CHANNEL without I-SIGNAL-TRIGGERINGS an
+    empty one in front of its PDU-TRIGGERINGS, as the Ethernet DPs have them.
+
+    Returns:
+        int: The number of channels completed.
+    """
+    added = 0
+    for channel in util.xml_elem_findall(root, 'ETHERNET-PHYSICAL-CHANNEL'):
+        if util.xml_elem_find(channel, 'I-SIGNAL-TRIGGERINGS') is not None:
+            continue
+        tags = [_local(child) for child in channel]
+        if 'PDU-TRIGGERINGS' not in tags:
+            continue
+        channel.insert(tags.index('PDU-TRIGGERINGS'),
+                       factory.xml_isignal_triggerings_create())
+        added += 1
+    return added
+
+
+def channel_add(root: ET.Element, name: str, endpoints=()) -> ET.Element:
+    """
+    Adds an ETHERNET-PHYSICAL-CHANNEL named name, a clone of the document's
+    first one, if the document has none of that name.
+
+    The mergers work on their own VLAN channels of the base (see their
+    _VLAN_), which the donor doesn't have to have.
+
+    Args:
+        root (ET.Element): The document root, modified in place.
+        name (str): The SHORT-NAME of the channel.
+        endpoints (Tuple): NETWORK-ENDPOINT names added to the channel, each
+            referenced from the document's first NETWORK-ENDPOINT-REFS like
+            the mergers' bundle server endpoints are.
+
+    Returns:
+        ET.Element: The channel.
+    """
+    channels = util.xml_elem_findall(root, 'ETHERNET-PHYSICAL-CHANNEL')
+    assert channels, "Source ETHERNET-PHYSICAL-CHANNEL is not found!"
+    for channel in channels:
+        if channel[0].text == name:
+            return channel
+    parents = {child: parent for parent in root.iter() for child in parent}
+    index = util.xml_path_index(root)
+    paths = {elem: path for path, elem in index.items()}
+    path = paths[channels[0]]
+    channel = copy.deepcopy(channels[0])
+    channel[0].text = name
+    new_path = path[:path.rfind('/') + 1] + name
+    for ref in channel.iter():
+        if len(ref) == 0 and ref.text and ref.text.startswith(path + '/'):
+            ref.text = new_path + ref.text[len(path):]
+    _new_uuids(channel, new_path)
+    parents[channels[0]].append(channel)
+
+    # The connector's I-SIGNAL-PORTs, one per I-PDU-PORT, that the mergers
+    # reference the MR COM signals from
+    connector_ref = util.xml_elem_find(channel, 'COMMUNICATION-CONNECTOR-REF')
+    connector = index.get(connector_ref.text) \
+        if connector_ref is not None else None
+    assert connector is not None, "Source COMMUNICATION-CONNECTOR of %s is "\
+        "not found!" % name
+    ports = util.xml_elem_find(connector, 'ECU-COMM-PORT-INSTANCES')
+    names = {port[0].text for port in ports}
+    for port in util.xml_elem_findall(ports, 'I-PDU-PORT'):
+        isig_port = copy.deepcopy(port)
+        isig_port.tag = port.tag.replace('I-PDU-PORT', 'I-SIGNAL-PORT')
+        isig_port[0].text = port[0].text.replace('IPduPort', 'ISignalPort')
+        if isig_port[0].text not in names:
+            _new_uuids(isig_port, paths[connector] + '/' + isig_port[0].text)
+            ports.append(isig_port)
+
+    net_ends = util.xml_elem_find(channel, 'NETWORK-ENDPOINTS')
+    net_end_refs = util.xml_elem_find(root, 'NETWORK-ENDPOINT-REFS')
+    assert net_ends is not None and len(net_ends), "Source element "\
+        "'NETWORK-ENDPOINTS' is not found!"
+    assert net_end_refs is not None and len(net_end_refs), "Source element "\
+        "'NETWORK-ENDPOINT-REFS' is not found!"
+    for end in endpoints:
+        net_end = copy.deepcopy(net_ends[0])
+        net_end[0].text = end
+        _new_uuids(net_end, new_path + '/' + end)
+        net_ends.append(net_end)
+        net_end_ref = copy.deepcopy(net_end_refs[0])
+        net_end_ref.text = new_path + '/' + end
+        net_end_refs.append(net_end_ref)
+    return channel
+
+
+def bundles_trim(root: ET.Element) -> int:
+    """
+    Removes the SOCKET-CONNECTION-IPDU-IDENTIFIERs of the PDU-TRIGGERINGs
+    of other PDUs than I-SIGNAL-I-PDUs: the mergers only copy the
+    I-SIGNAL-I-PDUs of an Ethernet DP, so its bundles can't carry others.
+
+    Returns:
+        int: The number of identifiers removed.
+    """
+    index = util.xml_path_index(root)
+    parents = {child: parent for parent in root.iter() for child in parent}
+    removed = 0
+    for ident in util.xml_elem_findall(root,
+                                       'SOCKET-CONNECTION-IPDU-IDENTIFIER'):
+        ref = util.xml_elem_find(ident, 'PDU-TRIGGERING-REF')
+        trig = index.get(ref.text) if ref is not None else None
+        pdu_ref = util.xml_elem_find(trig, 'I-PDU-REF') \
+            if trig is not None else None
+        if pdu_ref is not None and pdu_ref.get('DEST') != 'I-SIGNAL-I-PDU':
+            parents[ident].remove(ident)
+            removed += 1
+    return removed
+
+
+def pdus_complete(root: ET.Element) -> int:
+    """
+    Gives every I-SIGNAL-I-PDU without signals the signal mappings of the
+    first one with signals, and every PDU-TRIGGERING of an I-SIGNAL-I-PDU
+    without I-SIGNAL-TRIGGERINGS an empty one: the mergers expect every
+    I-SIGNAL-I-PDU of a DP to carry signals.
+
+    Returns:
+        int: The number of PDUs completed.
+    """
+    pdus = util.xml_elem_findall(root, 'I-SIGNAL-I-PDU')
+    maps = [util.xml_elem_find(pdu, 'I-SIGNAL-TO-PDU-MAPPINGS')
+            for pdu in pdus]
+    donor = next((pdu_maps for pdu_maps in maps if pdu_maps is not None), None)
+    if donor is None:
+        return 0
+    added = 0
+    for pdu, pdu_maps in zip(pdus, maps):
+        if pdu_maps is not None:
+            continue
+        pdu_maps = copy.deepcopy(donor)
+        for imap in pdu_maps:
+            imap[0].text += pdu[0].text
+        _new_uuids(pdu_maps, pdu[0].text)
+        pdu.insert(2, pdu_maps)
+        added += 1
+    for trig in util.xml_elem_findall(root, 'PDU-TRIGGERING'):
+        tags = [_local(child) for child in trig]
+        if 'I-SIGNAL-TRIGGERINGS' in tags or 'I-PDU-REF' not in tags:
+            continue
+        pdu_ref = trig[tags.index('I-PDU-REF')]
+        if pdu_ref.get('DEST') == 'I-SIGNAL-I-PDU':
+            trig.insert(tags.index('I-PDU-REF') + 1,
+                        factory.xml_isignal_triggerings_create())
+    return added
+
+
+def can_channels_trim(root: ET.Element) -> int:
+    """
+    Empties the FRAME-TRIGGERINGS of all the CAN-PHYSICAL-CHANNELs but the
+    first: an MR COM DP has its frames on a single CAN channel.
+
+    Returns:
+        int: The number of frame triggerings removed.
+    """
+    removed = 0
+    for channel in util.xml_elem_findall(root, 'CAN-PHYSICAL-CHANNEL')[1:]:
+        for trigs in util.xml_elem_findall(channel, 'FRAME-TRIGGERINGS'):
+            removed += len(trigs)
+            trigs[:] = []
+    return removed
+
+
+def services_add(root: ET.Element, names) -> int:
+    """
+    Adds a PROVIDED-SERVICE-INSTANCE per name to the first
+    APPLICATION-ENDPOINT, for the ones the mergers look up in the base.
+
+    Returns:
+        int: The number of service instances added.
+    """
+    endpoint = util.xml_elem_find(root, 'APPLICATION-ENDPOINT')
+    assert endpoint is not None, "Source APPLICATION-ENDPOINT is not found!"
+    namespace = util.xml_get_namespace(root)
+    services = util.xml_elem_find(endpoint, 'PROVIDED-SERVICE-INSTANCES')
+    if services is None:
+        services = ET.SubElement(endpoint,
+                                 f"{{{namespace}}}PROVIDED-SERVICE-INSTANCES")
+    for name in names:
+        service = ET.SubElement(services,
+                                f"{{{namespace}}}PROVIDED-SERVICE-INSTANCE")
+        service.set('UUID', util.new_uuid(name, 'SYNTHETIC'))
+        for tag, text in (('SHORT-NAME', name), ('SERVICE-IDENTIFIER', '0'),
+                          ('INSTANCE-IDENTIFIER', '0')):
+            ET.SubElement(service, f"{{{namespace}}}{tag}").text = text
+    return len(names)
+
+
+def arxml_scale(root: ET.Element, counts: dict) -> dict:
+    """
+    Scales the units of a document up to the given counts.
+
+    Args:
+        root (ET.Element): The document root, modified in place.
+        counts (dict): Unit name (see _UNITS_) -> wanted count. The units
+            are cloned as a whole, so a count is rounded up to a multiple of
+            the count in the document and a warning names the count made.
+
+    Returns:
+        dict: Unit name -> count in the scaled document, the N to report.
+    """
+    result = {}
+    for name, count_tag, tags in _UNITS_:
+        have = len(util.xml_elem_findall(root, count_tag))
+        wanted = counts.get(name)
+        if wanted and have:
+            units_clone(root, tags, math.ceil(wanted / have))
+        result[name] = len(util.xml_elem_findall(root, count_tag))
+        if wanted and result[name] != wanted:
+            logging.warning('%d %ss wanted, %d made in whole copies of the '
+                            '%d in the document', wanted, count_tag,
+                            result[name], have)
+    return result
+
+
+def arxml_generate(donor: str, counts: dict, dps: int, channels=(),
+                   endpoints=(), services=()):
+    """
+    Generates a base COM .arxml and dps Device Proxy .arxmls by scaling the
+    donor .arxml (e.g. SRC.arxml), so they have its package structure.
+
+    Every DP has its own ECU System, PDU and signal names. The base gets the
+    Ethernet channels named in channels, each with the endpoints (see
+    channel_add); Hix in an endpoint name is the base's ECU System name, like
+    in the mergers' bundles. It gets a PROVIDED-SERVICE-INSTANCE per name in
+    services as well.
+
+    Returns:
+        Tuple: The base ElementTree, the list of DP ElementTrees and the
+        counts of the base.
+    """
+    donor_tree = ET.parse(donor)
+    base = copy.deepcopy(donor_tree)
+    base_counts = arxml_scale(base.getroot(), counts)
+    if channels:
+        ecu_sys = util.xml_ar_package_find(base.getroot(), 'ECUSystem')
+        assert ecu_sys is not None, "Source ECUSystem package is not found!"
+        ecu = ecu_sys[1][0][0].text
+        for name in channels:
+            channel_add(base.getroot(), name,
+                        [end.replace('Hix', ecu) for end in endpoints])
+        channels_complete(base.getroot())
+    if services:
+        services_add(base.getroot(), services)
+    dp_trees = []
+    for index in range(dps):
+        tree = copy.deepcopy(donor_tree)
+        root = tree.getroot()
+        suffix = 'Dp%d' % index
+        ecu_sys_rename(root, suffix)
+        for name, _, tags in _UNITS_:
+            if name in _DP_UNITS_:
+                units_rename(root, tags, suffix)
+        units_rename(root, _DP_TAGS_, suffix)
+        arxml_scale(root, counts)
+        channels_complete(root)
+        bundles_trim(root)
+        pdus_complete(root)
+        can_channels_trim(root)
+        dp_trees.append(tree)
+    return base, dp_trees, base_counts
+
+
+def get_options(args):
+    usage = "Usage: %prog -o OUTPUT_DIR [-s DONOR.arxml] [--dps N] " \
+            "[--pdus N] [--signals N] [--endpoints N] [--bundles N]"
+    parser = OptionParser(usage=usage,
+                          description="Script to generate synthetic base "
+                          "COM and Device Proxy .arxmls for scale testing, "
+                          "by scaling up a donor .arxml.",
+                          version="%%prog %s" % VERSION)
+    parser.add_option('-s', '--source', dest='source', default='SRC.arxml',
+                      help="The donor .arxml (default SRC.arxml).")
+    parser.add_option('-o', '--output_dir', dest='output_dir',
+                      help="The directory to write the .arxmls to.")
+    parser.add_option('--dps', dest='dps', type='int', default=1,
+                      help="Number of Device Proxy .arxmls (default 1).")
+    for name, count_tag, _ in _UNITS_:
+        parser.add_option('--' + name, dest=name, type='int',
+                          help="Number of %ss per .arxml, rounded up to a "
+                               "multiple of the donor's (default as in the "
+                               "donor)." % count_tag)
+    parser.add_option('--channels', dest='channels', default='',
+                      help="Comma separated ETHERNET-PHYSICAL-CHANNELs "
+                           "added to the base, e.g. the mergers' VLANs.")
+    parser.add_option('--channel_endpoints', dest='channel_endpoints',
+                      default='',
+                      help="Comma separated NETWORK-ENDPOINTs added to "
+                           "every channel of --channels and referenced from "
+                           "the base, Hix is the base's ECU System name.")
+    parser.add_option('--services', dest='services', default='',
+                      help="Comma separated PROVIDED-SERVICE-INSTANCEs "
+                           "added to the base.")
+    parser.add_option('--uuid_namespace', dest='uuid_namespace',
+                      default='synthetic-arxml',
+                      help="Namespace of the generated UUIDs, the same "
+                           "options give the same files (default "
+                           "synthetic-arxml).")
+    (options, _) = parser.parse_args(args)
+    if not options.output_dir:
+        parser.print_help(None)
+        sys.exit(0)
+    assert os.path.isfile(options.source), "File %s is not found!" \
+        % options.source
+    return options
+
+
+def main(args):
+    options = get_options(args)
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+    util.uuid_namespace_set(options.uuid_namespace)
+    ET.register_namespace('', util.xml_get_namespace(
+        ET.parse(options.source).getroot()))
+
+    counts = {name: getattr(options, name) for name, _, _ in _UNITS_}
+    base, dps, base_counts = arxml_generate(
+        options.source, counts, options.dps,
+        [name for name in options.channels.split(',') if name],
+        [name for name in options.channel_endpoints.split(',') if name],
+        [name for name in options.services.split(',') if name])
+    os.makedirs(options.output_dir, exist_ok=True)
+    files = [os.path.join(options.output_dir, 'base.arxml')]
+    base.write(files[0], encoding='UTF-8', xml_declaration=True)
+    for index, tree in enumerate(dps):
+        files.append(os.path.join(options.output_dir,
+                                  _DP_FILENAME_ % index))
+        tree.write(files[-1], encoding='UTF-8', xml_declaration=True)
+    # The effective counts, which may be above the requested ones
+    logging.info('Generated %d files with %s', len(files),
+                 ', '.join('%d %s' % (count, name)
+                           for name, count in base_counts.items()))
+    # The merger input: the base first, then the Device Proxies
+    print(','.join(files))
+    return 0
+
+
+# Run synthetic .arxml generator
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+
+import importlib
+import logging
+import sys
+from optparse import OptionParser
+
+import autosar
+import util
+
+# This script's version
+VERSION = '0.1.0'
+
+# HI target name -> COM merger module
+_MERGERS_ = {'HIA': 'HIA_com_merger',
+             'HIB': 'HIB_com_merger',
+             'HIC': 'HIC_com_merger'}
+
+
+def parse_target(target):
+    # A target is given as NAME:file1,file2,...:output
+    # (the same -i/-o values the single target mergers take)
+    name, sep, rest = target.partition(':')
+    input_arxml, sep2, output_arxml = rest.rpartition(':')
+    assert sep and sep2 and input_arxml and output_arxml, \
+        "Target %s is not of the form NAME:file1,file2,...:output!" % target
+    assert name in _MERGERS_, "Unknown target %s, expected one of %s!" % \
+        (name, ', '.join(_MERGERS_))
+    return name, input_arxml, output_arxml
+
+
+def merger_load(name):
+    # A fresh instance of the merger module, so that nothing a previous
+    # target left in its module globals leaks into this merge
+    module = _MERGERS_[name]
+    if module in sys.modules:
+        return importlib.reload(sys.modules[module])
+    return importlib.import_module(module)
+
+
+def get_options(args):
+    usage = "Usage: %prog -t NAME:file1,file2,...:output [-t ...]"
+    parser = OptionParser(usage=usage,
+                          description="Script to merge the COM extracts of "
+                          "several HI targets in one run. Device Proxy "
+                          ".arxmls shared by the targets are parsed once. "
+                          "This saves parse time only: the mergers move "
+                          "elements out of their sources, so every target "
+                          "that reads a source deep copies the whole parsed "
+                          "document, and the parsed documents are kept "
+                          "until the run ends, on top of the copies.",
+                          version="%%prog %s (%s)" %
+                          (VERSION, autosar.VERSION))
+    parser.add_option('-t', '--target', dest='targets', action='append',
+                      default=[],
+                      help="A HI target to merge: NAME:file1,file2,...:output "
+                           "where NAME is one of %s and the rest are the "
+                           "merger's -i and -o values. Can be repeated."
+                           % ', '.join(_MERGERS_))
+    parser.add_option('--uuid_namespace', dest='uuid_namespace',
+                      help="Passed on to the mergers, see their help.")
+    (options, _) = parser.parse_args(args)
+    if not options.targets:
+        parser.print_help(None)
+        sys.exit(0)
+    return [parse_target(target) for target in options.targets], options
+
+
+def main(args):
+    targets, options = get_options(args)
+    extra_args = []
+    if options.uuid_namespace is not None:
+        extra_args = ['--uuid_namespace', options.uuid_namespace]
+
+    util.logging_setup(logging.INFO)
+
+    # Every target gets its own lazily copied view of the shared sources, a
+    # full copy of the parsed tree (see util.ArxmlView)
+    util.ARXML_SOURCE_CACHE = util.ArxmlSourceCache()
+    failed = []
+    try:
+        for name, input_arxml, output_arxml in targets:
+            logging.info('Merging %s into %s', name, output_arxml)
+            util.reset_merge_state()
+            merger = merger_load(name)
+            try:
+                merger.main(['-i', input_arxml, '-o', output_arxml] +
+                            extra_args)
+            except AssertionError as e:
+                logging.error('Merging %s failed: %s', name, e)
+                failed.append(name)
+    finally:
+        util.ARXML_SOURCE_CACHE.clear()
+        util.ARXML_SOURCE_CACHE = None
+
+    if failed:
+        logging.error('Failed targets: %s', ', '.join(failed))
+        return 1
+    return 0
+
+
+# Run batch COM merger
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,292 @@
+#!/usr/bin/python3
+
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from optparse import OptionParser
+
+import arxml_generator
+import util
+
+# This script's version
+VERSION = '0.1.0'
+
+# Results file format, bumped when the keys change
+_FORMAT_ = 1
+
+# HI target name -> COM merger module
+_MERGERS_ = {'HIA': 'HIA_com_merger',
+             'HIB': 'HIB_com_merger',
+             'HIC': 'HIC_com_merger'}
+
+# The directories the mergers write to or read from, relative to where they
+# run (see their main)
+_MERGE_DIRS_ = {'HIA': ('out/products/hia/test_com_merger', ),
+                'HIB': ('out/products/hib/test_com_merger', ),
+                'HIC': ('out/products/hic/test_com_merger',
+                        'out/products/hic/deps/stakeholder/components/'
+                        'input/MR_DP/HIC')}
+
+# The PROVIDED-SERVICE-INSTANCEs the mergers set the identifiers of in the
+# base (see their main)
+_SERVICES_ = ('ShutdownHIB1VCUPowerStateManagerProxyHIB1', )
+
+# The pipeline stages marked in the mergers and util, in merge order
+_STAGES_ = ('load', 'root copy', 'communication packages', 'fibex',
+            'triggerings', 'endpoints', 'sockets', 'bundles',
+            'mr com flavour', 'uuid pass', 'save')
+
+
+def merger_channels(targets):
+    # Returns the Ethernet channels and the bundle server endpoints the
+    # targets' mergers expect in the base
+    channels, endpoints = [], []
+    for target in targets:
+        merger = importlib.import_module(_MERGERS_[target])
+        bundle = merger._SOCKET_CONNECTION_BUNDLE_
+        end = bundle['server_port']['network_endpoint']['name']
+        channels += [name for name in merger._VLAN_ if name not in channels]
+        if end not in endpoints:
+            endpoints.append(end)
+    return channels, endpoints
+
+
+def generate_inputs(donor, scale, dps, directory, targets):
+    # Writes the base and DP .arxmls with the donor's units scaled by scale,
+    # returns the merger's -i value and the base's unit counts
+    root = ET.parse(donor).getroot()
+    counts = {name: scale * len(util.xml_elem_findall(root, count_tag))
+              for name, count_tag, _ in arxml_generator._UNITS_}
+    channels, endpoints = merger_channels(targets)
+    base, dp_trees, base_counts = arxml_generator.arxml_generate(
+        donor, counts, dps, channels, endpoints, _SERVICES_)
+    files = [os.path.join(directory, 'base.arxml')]
+    base.write(files[0], encoding='UTF-8', xml_declaration=True)
+    for index, tree in enumerate(dp_trees):
+        files.append(os.path.join(directory,
+                                  arxml_generator._DP_FILENAME_ % index))
+        tree.write(files[-1], encoding='UTF-8', xml_declaration=True)
+    return ','.join(files), base_counts
+
+
+def merge_run(target, input_arxml, output_arxml, trace=False):
+    # Runs one merge with the stages timed. Called in a fresh process, the
+    # peak RSS is the one of this merge only. The merge runs in the output's
+    # directory. A merge that doesn't save its output is an error.
+    logging.basicConfig(stream=sys.stdout, level=logging.WARNING)
+    os.chdir(os.path.dirname(output_arxml))
+    for directory in _MERGE_DIRS_[target]:
+        os.makedirs(directory, exist_ok=True)
+    merger = importlib.import_module(_MERGERS_[target])
+    util.reset_error_state()
+    util.STAGE_TIMER = util.StageTimer(trace)
+    rss = util.peak_rss_kb()
+    start = time.time()
+    wall, cpu = time.perf_counter(), time.process_time()
+    error = None
+    try:
+        merger.main(['-i', input_arxml, '-o', output_arxml,
+                     '--uuid_namespace', 'bench-merge'])
+    except AssertionError as e:
+        error = str(e)
+    except Exception as e:
+        error = '%s: %s' % (type(e).__name__, e)
+    total = {'calls': 1,
+             'wall': time.perf_counter() - wall,
+             'cpu': time.process_time() - cpu,
+             'peak_rss_kb': util.peak_rss_kb(),
+             'rss_growth_kb': util.peak_rss_kb() - rss}
+    stages = util.STAGE_TIMER.report()
+    if error is None and ('save' not in stages
+                          or not os.path.isfile(output_arxml)):
+        error = 'The merge did not save %s!' % output_arxml
+    dps = util.STAGE_TIMER.dp_report()
+    events = util.STAGE_TIMER.events
+    util.STAGE_TIMER = None
+    if events is not None:
+        events.insert(0, util.trace_event('merge', 'merge', start,
+                                          total['wall']))
+    return {'error': error, 'total': total, 'stages': stages, 'dps': dps,
+            'events': events}
+
+
+def run(donor, targets, sizes, dps, events=None):
+    # events (optional) gets the trace events of the generation and merges
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for scale in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.time()
+            input_arxml, counts = generate_inputs(donor, scale, dps,
+                                                  directory, targets)
+            if events is not None:
+                events.append(util.trace_event('generate x%d' % scale,
+                                               'generate', start,
+                                               time.time() - start))
+            for target in targets:
+                output_arxml = os.path.join(directory, target + '.arxml')
+                with ProcessPoolExecutor(max_workers=1,
+                                         mp_context=context) as pool:
+                    result = pool.submit(merge_run, target, input_arxml,
+                                         output_arxml,
+                                         events is not None).result()
+                result['inputs'] = counts
+                key = '%s@x%d' % (target, scale)
+                merge_events = result.pop('events')
+                if merge_events:
+                    events.append(util.trace_process_name(
+                        merge_events[0]['pid'], key))
+                    events.extend(merge_events)
+                results[key] = result
+                print_result(key, result)
+    return {'format': _FORMAT_,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'donor': os.path.basename(donor),
+            'dps': dps,
+            'results': results}
+
+
+def print_result(key, result):
+    print('%s %s' % (key, ', '.join('%d %s' % (count, name) for name, count
+                                    in result['inputs'].items())))
+    if result['error']:
+        print('  FAILED: %s' % result['error'])
+    rows = [(name, result['stages'][name]) for name in _STAGES_
+            if name in result['stages']]
+    rows.append(('total', result['total']))
+    for name, stage in rows:
+        print('  %-24s %5d calls %10.3f s wall %10.3f s cpu %9d kB peak '
+              '%+9d kB' % (name, stage['calls'], stage['wall'], stage['cpu'],
+                           stage['peak_rss_kb'], stage['rss_growth_kb']))
+
+
+def compare(results, baseline, tolerance, rss_tolerance, min_time):
+    # Returns the (run, stage, what, ratio) that regressed against the
+    # baseline: wall time over tolerance x (stages faster than min_time in
+    # the baseline are too noisy and skipped) or peak RSS over rss_tolerance x
+    assert baseline.get('format') == _FORMAT_, "Baseline format %s differs "\
+        "from %s!" % (baseline.get('format'), _FORMAT_)
+    regressions = []
+    for key, result in sorted(results['results'].items()):
+        base = baseline['results'].get(key)
+        if base is None or base['error'] or result['error']:
+            continue
+        stages = dict(result['stages'], total=result['total'])
+        base_stages = dict(base['stages'], total=base['total'])
+        for name, stage in sorted(stages.items()):
+            base_stage = base_stages.get(name)
+            if base_stage is None:
+                continue
+            if base_stage['wall'] >= min_time:
+                ratio = stage['wall'] / base_stage['wall']
+                if ratio > tolerance:
+                    regressions.append((key, name, 'wall time', ratio))
+            if base_stage['peak_rss_kb']:
+                ratio = stage['peak_rss_kb'] / base_stage['peak_rss_kb']
+                if ratio > rss_tolerance:
+                    regressions.append((key, name, 'peak RSS', ratio))
+    return regressions
+
+
+def get_options(args):
+    usage = "Usage: %prog [-s DONOR.arxml] [-t HIA,HIB,HIC] " \
+            "[-o results.json] [-b baseline.json]"
+    parser = OptionParser(usage=usage,
+                          description="Script to benchmark full COM merges "
+                          "on generated inputs of increasing size. Reports "
+                          "the wall time, CPU time and peak RSS of every "
+                          "merge stage and fails on regressions against a "
+                          "baseline.",
+                          version="%%prog %s" % VERSION)
+    parser.add_option('-s', '--source', dest='source', default='SRC.arxml',
+                      help="The donor .arxml the inputs are generated from "
+                           "(default SRC.arxml).")
+    parser.add_option('-t', '--targets', dest='targets',
+                      default=','.join(_MERGERS_),
+                      help="Comma separated HI targets to merge (default "
+                           "%s)." % ','.join(_MERGERS_))
+    parser.add_option('-o', '--output', dest='output',
+                      help="Save the results to this .json file.")
+    parser.add_option('-b', '--baseline', dest='baseline',
+                      help="Compare the results with this .json file.")
+    parser.add_option('--trace', dest='trace',
+                      help="Save the generation and the stages of every "
+                           "merge as spans to this .json, to open in "
+                           "Perfetto or chrome://tracing.")
+    parser.add_option('--sizes', dest='sizes', default='1,2,4',
+                      help="Comma separated scale factors of the donor's "
+                           "units (default 1,2,4).")
+    parser.add_option('--dps', dest='dps', type='int', default=2,
+                      help="Number of Device Proxy .arxmls (default 2).")
+    parser.add_option('--tolerance', dest='tolerance', type='float',
+                      default=1.3,
+                      help="Wall time slowdown factor of a stage against "
+                           "the baseline that fails the run (default 1.3).")
+    parser.add_option('--rss_tolerance', dest='rss_tolerance', type='float',
+                      default=1.2,
+                      help="Peak RSS growth factor of a stage against the "
+                           "baseline that fails the run (default 1.2).")
+    parser.add_option('--min_time', dest='min_time', type='float',
+                      default=0.05,
+                      help="Stages faster than this in the baseline are not "
+                           "checked for wall time, in seconds (default "
+                           "0.05).")
+    (options, _) = parser.parse_args(args)
+    assert os.path.isfile(options.source), "File %s is not found!" \
+        % options.source
+    if options.baseline:
+        assert os.path.isfile(options.baseline), "File %s is not found!" \
+            % options.baseline
+    for target in options.targets.split(','):
+        assert target in _MERGERS_, "Unknown target %s, expected one of %s!" \
+            % (target, ', '.join(_MERGERS_))
+    return options
+
+
+def main(args):
+    options = get_options(args)
+    logging.basicConfig(stream=sys.stdout, level=logging.WARNING)
+    ET.register_namespace('', util.xml_get_namespace(
+        ET.parse(options.source).getroot()))
+
+    events = None
+    if options.trace:
+        events = [util.trace_process_name(os.getpid(), 'bench_merge')]
+    results = run(options.source, options.targets.split(','),
+                  [int(size) for size in options.sizes.split(',')],
+                  options.dps, events)
+    if options.trace:
+        util.trace_save(options.trace, events)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    failed = [key for key, result in results['results'].items()
+              if result['error']]
+    for key in failed:
+        logging.error('%s failed: %s', key, results['results'][key]['error'])
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, options.tolerance,
+                              options.rss_tolerance, options.min_time)
+        for key, name, what, ratio in regressions:
+            logging.error('%s %s %s is %.2fx the baseline', key, name, what,
+                          ratio)
+        if regressions:
+            return 1
+    return 1 if failed else 0
+
+
+# Run COM merge benchmark
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
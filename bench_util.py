@@ -0,0 +1,195 @@
+#!/usr/bin/python3
+
+import copy
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import xml.etree.ElementTree as ET
+from optparse import OptionParser
+
+import arxml_generator
+import factory
+import util
+
+# This script's version
+VERSION = '0.1.0'
+
+# Results file format, bumped when the keys change
+_FORMAT_ = 2
+
+
+def measure(func, prepare=None, repeat=15, min_time=0.05):
+    # Returns the median time of one func call over repeat rounds, each
+    # round calling it until min_time is spent, and the spread of the rounds
+    # (their median absolute deviation relative to the median). prepare
+    # (untimed) returns the arguments of a call, for functions that change
+    # their input.
+    rounds = []
+    for _ in range(repeat):
+        spent, calls = 0.0, 0
+        while spent < min_time or calls == 0:
+            args = prepare() if prepare is not None else ()
+            start = time.perf_counter()
+            func(*args)
+            spent += time.perf_counter() - start
+            calls += 1
+        rounds.append(spent / calls)
+    median = statistics.median(rounds)
+    spread = statistics.median(abs(r - median) for r in rounds) / median
+    return median, spread
+
+
+def make_doc(donor, scale):
+    # The donor with its PDUs and signals scaled by scale
+    tree = copy.deepcopy(donor)
+    root = tree.getroot()
+    counts = {'pdus': scale * len(util.xml_elem_findall(root, 'I-SIGNAL-I-PDU')),
+              'signals': scale * len(util.xml_elem_findall(root, 'I-SIGNAL'))}
+    arxml_generator.arxml_scale(root, counts)
+    return util.ArxmlFile(tree, 'bench_x%d.arxml' % scale)
+
+
+def benchmarks(doc):
+    # Returns name -> (func, prepare) for the util primitives on doc
+    root = doc.xml.getroot()
+    signals = util.xml_elem_findall(root, 'I-SIGNAL')
+    last_signal = signals[-1]
+    last_path = util.xml_elem_get_abs_path(last_signal, doc)
+    trigs = util.xml_elem_findall(root, 'I-SIGNAL-TRIGGERING')[:100]
+    dst_isig = util.xml_ar_package_find(root, 'ISignal')[1]
+
+    def extend_prepare():
+        # 100 new signals and 10 clashing ones into a copy of ISignal
+        dst = copy.deepcopy(dst_isig)
+        doc.parents[dst] = doc.parents[dst_isig]
+        new = [factory.xml_isignal_create('isBench%d' % i, '0', '8', '/a',
+                                          '/b', '/c') for i in range(100)]
+        return new + copy.deepcopy(signals[:10]), dst
+
+    def extend(src, dst):
+        util.xml_elem_extend(src, dst, doc, doc, graceful=True)
+
+    return {
+        'xml_elem_find': (lambda: util.xml_elem_find(root, 'SYSTEM-SIGNAL-GROUP'), None),
+        'xml_elem_findall': (lambda: util.xml_elem_findall(root, 'I-SIGNAL'), None),
+        'xml_elem_type_find': (lambda: util.xml_elem_type_find(
+            root, 'I-SIGNAL', last_signal[0].text), None),
+        'xml_elem_get_abs_path': (lambda: [util.xml_elem_get_abs_path(trig, doc)
+                                           for trig in trigs], None),
+        'xml_get_elem_from_path': (lambda: util.xml_get_elem_from_path(
+            doc, last_path), None),
+        'xml_elem_extend': (extend, extend_prepare),
+        'ensure_unique_uuids': (lambda: util.ensure_unique_uuids(doc), None),
+    }
+
+
+def run(donor_path, sizes, repeat):
+    donor = ET.parse(donor_path)
+    results = {}
+    for scale in sizes:
+        doc = make_doc(donor, scale)
+        elements = sum(1 for _ in doc.xml.getroot().iter())
+        # The N measured, make_doc makes whole copies of the donor's units
+        units = {tag: len(util.xml_elem_findall(doc.xml.getroot(), tag))
+                 for tag in ('I-SIGNAL-I-PDU', 'I-SIGNAL')}
+        for name, (func, prepare) in benchmarks(doc).items():
+            seconds, spread = measure(func, prepare, repeat)
+            results['%s@x%d' % (name, scale)] = {'elements': elements,
+                                                 'units': units,
+                                                 'seconds': seconds,
+                                                 'spread': spread}
+            print('%-28s x%-3d %8d elements %12.6f ms +-%4.1f%%' %
+                  (name, scale, elements, seconds * 1e3, spread * 100))
+    return {'format': _FORMAT_,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'donor': os.path.basename(donor_path),
+            'results': results}
+
+
+def compare(results, baseline, tolerance, noise=3.0):
+    # Returns the benchmarks slower than tolerance x their baseline time.
+    # The limit is widened by noise x the larger spread of the two runs, so
+    # that a noisy benchmark needs a clearer slowdown to fail.
+    assert baseline.get('format') == _FORMAT_, "Baseline format %s differs "\
+        "from %s!" % (baseline.get('format'), _FORMAT_)
+    regressions = []
+    for key, result in sorted(results['results'].items()):
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        ratio = result['seconds'] / base['seconds']
+        limit = tolerance * (1 + noise * max(result['spread'], base['spread']))
+        print('%-34s %6.2fx baseline (limit %.2fx)' % (key, ratio, limit))
+        if ratio > limit:
+            regressions.append((key, ratio))
+    return regressions
+
+
+def get_options(args):
+    usage = "Usage: %prog [-s DONOR.arxml] [-o results.json] [-b baseline.json]"
+    parser = OptionParser(usage=usage,
+                          description="Script to benchmark the util "
+                          "primitives on generated documents of increasing "
+                          "size and compare the times with a baseline.",
+                          version="%%prog %s" % VERSION)
+    parser.add_option('-s', '--source', dest='source', default='SRC.arxml',
+                      help="The donor .arxml the documents are generated "
+                           "from (default SRC.arxml).")
+    parser.add_option('-o', '--output', dest='output',
+                      help="Save the results to this .json file.")
+    parser.add_option('-b', '--baseline', dest='baseline',
+                      help="Compare the results with this .json file.")
+    parser.add_option('--sizes', dest='sizes', default='1,4,16',
+                      help="Comma separated scale factors of the donor's "
+                           "PDUs and signals (default 1,4,16).")
+    parser.add_option('--repeat', dest='repeat', type='int', default=15,
+                      help="Rounds per benchmark, the median is kept "
+                           "(default 15).")
+    parser.add_option('--tolerance', dest='tolerance', type='float',
+                      default=1.3,
+                      help="Slowdown factor against the baseline that "
+                           "fails the run (default 1.3). It is widened by "
+                           "the rounds' spread, see --noise.")
+    parser.add_option('--noise', dest='noise', type='float', default=3.0,
+                      help="Spreads of a benchmark added to the tolerance "
+                           "(default 3.0).")
+    (options, _) = parser.parse_args(args)
+    assert os.path.isfile(options.source), "File %s is not found!" \
+        % options.source
+    if options.baseline:
+        assert os.path.isfile(options.baseline), "File %s is not found!" \
+            % options.baseline
+    return options
+
+
+def main(args):
+    options = get_options(args)
+    # The primitives log on every call
+    logging.basicConfig(stream=sys.stdout, level=logging.WARNING)
+
+    results = run(options.source,
+                  [int(size) for size in options.sizes.split(',')],
+                  options.repeat)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, options.tolerance,
+                              options.noise)
+        for key, ratio in regressions:
+            logging.error('%s is %.2fx slower than the baseline', key, ratio)
+        if regressions:
+            return 1
+    return 0
+
+
+# Run util micro-benchmarks
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
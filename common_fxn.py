@@ -3,7 +3,6 @@
 import logging
 import sys
 import uuid
-import copy
 import xml.etree.ElementTree as ET
 import re
 import autosar
@@ -168,7 +167,7 @@ def copy_communication_packages(src_arxml, dst_arxml):
             logging.warning("Missing source package Communication/%s", name)
             continue
         if dst is None:
-            dst = factory.xml_ar_package_create(name, str(uuid.uuid4()) +
+            dst = factory.xml_ar_package_create(name, util.new_uuid('/Communication/' + name, 'AR-PACKAGE') +
                                         '-Communication-' + name)
             util.assert_elem_tag(dst_com[1], 'AR-PACKAGES')
             util.xml_elem_append(dst_com[1], dst, dst_arxml.parents)
@@ -285,9 +284,9 @@ def copy_fibex_elements(src_arxml, dst_arxml, pdus):
             # Otherwise, it's a direct ref.
             return elem.text if elem.text else ''
 
-        # Use deepcopy to prevent modifying the source tree during the operation.
+        # Copy unless the source is consumed, to prevent modifying the source tree.
         util.xml_elem_extend(
-            [copy.deepcopy(el) for el in unique_elements],
+            util.xml_elems_take(unique_elements, src_arxml),
             dst_fibex_container,
             src_arxml,
             dst_arxml,
@@ -379,7 +378,7 @@ def copy_isignal_and_pdu_triggerings(src_arxml, dst_arxml, pdus, dst_eth_physica
     
     # Extend destination and update path map
     path_map.update(util.xml_elem_extend(
-        [copy.deepcopy(el) for el in list(src_isig_trig)],
+        util.xml_elems_take(src_isig_trig, src_arxml),
         dst_isig_trig,
         src_arxml,
         dst_arxml
@@ -419,7 +418,7 @@ def copy_isignal_and_pdu_triggerings(src_arxml, dst_arxml, pdus, dst_eth_physica
         
         # Extend destination with filtered triggerings and update path map
         path_map.update(util.xml_elem_extend(
-            [copy.deepcopy(el) for el in filtered_src_pdu_trigs],
+            util.xml_elems_take(filtered_src_pdu_trigs, src_arxml),
             dst_pdu_trig_container,
             src_arxml,
             dst_arxml,
@@ -594,9 +593,9 @@ def copy_network_endpoint(src_arxml, dst_arxml, dst_eth_physical_channel):
     ### for testing. remove later
     logging.info(f"Found {len(source_endpoints_to_copy)} source network endpoints. Checking for duplicates before copying.")
     
-    # Use deepcopy to prevent modifying the source tree.
+    # Copy unless the source is consumed, to prevent modifying the source tree.
     path_map = util.xml_elem_extend(
-        [copy.deepcopy(el) for el in source_endpoints_to_copy],
+        util.xml_elems_take(source_endpoints_to_copy, src_arxml),
         dst_net_ends,
         src_arxml,
         dst_arxml,
@@ -762,7 +761,7 @@ def create_socket_connection_bundle(bundle_data, src_arxml, dst_arxml,
             logging.info(f"Creating missing AR-PACKAGE: {pkg_name}")
             container = parent_pkg[1] # Assumes container is the second child
             util.assert_elem_tag(container, 'AR-PACKAGES')
-            pkg = factory.xml_ar_package_create(pkg_name, str(uuid.uuid4()) +
+            pkg = factory.xml_ar_package_create(pkg_name, util.new_uuid('/Communication/' + pkg_name, 'AR-PACKAGE') +
                                                 '-Communication-' + pkg_name)
             util.xml_elem_append(container, pkg, arxml_parents)
         return pkg
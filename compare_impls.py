@@ -0,0 +1,336 @@
+#!/usr/bin/python3
+
+import copy
+import importlib
+import importlib.util
+import logging
+import os
+import sys
+import xml.etree.ElementTree as ET
+from optparse import OptionParser
+
+import arxml_generator
+import bench_util
+import util
+
+# This script's version
+VERSION = '0.1.0'
+
+# The parallel implementations: reference module -> modules compared to it.
+# The default pairs are expected to be equal.
+_PAIRS_ = (('util_old', 'util'),
+           ('HIA_Com_merger_ref', 'HIA_com_merger'))
+
+# The other rewrites of the reference. They differ from it on their own
+# (e.g. in the copied ASSOCIATED-COM-I-PDU-GROUP-REFs or CAN-FRAMEs), so they
+# are only compared on request (-p).
+_OTHER_PAIRS_ = (('HIA_Com_merger_ref', 'common_fxn'),
+                 ('HIA_Com_merger_ref', 'fxn_ext'),
+                 ('HIA_Com_merger_ref', 'util_refactored'),
+                 ('HIA_Com_merger_ref', 'test_copy_packages'))
+
+# The baseline modules the references import in place of the current ones,
+# so the util and factory rewrites are compared as well
+_BASELINE_MODULES_ = {'util': 'util_old', 'factory': 'factory_old'}
+
+# Attributes that differ between two correct runs
+_UNSTABLE_ATTRIBUTES_ = ('UUID', )
+
+
+# Cases
+#
+# A case is a list of steps (function name, arguments) run on fresh copies of
+# the generated inputs. The arguments are built from the state: the source
+# and destination documents ('src', 'dst'), the Ethernet channel name
+# ('channel') and the results of the previous steps (by function name). The
+# outputs compared are the results of the steps and the destination tree.
+
+def _last_signal(state):
+    return util.xml_elem_findall(state['src'].xml.getroot(), 'I-SIGNAL')[-1]
+
+
+def _signal_copies(state):
+    # The source signals, as xml_elem_extend gets them from the mergers
+    return util.xml_elems_take(
+        util.xml_elem_findall(state['src'].xml.getroot(), 'I-SIGNAL'),
+        state['src'])
+
+
+def _dst_isignal_elements(state):
+    return util.xml_ar_package_find(state['dst'].xml.getroot(), 'ISignal')[1]
+
+
+_UTIL_CASES_ = {
+    'xml_elem_find': [('xml_elem_find', lambda s: (
+        s['src'].xml.getroot(), 'SYSTEM-SIGNAL-GROUP'))],
+    'xml_elem_findall': [('xml_elem_findall', lambda s: (
+        s['src'].xml.getroot(), 'I-SIGNAL'))],
+    'xml_elem_type_find': [('xml_elem_type_find', lambda s: (
+        s['src'].xml.getroot(), 'I-SIGNAL', _last_signal(s)[0].text))],
+    'xml_elem_type_findall': [('xml_elem_type_findall', lambda s: (
+        s['src'].xml.getroot(), 'I-SIGNAL', _last_signal(s)[0].text))],
+    'xml_elem_get_abs_path': [('xml_elem_get_abs_path', lambda s: (
+        _last_signal(s), s['src']))],
+    'xml_get_elem_from_path': [
+        ('xml_elem_get_abs_path', lambda s: (_last_signal(s), s['src'])),
+        ('xml_get_elem_from_path', lambda s: (
+            s['src'], s['xml_elem_get_abs_path']))],
+    'xml_ecu_sys_name_get': [('xml_ecu_sys_name_get', lambda s: (
+        s['src'], ))],
+    'xml_elem_extend': [('xml_elem_extend', lambda s: (
+        _signal_copies(s), _dst_isignal_elements(s), s['src'], s['dst']))],
+    'xml_ar_package_root_copy': [('xml_ar_package_root_copy', lambda s: (
+        s['src'], s['dst'], (('Signal', util.NAME_CLASH_IS_ALLOWED), )))],
+}
+
+_MERGER_CASES_ = {
+    'fetch_pdu': [('fetch_pdu', lambda s: (s['src'], ))],
+    'copy_communication_packages': [('copy_communication_packages',
+                                     lambda s: (s['src'], s['dst']))],
+    'copy_isignal_and_pdu_triggerings': [
+        ('copy_communication_packages', lambda s: (s['src'], s['dst'])),
+        ('prepare_ethernet_physical_channel', lambda s: (
+            s['dst'], s['channel'])),
+        ('copy_isignal_and_pdu_triggerings', lambda s: (
+            s['src'], s['dst'], s['copy_communication_packages'],
+            s['channel'], True))],
+    # The reference has no copy_fibex_elements, the DP's FIBEX-ELEMENTS are
+    # left out
+    'ethernet_dp': [
+        ('copy_communication_packages', lambda s: (s['src'], s['dst'])),
+        ('prepare_ethernet_physical_channel', lambda s: (
+            s['dst'], s['channel'])),
+        ('copy_isignal_and_pdu_triggerings', lambda s: (
+            s['src'], s['dst'], s['copy_communication_packages'],
+            s['channel'], True)),
+        ('copy_network_endpoint', lambda s: (
+            s['src'], s['dst'], s['channel'])),
+        ('copy_socket_addresses', lambda s: (
+            s['src'], s['dst'], s['channel'], s['copy_network_endpoint'])),
+        ('copy_socket_connection_bundles', lambda s: (
+            s['src'], s['dst'], s['channel'], s['copy_socket_addresses'],
+            s['copy_isignal_and_pdu_triggerings']))],
+}
+
+# Reference module -> its cases
+_CASES_ = {'util_old': _UTIL_CASES_,
+           'HIA_Com_merger_ref': _MERGER_CASES_}
+
+
+def canonical(value):
+    # A comparable form of a step result: elements and documents become
+    # canonical XML without the unstable attributes
+    if isinstance(value, ET.Element):
+        elem = copy.deepcopy(value)
+        for sub in elem.iter():
+            for attr in _UNSTABLE_ATTRIBUTES_:
+                sub.attrib.pop(attr, None)
+        return ET.canonicalize(ET.tostring(elem, encoding='unicode'),
+                               strip_text=True)
+    if isinstance(value, ET.ElementTree):
+        return canonical(value.getroot())
+    if hasattr(value, 'xml') and hasattr(value, 'parents'):
+        return canonical(value.xml)
+    if isinstance(value, dict):
+        return {key: canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonical(item) for item in value]
+    if isinstance(value, set):
+        return sorted(canonical(item) for item in value)
+    return value
+
+
+class Inputs:
+    """
+    Generated source and destination documents, copied for every run.
+    """
+    def __init__(self, donor, scale):
+        root = ET.parse(donor).getroot()
+        counts = {name: scale * len(util.xml_elem_findall(root, count_tag))
+                  for name, count_tag, _ in arxml_generator._UNITS_}
+        self.base, dps, _ = arxml_generator.arxml_generate(donor, counts, 1)
+        self.dp = dps[0]
+        # Named as the mergers name an Ethernet DP they work on
+        self.dp_filename = (arxml_generator._DP_FILENAME_ % 0).replace(
+            'system', 'Ethsystem')
+        channel = util.xml_elem_find(self.base.getroot(),
+                                     'ETHERNET-PHYSICAL-CHANNEL')
+        assert channel is not None, "Base ETHERNET-PHYSICAL-CHANNEL is not "\
+                                    "found!"
+        self.channel = channel[0].text
+
+    def state(self):
+        return {'src': util.ArxmlFile(copy.deepcopy(self.dp), self.dp_filename),
+                'dst': util.ArxmlFile(copy.deepcopy(self.base), 'base.arxml'),
+                'channel': self.channel}
+
+
+def reference_import(name):
+    # Imports a private copy of the reference module that uses the baseline
+    # modules (see _BASELINE_MODULES_); sys.modules is left as it was
+    saved = {mod: sys.modules.get(mod) for mod in _BASELINE_MODULES_}
+    try:
+        for mod, baseline in _BASELINE_MODULES_.items():
+            sys.modules[mod] = importlib.import_module(baseline)
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ImportError('No module named %r' % name)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        for mod, module_saved in saved.items():
+            if module_saved is None:
+                sys.modules.pop(mod, None)
+            else:
+                sys.modules[mod] = module_saved
+    return module
+
+
+def run_steps(module, steps, state):
+    # Runs the steps with the module's functions, returns the step results
+    results = []
+    for name, args in steps:
+        result = getattr(module, name)(*args(state))
+        state[name] = result
+        results.append(result)
+    return results
+
+
+def run_case(module, steps, inputs):
+    # Returns (outputs, error) of one run on fresh inputs
+    state = inputs.state()
+    try:
+        results = run_steps(module, steps, state)
+    except Exception as e:  # The implementations assert or fail anyhow
+        return None, '%s: %s' % (type(e).__name__, e)
+    util.reset_error_state()
+    return canonical([results, state['dst']]), None
+
+
+def first_difference(a, b):
+    # A short excerpt of two canonical outputs where they start to differ
+    a, b = repr(a), repr(b)
+    k = next((i for i, (x, y) in enumerate(zip(a, b)) if x != y),
+             min(len(a), len(b)))
+    return '...%s... vs ...%s...' % (a[max(0, k - 40):k + 40],
+                                     b[max(0, k - 40):k + 40])
+
+
+def time_case(module, steps, inputs, repeat):
+    def prepare():
+        return (inputs.state(), )
+
+    def call(state):
+        run_steps(module, steps, state)
+    return bench_util.measure(call, prepare, repeat)[0]
+
+
+def compare_pair(ref_name, new_name, inputs, repeat, only=None):
+    # Returns the rows (case, status, ref seconds, new seconds) of a pair
+    try:
+        ref = reference_import(ref_name)
+        new = importlib.import_module(new_name)
+    except ImportError as e:
+        return [('*', 'skipped: %s' % e, None, None)]
+    rows = []
+    for case, steps in _CASES_[ref_name].items():
+        if only and case not in only:
+            continue
+        missing = [name for name, _ in steps
+                   if not hasattr(ref, name) or not hasattr(new, name)]
+        if missing:
+            rows.append((case, 'n/a: no %s' % ', '.join(sorted(set(missing))),
+                         None, None))
+            continue
+        ref_out, ref_error = run_case(ref, steps, inputs)
+        new_out, new_error = run_case(new, steps, inputs)
+        if ref_error:
+            status = 'reference fails: %s' % ref_error
+            if new_error is None:
+                status += ' (new passes)'
+            rows.append((case, status, None, None))
+            continue
+        if new_error:
+            rows.append((case, 'FAILED: %s' % new_error, None, None))
+            continue
+        if ref_out != new_out:
+            rows.append((case, 'DIFFERENT: %s' % first_difference(ref_out,
+                                                                  new_out),
+                         None, None))
+            continue
+        rows.append((case, 'equal', time_case(ref, steps, inputs, repeat),
+                     time_case(new, steps, inputs, repeat)))
+    return rows
+
+
+def get_options(args):
+    usage = "Usage: %prog [-s DONOR.arxml] [-p REF:NEW [-p ...]] " \
+            "[-c CASE,...]"
+    parser = OptionParser(usage=usage,
+                          description="Script to run the parallel "
+                          "implementations (util vs util_old, the HIA merger "
+                          "vs its reference and rewrites) on the same "
+                          "generated inputs, check that their outputs are "
+                          "equal and report the speedups.",
+                          version="%%prog %s" % VERSION)
+    parser.add_option('-s', '--source', dest='source', default='SRC.arxml',
+                      help="The donor .arxml the inputs are generated from "
+                           "(default SRC.arxml).")
+    parser.add_option('-p', '--pair', dest='pairs', action='append',
+                      default=[],
+                      help="A reference and a new module to compare, "
+                           "REF:NEW where REF is one of %s. Can be repeated "
+                           "(default %s; the other known pairs are %s)."
+                           % (', '.join(_CASES_),
+                              ', '.join('%s:%s' % pair for pair in _PAIRS_),
+                              ', '.join('%s:%s' % pair
+                                        for pair in _OTHER_PAIRS_)))
+    parser.add_option('-c', '--cases', dest='cases',
+                      help="Comma separated cases to run (default all).")
+    parser.add_option('--scale', dest='scale', type='int', default=1,
+                      help="Scale factor of the donor's units (default 1).")
+    parser.add_option('--repeat', dest='repeat', type='int', default=3,
+                      help="Timing rounds per case, the median is kept "
+                           "(default 3).")
+    (options, _) = parser.parse_args(args)
+    assert os.path.isfile(options.source), "File %s is not found!" \
+        % options.source
+    pairs = []
+    for pair in options.pairs:
+        ref, sep, new = pair.partition(':')
+        assert sep and ref in _CASES_ and new, "Pair %s is not of the form "\
+            "REF:NEW with REF one of %s!" % (pair, ', '.join(_CASES_))
+        pairs.append((ref, new))
+    return pairs or list(_PAIRS_), options
+
+
+def main(args):
+    pairs, options = get_options(args)
+    # The implementations log on every call
+    logging.basicConfig(stream=sys.stdout, level=logging.ERROR)
+    util.uuid_namespace_set('compare-impls')
+    only = options.cases.split(',') if options.cases else None
+
+    inputs = Inputs(options.source, options.scale)
+    failed = 0
+    for ref_name, new_name in pairs:
+        print('%s vs %s' % (new_name, ref_name))
+        for case, status, ref_time, new_time in compare_pair(
+                ref_name, new_name, inputs, options.repeat, only):
+            if ref_time is not None:
+                print('  %-34s equal %10.3f ms -> %10.3f ms %7.2fx' %
+                      (case, ref_time * 1e3, new_time * 1e3,
+                       ref_time / new_time))
+            else:
+                print('  %-34s %s' % (case, status))
+            if status.startswith(('FAILED', 'DIFFERENT')):
+                failed += 1
+    if failed:
+        logging.error('%d cases differ from their reference', failed)
+        return 1
+    return 0
+
+
+# Run implementation comparison
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,310 +1,454 @@
-#!/usr/bin/python
-
-import xml.etree.ElementTree as ET
-
-import autosar
-
-NAMESPACE = {'ns': 'http://autosar.org/schema/r4.0'}
-
-def xml_get_namespace(elem: ET.Element) -> str:
-    """
-    Dynamically extracts the XML namespace from an element's tag.
-
-    Args:
-        elem (ET.Element): The XML element.
-
-    Returns:
-        str: The namespace URI string, or an empty string if not present.
-    """        
-    if '}' in elem.tag:
-        return elem.tag.split('}')[0][1:]
-    return ''
-
-def xml_elem_create(string):
-    """
-    Creates an element from a string and applies a predefined AUTOSAR namespace.
-
-    Args:
-        string (str): The XML string to parse.
-
-    Returns:
-        ET.Element: The newly created element with namespaced tags.
-    """
-    # Create a "namespace-naive" element from the string
-    elem = ET.fromstring(string)
-
-    # Get the namespace URI from the global dictionary
-    namespace_uri = NAMESPACE.get('ns')
-
-    # If a namespace is defined, apply it to the root element and all its children.
-    if namespace_uri:
-        for e in elem.iter():
-            # This check prevents adding a namespace to a tag that might already have one.
-            if '}' not in e.tag:
-                e.tag = f"{{{namespace_uri}}}{e.tag}"
-
-    return elem
-
-
-
-def xml_ar_package_create(name, uuid):
-    # Returns AR-PACKAGE created where
-    # SHORT-NAME is a name and UUID is uuid
-
-    return xml_elem_create('''
-    <AR-PACKAGE UUID="{}">
-      <SHORT-NAME>{}</SHORT-NAME>
-      <ELEMENTS/>
-    </AR-PACKAGE>
-    '''.format(uuid, name))
-
-
-def xml_network_endpoint_ipv4_create(name, address, source, mask):
-    # Returns element NETWORK-ENDPOINT (ipv4)
-
-    return xml_elem_create('''
-    <NETWORK-ENDPOINT>
-      <SHORT-NAME>{}</SHORT-NAME>
-      <NETWORK-ENDPOINT-ADDRESSES>
-        <IPV-4-CONFIGURATION>
-          <IPV-4-ADDRESS>{}</IPV-4-ADDRESS>
-          <IPV-4-ADDRESS-SOURCE>{}</IPV-4-ADDRESS-SOURCE>
-          <NETWORK-MASK>{}</NETWORK-MASK>
-        </IPV-4-CONFIGURATION>
-      </NETWORK-ENDPOINT-ADDRESSES>
-    </NETWORK-ENDPOINT>
-    '''.format(name, address, source, mask))
-
-
-def xml_soad_routing_group_create(name):
-    # Returns element SO-AD-ROUTING-GROUP
-
-    return xml_elem_create('''
-    <SO-AD-ROUTING-GROUP>
-      <SHORT-NAME>{}</SHORT-NAME>
-    </SO-AD-ROUTING-GROUP>
-    '''.format(name))
-
-
-def xml_socket_address_udp_create(name, app_endpoint_name,
-                                  network_endpoint_ref, udp_port,
-                                  eth_connector_ref):
-    # Returns element SOCKET-ADDRESS
-
-    return xml_elem_create('''
-    <SOCKET-ADDRESS>
-    <SHORT-NAME>{}</SHORT-NAME>
-    <APPLICATION-ENDPOINT>
-        <SHORT-NAME>{}</SHORT-NAME>
-        <NETWORK-ENDPOINT-REF DEST="NETWORK-ENDPOINT">{}</NETWORK-ENDPOINT-REF>
-        <TP-CONFIGURATION>
-        <UDP-TP>
-            <UDP-TP-PORT>
-            <PORT-NUMBER>{}</PORT-NUMBER>
-            </UDP-TP-PORT>
-        </UDP-TP>
-        </TP-CONFIGURATION>
-    </APPLICATION-ENDPOINT>
-    <CONNECTOR-REF DEST="ETHERNET-COMMUNICATION-CONNECTOR">{}</CONNECTOR-REF>
-    </SOCKET-ADDRESS>'''.format(name, app_endpoint_name, network_endpoint_ref,
-                                udp_port, eth_connector_ref))
-
-
-def xml_socket_connection_ipdu_id_create(header_id, port_ref,
-                                         pdu_triggering_ref,
-                                         routing_group_ref):
-    # Returns element SOCKET-CONNECTION-IPDU-IDENTIFIER
-
-    elem = xml_elem_create('''
-    <SOCKET-CONNECTION-IPDU-IDENTIFIER>
-    <HEADER-ID>{}</HEADER-ID>
-    <PDU-TRIGGERING-REF DEST="PDU-TRIGGERING">{}</PDU-TRIGGERING-REF>
-    <ROUTING-GROUP-REFS>
-        <ROUTING-GROUP-REF DEST="SO-AD-ROUTING-GROUP">{}</ROUTING-GROUP-REF>
-    </ROUTING-GROUP-REFS>
-    </SOCKET-CONNECTION-IPDU-IDENTIFIER>
-    '''.format(header_id, pdu_triggering_ref, routing_group_ref))
-
-    # Add PDU-COLLECTION-TRIGGER in case of Tx port
-    if '_Out' in port_ref:
-        elem.insert(1, xml_elem_create('''
-        <PDU-COLLECTION-TRIGGER>ALWAYS</PDU-COLLECTION-TRIGGER>'''))
-    return elem
-
-
-def xml_socket_connection_bundle_create(name, client_port_ref,
-                                        server_port_ref):
-    # Returns element SOCKET-CONNECTION-BUNDLE
-
-    return xml_elem_create('''
-    <SOCKET-CONNECTION-BUNDLE>
-    <SHORT-NAME>{}</SHORT-NAME>
-    <BUNDLED-CONNECTIONS>
-        <SOCKET-CONNECTION>
-        <CLIENT-PORT-REF DEST="SOCKET-ADDRESS">{}</CLIENT-PORT-REF>
-        <PDUS/>
-        </SOCKET-CONNECTION>
-    </BUNDLED-CONNECTIONS>
-    <SERVER-PORT-REF DEST="SOCKET-ADDRESS">{}</SERVER-PORT-REF>
-    </SOCKET-CONNECTION-BUNDLE>
-    '''.format(name, client_port_ref,
-               server_port_ref))
-
-
-def xml_ecuc_textual_param_create(dest_ref, value):
-
-    return xml_elem_create('''
-    <ECUC-TEXTUAL-PARAM-VALUE>
-    <DEFINITION-REF DEST="ECUC-ENUMERATION-PARAM-DEF">{}</DEFINITION-REF>
-    <VALUE>{}</VALUE>
-    </ECUC-TEXTUAL-PARAM-VALUE>
-    '''.format(dest_ref, value))
-
-
-def xml_ecu_reference_cont_create():
-    return xml_elem_create('''
-    <REFERENCE-VALUES>
-    </REFERENCE-VALUES>
-    ''')
-
-
-def xml_ecu_reference_value_create(def_ref, value_ref):
-    return xml_elem_create('''
-    <ECUC-REFERENCE-VALUE>
-      <DEFINITION-REF DEST="ECUC-CHOICE-REFERENCE-DEF">{}</DEFINITION-REF>
-      <VALUE-REF DEST="ECUC-CONTAINER-VALUE">{}</VALUE-REF>
-    </ECUC-REFERENCE-VALUE>
-    '''.format(def_ref, value_ref))
-
-
-def xml_ecuc_numerical_param_create(dest_ref, value):
-
-    return xml_elem_create('''
-    <ECUC-NUMERICAL-PARAM-VALUE>
-    <DEFINITION-REF DEST="ECUC-BOOLEAN-PARAM-DEF">{}</DEFINITION-REF>
-    <VALUE>{}</VALUE>
-    </ECUC-NUMERICAL-PARAM-VALUE>
-    '''.format(dest_ref, value))
-
-
-def xml_system_signal_create(name, desc, category='VALUE', length='false'):
-
-    return xml_elem_create('''
-    <SYSTEM-SIGNAL>
-    <SHORT-NAME>{}</SHORT-NAME>
-      <DESC>
-        <L-2 L="FOR-ALL">{}</L-2>
-      </DESC>
-      <CATEGORY>{}</CATEGORY>
-      <DYNAMIC-LENGTH>{}</DYNAMIC-LENGTH>
-    </SYSTEM-SIGNAL>
-    '''.format(name, desc, category, length))
-
-
-def xml_isignal_create(name, value, length,
-                       sw_base_type, compu_method, sig_ref,
-                       data_policy='NETWORK-REPRESENTATION-FROM-COM-SPEC'):
-
-    return xml_elem_create('''
-    <I-SIGNAL>
-      <SHORT-NAME>{}</SHORT-NAME>
-      <DATA-TYPE-POLICY>{}</DATA-TYPE-POLICY>
-      <INIT-VALUE>
-        <NUMERICAL-VALUE-SPECIFICATION>
-          <VALUE>{}</VALUE>
-        </NUMERICAL-VALUE-SPECIFICATION>
-      </INIT-VALUE>
-      <LENGTH>{}</LENGTH>
-      <NETWORK-REPRESENTATION-PROPS>
-        <SW-DATA-DEF-PROPS-VARIANTS>
-          <SW-DATA-DEF-PROPS-CONDITIONAL>
-            <BASE-TYPE-REF DEST="SW-BASE-TYPE">{}</BASE-TYPE-REF>
-            <COMPU-METHOD-REF DEST="COMPU-METHOD">{}</COMPU-METHOD-REF>
-          </SW-DATA-DEF-PROPS-CONDITIONAL>
-        </SW-DATA-DEF-PROPS-VARIANTS>
-      </NETWORK-REPRESENTATION-PROPS>
-      <SYSTEM-SIGNAL-REF DEST="SYSTEM-SIGNAL">{}</SYSTEM-SIGNAL-REF>
-    </I-SIGNAL>
-    '''.format(name, data_policy, value, length,
-               sw_base_type, compu_method, sig_ref))
-
-
-def xml_isignal_to_ipdu_mapping_create(name, isig_ref, packing,
-                                       position, transfer):
-
-    return xml_elem_create('''
-    <I-SIGNAL-TO-I-PDU-MAPPING>
-      <SHORT-NAME>{}</SHORT-NAME>
-      <I-SIGNAL-REF DEST="I-SIGNAL">{}</I-SIGNAL-REF>
-      <PACKING-BYTE-ORDER>{}</PACKING-BYTE-ORDER>
-      <START-POSITION>{}</START-POSITION>
-      <TRANSFER-PROPERTY>{}</TRANSFER-PROPERTY>
-    </I-SIGNAL-TO-I-PDU-MAPPING>
-    '''.format(name, isig_ref, packing, position, transfer))
-
-
-def xml_isignal_triggerings_create():
-    return xml_elem_create('''
-    <I-SIGNAL-TRIGGERINGS>
-    </I-SIGNAL-TRIGGERINGS>
-    ''')
-
-
-def xml_isignal_triggering_create(name, port_ref, signal_ref):
-
-    return xml_elem_create('''
-    <I-SIGNAL-TRIGGERING>
-      <SHORT-NAME>{}</SHORT-NAME>
-      <I-SIGNAL-PORT-REFS>
-        <I-SIGNAL-PORT-REF DEST="I-SIGNAL-PORT">{}</I-SIGNAL-PORT-REF>
-      </I-SIGNAL-PORT-REFS>
-      <I-SIGNAL-REF DEST="I-SIGNAL">{}</I-SIGNAL-REF>
-    </I-SIGNAL-TRIGGERING>
-    '''.format(name, port_ref, signal_ref))
-
-
-def xml_fibex_elem_ref_conditional_create(signal_ref):
-
-    return xml_elem_create('''
-    <FIBEX-ELEMENT-REF-CONDITIONAL>
-      <FIBEX-ELEMENT-REF DEST="I-SIGNAL">{}</FIBEX-ELEMENT-REF>
-    </FIBEX-ELEMENT-REF-CONDITIONAL>
-    '''.format(signal_ref))
-
-
-def xml_isignal_triggering_ref_conditional_create(signal_ref):
-
-    return xml_elem_create('''
-    <I-SIGNAL-TRIGGERING-REF-CONDITIONAL>
-      <I-SIGNAL-TRIGGERING-REF DEST="{}">{}</I-SIGNAL-TRIGGERING-REF>
-    </I-SIGNAL-TRIGGERING-REF-CONDITIONAL>
-    '''.format('I-SIGNAL-TRIGGERING', signal_ref))
-
-
-def xml_pdu_triggerings_create():
-    return xml_elem_create('''
-    <PDU-TRIGGERINGS>
-    </PDU-TRIGGERINGS>
-    ''')
-
-
-def xml_soad_config_create():
-    return xml_elem_create('''
-    <SO-AD-CONFIG>
-    </SO-AD-CONFIG>
-    ''')
-
-
-def xml_conn_bundles_create():
-    return xml_elem_create('''
-    <CONNECTION-BUNDLES>
-    </CONNECTION-BUNDLES>
-    ''')
-
-
-# Yes, they really misspelled addresses as addresss in Autosar
-def xml_socket_addresss_create():
-    return xml_elem_create('''
-    <SOCKET-ADDRESSS>
-    </SOCKET-ADDRESSS>
-    ''')
+#!/usr/bin/python
+
+import re
+import xml.etree.ElementTree as ET
+
+import autosar
+
+NAMESPACE = {'ns': 'http://autosar.org/schema/r4.0'}
+
+def xml_get_namespace(elem: ET.Element) -> str:
+    """
+    Dynamically extracts the XML namespace from an element's tag.
+
+    Args:
+        elem (ET.Element): The XML element.
+
+    Returns:
+        str: The namespace URI string, or an empty string if not present.
+    """        
+    if '}' in elem.tag:
+        return elem.tag.split('}')[0][1:]
+    return ''
+
+def xml_elem_create(string):
+    """
+    Creates an element from a string and applies a predefined AUTOSAR namespace.
+
+    Args:
+        string (str): The XML string to parse.
+
+    Returns:
+        ET.Element: The newly created element with namespaced tags.
+    """
+    # Create a "namespace-naive" element from the string
+    elem = ET.fromstring(string)
+
+    # Get the namespace URI from the global dictionary
+    namespace_uri = NAMESPACE.get('ns')
+
+    # If a namespace is defined, apply it to the root element and all its children.
+    if namespace_uri:
+        for e in elem.iter():
+            # This check prevents adding a namespace to a tag that might already have one.
+            if '}' not in e.tag:
+                e.tag = f"{{{namespace_uri}}}{e.tag}"
+
+    return elem
+
+
+# Element templates
+#
+# The creators below used to format a string and parse it for every element.
+# Each template is now parsed once into a namespaced prototype, flattened to
+# a list of nodes in document order. Creating an element rebuilds the nodes
+# with SubElement and fills the text/attribute slots ({} in the template, in
+# the same order as str.format would fill them).
+
+_SLOT_ = '@@slot{}@@'
+_SLOT_RE_ = re.compile(r'@@slot(\d+)@@')
+
+
+class XmlTemplate:
+    """
+    A template compiled to prototype nodes and the positions of its slots.
+    """
+    __slots__ = ('nodes', 'slots')
+
+    def __init__(self, string):
+        proto = xml_elem_create(
+            string.format(*(_SLOT_.format(i) for i in range(string.count('{}')))))
+        # A node is (parent node index or -1, tag, attrib, text, tail)
+        # A slot is (node index, attribute name or None for the text,
+        # the value index if the slot is the whole value else the raw string)
+        nodes, slots = [], []
+        self._compile(proto, -1, nodes, slots)
+        self.nodes = tuple(nodes)
+        self.slots = tuple(slots)
+
+    @classmethod
+    def _compile(cls, elem, parent, nodes, slots):
+        index = len(nodes)
+        nodes.append((parent, elem.tag, dict(elem.attrib), elem.text, elem.tail))
+        for name, value in elem.attrib.items():
+            if _SLOT_RE_.search(value):
+                slots.append((index, name, cls._slot_value(value)))
+        if elem.text and _SLOT_RE_.search(elem.text):
+            slots.append((index, None, cls._slot_value(elem.text)))
+        for child in elem:
+            cls._compile(child, index, nodes, slots)
+
+    @staticmethod
+    def _slot_value(raw):
+        match = _SLOT_RE_.fullmatch(raw)
+        return int(match.group(1)) if match else raw
+
+    def create(self, *values):
+        elems = []
+        for parent, tag, attrib, text, tail in self.nodes:
+            if parent < 0:
+                elem = ET.Element(tag, attrib)
+            else:
+                elem = ET.SubElement(elems[parent], tag, attrib)
+            elem.text = text
+            elem.tail = tail
+            elems.append(elem)
+        for index, attr, value in self.slots:
+            if isinstance(value, int):
+                value = str(values[value])
+            else:
+                value = _SLOT_RE_.sub(lambda m: str(values[int(m.group(1))]),
+                                      value)
+            if attr is None:
+                elems[index].text = value
+            else:
+                elems[index].set(attr, value)
+        return elems[0]
+
+
+def xml_template_compile(string):
+    # Returns the XmlTemplate of an element string with {} slots
+    return XmlTemplate(string)
+
+
+_AR_PACKAGE_TMPL_ = xml_template_compile('''
+    <AR-PACKAGE UUID="{}">
+      <SHORT-NAME>{}</SHORT-NAME>
+      <ELEMENTS/>
+    </AR-PACKAGE>
+    ''')
+
+
+def xml_ar_package_create(name, uuid):
+    # Returns AR-PACKAGE created where
+    # SHORT-NAME is a name and UUID is uuid
+
+    return _AR_PACKAGE_TMPL_.create(uuid, name)
+
+
+_NETWORK_ENDPOINT_IPV4_TMPL_ = xml_template_compile('''
+    <NETWORK-ENDPOINT>
+      <SHORT-NAME>{}</SHORT-NAME>
+      <NETWORK-ENDPOINT-ADDRESSES>
+        <IPV-4-CONFIGURATION>
+          <IPV-4-ADDRESS>{}</IPV-4-ADDRESS>
+          <IPV-4-ADDRESS-SOURCE>{}</IPV-4-ADDRESS-SOURCE>
+          <NETWORK-MASK>{}</NETWORK-MASK>
+        </IPV-4-CONFIGURATION>
+      </NETWORK-ENDPOINT-ADDRESSES>
+    </NETWORK-ENDPOINT>
+    ''')
+
+
+def xml_network_endpoint_ipv4_create(name, address, source, mask):
+    # Returns element NETWORK-ENDPOINT (ipv4)
+
+    return _NETWORK_ENDPOINT_IPV4_TMPL_.create(name, address, source, mask)
+
+
+_SOAD_ROUTING_GROUP_TMPL_ = xml_template_compile('''
+    <SO-AD-ROUTING-GROUP>
+      <SHORT-NAME>{}</SHORT-NAME>
+    </SO-AD-ROUTING-GROUP>
+    ''')
+
+
+def xml_soad_routing_group_create(name):
+    # Returns element SO-AD-ROUTING-GROUP
+
+    return _SOAD_ROUTING_GROUP_TMPL_.create(name)
+
+
+_SOCKET_ADDRESS_UDP_TMPL_ = xml_template_compile('''
+    <SOCKET-ADDRESS>
+    <SHORT-NAME>{}</SHORT-NAME>
+    <APPLICATION-ENDPOINT>
+        <SHORT-NAME>{}</SHORT-NAME>
+        <NETWORK-ENDPOINT-REF DEST="NETWORK-ENDPOINT">{}</NETWORK-ENDPOINT-REF>
+        <TP-CONFIGURATION>
+        <UDP-TP>
+            <UDP-TP-PORT>
+            <PORT-NUMBER>{}</PORT-NUMBER>
+            </UDP-TP-PORT>
+        </UDP-TP>
+        </TP-CONFIGURATION>
+    </APPLICATION-ENDPOINT>
+    <CONNECTOR-REF DEST="ETHERNET-COMMUNICATION-CONNECTOR">{}</CONNECTOR-REF>
+    </SOCKET-ADDRESS>''')
+
+
+def xml_socket_address_udp_create(name, app_endpoint_name,
+                                  network_endpoint_ref, udp_port,
+                                  eth_connector_ref):
+    # Returns element SOCKET-ADDRESS
+
+    return _SOCKET_ADDRESS_UDP_TMPL_.create(name, app_endpoint_name,
+                                            network_endpoint_ref,
+                                            udp_port, eth_connector_ref)
+
+
+_SOCKET_CONNECTION_IPDU_ID_TMPL_ = xml_template_compile('''
+    <SOCKET-CONNECTION-IPDU-IDENTIFIER>
+    <HEADER-ID>{}</HEADER-ID>
+    <PDU-TRIGGERING-REF DEST="PDU-TRIGGERING">{}</PDU-TRIGGERING-REF>
+    <ROUTING-GROUP-REFS>
+        <ROUTING-GROUP-REF DEST="SO-AD-ROUTING-GROUP">{}</ROUTING-GROUP-REF>
+    </ROUTING-GROUP-REFS>
+    </SOCKET-CONNECTION-IPDU-IDENTIFIER>
+    ''')
+
+_PDU_COLLECTION_TRIGGER_TMPL_ = xml_template_compile('''
+        <PDU-COLLECTION-TRIGGER>ALWAYS</PDU-COLLECTION-TRIGGER>''')
+
+
+def xml_socket_connection_ipdu_id_create(header_id, port_ref,
+                                         pdu_triggering_ref,
+                                         routing_group_ref):
+    # Returns element SOCKET-CONNECTION-IPDU-IDENTIFIER
+
+    elem = _SOCKET_CONNECTION_IPDU_ID_TMPL_.create(header_id,
+                                                   pdu_triggering_ref,
+                                                   routing_group_ref)
+
+    # Add PDU-COLLECTION-TRIGGER in case of Tx port
+    if '_Out' in port_ref:
+        elem.insert(1, _PDU_COLLECTION_TRIGGER_TMPL_.create())
+    return elem
+
+
+_SOCKET_CONNECTION_BUNDLE_TMPL_ = xml_template_compile('''
+    <SOCKET-CONNECTION-BUNDLE>
+    <SHORT-NAME>{}</SHORT-NAME>
+    <BUNDLED-CONNECTIONS>
+        <SOCKET-CONNECTION>
+        <CLIENT-PORT-REF DEST="SOCKET-ADDRESS">{}</CLIENT-PORT-REF>
+        <PDUS/>
+        </SOCKET-CONNECTION>
+    </BUNDLED-CONNECTIONS>
+    <SERVER-PORT-REF DEST="SOCKET-ADDRESS">{}</SERVER-PORT-REF>
+    </SOCKET-CONNECTION-BUNDLE>
+    ''')
+
+
+def xml_socket_connection_bundle_create(name, client_port_ref,
+                                        server_port_ref):
+    # Returns element SOCKET-CONNECTION-BUNDLE
+
+    return _SOCKET_CONNECTION_BUNDLE_TMPL_.create(name, client_port_ref,
+                                                  server_port_ref)
+
+
+_ECUC_TEXTUAL_PARAM_TMPL_ = xml_template_compile('''
+    <ECUC-TEXTUAL-PARAM-VALUE>
+    <DEFINITION-REF DEST="ECUC-ENUMERATION-PARAM-DEF">{}</DEFINITION-REF>
+    <VALUE>{}</VALUE>
+    </ECUC-TEXTUAL-PARAM-VALUE>
+    ''')
+
+
+def xml_ecuc_textual_param_create(dest_ref, value):
+
+    return _ECUC_TEXTUAL_PARAM_TMPL_.create(dest_ref, value)
+
+
+_ECU_REFERENCE_CONT_TMPL_ = xml_template_compile('''
+    <REFERENCE-VALUES>
+    </REFERENCE-VALUES>
+    ''')
+
+
+def xml_ecu_reference_cont_create():
+    return _ECU_REFERENCE_CONT_TMPL_.create()
+
+
+_ECU_REFERENCE_VALUE_TMPL_ = xml_template_compile('''
+    <ECUC-REFERENCE-VALUE>
+      <DEFINITION-REF DEST="ECUC-CHOICE-REFERENCE-DEF">{}</DEFINITION-REF>
+      <VALUE-REF DEST="ECUC-CONTAINER-VALUE">{}</VALUE-REF>
+    </ECUC-REFERENCE-VALUE>
+    ''')
+
+
+def xml_ecu_reference_value_create(def_ref, value_ref):
+    return _ECU_REFERENCE_VALUE_TMPL_.create(def_ref, value_ref)
+
+
+_ECUC_NUMERICAL_PARAM_TMPL_ = xml_template_compile('''
+    <ECUC-NUMERICAL-PARAM-VALUE>
+    <DEFINITION-REF DEST="ECUC-BOOLEAN-PARAM-DEF">{}</DEFINITION-REF>
+    <VALUE>{}</VALUE>
+    </ECUC-NUMERICAL-PARAM-VALUE>
+    ''')
+
+
+def xml_ecuc_numerical_param_create(dest_ref, value):
+
+    return _ECUC_NUMERICAL_PARAM_TMPL_.create(dest_ref, value)
+
+
+_SYSTEM_SIGNAL_TMPL_ = xml_template_compile('''
+    <SYSTEM-SIGNAL>
+    <SHORT-NAME>{}</SHORT-NAME>
+      <DESC>
+        <L-2 L="FOR-ALL">{}</L-2>
+      </DESC>
+      <CATEGORY>{}</CATEGORY>
+      <DYNAMIC-LENGTH>{}</DYNAMIC-LENGTH>
+    </SYSTEM-SIGNAL>
+    ''')
+
+
+def xml_system_signal_create(name, desc, category='VALUE', length='false'):
+
+    return _SYSTEM_SIGNAL_TMPL_.create(name, desc, category, length)
+
+
+_ISIGNAL_TMPL_ = xml_template_compile('''
+    <I-SIGNAL>
+      <SHORT-NAME>{}</SHORT-NAME>
+      <DATA-TYPE-POLICY>{}</DATA-TYPE-POLICY>
+      <INIT-VALUE>
+        <NUMERICAL-VALUE-SPECIFICATION>
+          <VALUE>{}</VALUE>
+        </NUMERICAL-VALUE-SPECIFICATION>
+      </INIT-VALUE>
+      <LENGTH>{}</LENGTH>
+      <NETWORK-REPRESENTATION-PROPS>
+        <SW-DATA-DEF-PROPS-VARIANTS>
+          <SW-DATA-DEF-PROPS-CONDITIONAL>
+            <BASE-TYPE-REF DEST="SW-BASE-TYPE">{}</BASE-TYPE-REF>
+            <COMPU-METHOD-REF DEST="COMPU-METHOD">{}</COMPU-METHOD-REF>
+          </SW-DATA-DEF-PROPS-CONDITIONAL>
+        </SW-DATA-DEF-PROPS-VARIANTS>
+      </NETWORK-REPRESENTATION-PROPS>
+      <SYSTEM-SIGNAL-REF DEST="SYSTEM-SIGNAL">{}</SYSTEM-SIGNAL-REF>
+    </I-SIGNAL>
+    ''')
+
+
+def xml_isignal_create(name, value, length,
+                       sw_base_type, compu_method, sig_ref,
+                       data_policy='NETWORK-REPRESENTATION-FROM-COM-SPEC'):
+
+    return _ISIGNAL_TMPL_.create(name, data_policy, value, length,
+                                 sw_base_type, compu_method, sig_ref)
+
+
+_ISIGNAL_TO_IPDU_MAPPING_TMPL_ = xml_template_compile('''
+    <I-SIGNAL-TO-I-PDU-MAPPING>
+      <SHORT-NAME>{}</SHORT-NAME>
+      <I-SIGNAL-REF DEST="I-SIGNAL">{}</I-SIGNAL-REF>
+      <PACKING-BYTE-ORDER>{}</PACKING-BYTE-ORDER>
+      <START-POSITION>{}</START-POSITION>
+      <TRANSFER-PROPERTY>{}</TRANSFER-PROPERTY>
+    </I-SIGNAL-TO-I-PDU-MAPPING>
+    ''')
+
+
+def xml_isignal_to_ipdu_mapping_create(name, isig_ref, packing,
+                                       position, transfer):
+
+    return _ISIGNAL_TO_IPDU_MAPPING_TMPL_.create(name, isig_ref, packing,
+                                                 position, transfer)
+
+
+_ISIGNAL_TRIGGERINGS_TMPL_ = xml_template_compile('''
+    <I-SIGNAL-TRIGGERINGS>
+    </I-SIGNAL-TRIGGERINGS>
+    ''')
+
+
+def xml_isignal_triggerings_create():
+    return _ISIGNAL_TRIGGERINGS_TMPL_.create()
+
+
+_ISIGNAL_TRIGGERING_TMPL_ = xml_template_compile('''
+    <I-SIGNAL-TRIGGERING>
+      <SHORT-NAME>{}</SHORT-NAME>
+      <I-SIGNAL-PORT-REFS>
+        <I-SIGNAL-PORT-REF DEST="I-SIGNAL-PORT">{}</I-SIGNAL-PORT-REF>
+      </I-SIGNAL-PORT-REFS>
+      <I-SIGNAL-REF DEST="I-SIGNAL">{}</I-SIGNAL-REF>
+    </I-SIGNAL-TRIGGERING>
+    ''')
+
+
+def xml_isignal_triggering_create(name, port_ref, signal_ref):
+
+    return _ISIGNAL_TRIGGERING_TMPL_.create(name, port_ref, signal_ref)
+
+
+_FIBEX_ELEM_REF_CONDITIONAL_TMPL_ = xml_template_compile('''
+    <FIBEX-ELEMENT-REF-CONDITIONAL>
+      <FIBEX-ELEMENT-REF DEST="I-SIGNAL">{}</FIBEX-ELEMENT-REF>
+    </FIBEX-ELEMENT-REF-CONDITIONAL>
+    ''')
+
+
+def xml_fibex_elem_ref_conditional_create(signal_ref):
+
+    return _FIBEX_ELEM_REF_CONDITIONAL_TMPL_.create(signal_ref)
+
+
+_ISIGNAL_TRIGGERING_REF_CONDITIONAL_TMPL_ = xml_template_compile('''
+    <I-SIGNAL-TRIGGERING-REF-CONDITIONAL>
+      <I-SIGNAL-TRIGGERING-REF DEST="{}">{}</I-SIGNAL-TRIGGERING-REF>
+    </I-SIGNAL-TRIGGERING-REF-CONDITIONAL>
+    ''')
+
+
+def xml_isignal_triggering_ref_conditional_create(signal_ref):
+
+    return _ISIGNAL_TRIGGERING_REF_CONDITIONAL_TMPL_.create(
+        'I-SIGNAL-TRIGGERING', signal_ref)
+
+
+_PDU_TRIGGERINGS_TMPL_ = xml_template_compile('''
+    <PDU-TRIGGERINGS>
+    </PDU-TRIGGERINGS>
+    ''')
+
+
+def xml_pdu_triggerings_create():
+    return _PDU_TRIGGERINGS_TMPL_.create()
+
+
+_SOAD_CONFIG_TMPL_ = xml_template_compile('''
+    <SO-AD-CONFIG>
+    </SO-AD-CONFIG>
+    ''')
+
+
+def xml_soad_config_create():
+    return _SOAD_CONFIG_TMPL_.create()
+
+
+_CONN_BUNDLES_TMPL_ = xml_template_compile('''
+    <CONNECTION-BUNDLES>
+    </CONNECTION-BUNDLES>
+    ''')
+
+
+def xml_conn_bundles_create():
+    return _CONN_BUNDLES_TMPL_.create()
+
+
+# Yes, they really misspelled addresses as addresss in Autosar
+_SOCKET_ADDRESSS_TMPL_ = xml_template_compile('''
+    <SOCKET-ADDRESSS>
+    </SOCKET-ADDRESSS>
+    ''')
+
+
+def xml_socket_addresss_create():
+    return _SOCKET_ADDRESSS_TMPL_.create()
@@ -14,12 +14,9 @@ _COMMUNICATION_PACKAGES_ = ('Pdu', 'ISignal', 'ISignalGroup', 'ISignalPduGroup')
 _CHANNEL_MAPPING_ = ('CAN-PHYSICAL-CHANNEL', 'ETHERNET-PHYSICAL-CHANNEL')
 
 # --- Helper Class for Testing ---
-class ArxmlFile:
+def ArxmlFile(tree):
     """A simple wrapper to hold the XML tree and parent map for testing."""
-    def __init__(self, tree):
-        self.xml = tree
-        self.parents = {}
-        self.filename = "test.arxml"
+    return util.ArxmlFile(tree, "test.arxml")
 
 # --- New Generic Helper Function ---
 def _get_or_create_container(parent_element, tag_name, factory_function, arxml_parents):
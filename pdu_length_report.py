@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+
+import logging
+import os
+import sys
+import time
+from optparse import OptionParser
+
+import util
+
+# This script's version
+VERSION = '0.1.0'
+
+
+def get_options(args):
+    usage = "Usage: %prog -i file1,file2,... [-j JOBS]"
+    parser = OptionParser(usage=usage,
+                          description="Script to check the PDU lengths "
+                          "against the lengths of their CAN-FRAMEs in every "
+                          "Device Proxy .arxml and report all the "
+                          "mismatches, PDUs without frame and frames "
+                          "referencing undefined PDUs.",
+                          version="%%prog %s" % VERSION)
+    parser.add_option('-i', '--input_arxml', dest='input_arxml',
+                      help="Comma separated Device Proxy .arxmls to check.")
+    parser.add_option('-j', '--jobs', dest='jobs', type='int', default=1,
+                      help="Number of processes parsing the .arxmls "
+                           "(default 1).")
+    parser.add_option('--nm_pdus', dest='nm_pdus', action='store_true',
+                      default=False,
+                      help="Check the NM-PDUs too (as the HIC merger does).")
+    parser.add_option('--trace', dest='trace',
+                      help="Save the parse and check of every file as spans "
+                           "to this .json, to open in Perfetto or "
+                           "chrome://tracing.")
+    (options, _) = parser.parse_args(args)
+    if not options.input_arxml:
+        parser.print_help(None)
+        sys.exit(0)
+    paths = options.input_arxml.split(',')
+    for path in paths:
+        assert os.path.isfile(path), "File %s is not found!" % path
+    return paths, options
+
+
+def main(args):
+    paths, options = get_options(args)
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+
+    pdu_types = ('I-SIGNAL-I-PDU', )
+    if options.nm_pdus:
+        pdu_types += ('NM-PDU', )
+    events = [] if options.trace else None
+    start = time.time()
+    reports = util.pdu_frame_lengths_report(paths, options.jobs, pdu_types,
+                                            events)
+    if options.trace:
+        events.append(util.trace_event('report', 'report', start,
+                                       time.time() - start))
+        pids = sorted(set(event['pid'] for event in events))
+        events += [util.trace_process_name(pid, 'main' if pid == os.getpid()
+                                           else 'worker %d' % pid)
+                   for pid in pids]
+        util.trace_save(options.trace, events)
+    for path, report in reports.items():
+        for pdu, length, frame, frame_length in report['mismatch']:
+            logging.warning("%s: PDU %s length %s, frame %s length %s",
+                            path, pdu, length, frame, frame_length)
+        if any(report.values()):
+            util.PDU_LENGTH_ISSUES[path] = report
+
+    if util.pdu_frame_lengths_summary():
+        return 1
+    logging.info('No PDU/frame length issues in %d files', len(paths))
+    return 0
+
+
+# Run PDU length report
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
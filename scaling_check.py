@@ -0,0 +1,299 @@
+#!/usr/bin/python3
+
+import copy
+import importlib
+import logging
+import math
+import os
+import sys
+import xml.etree.ElementTree as ET
+from optparse import OptionParser
+
+import bench_util
+import factory
+import util
+
+# This script's version
+VERSION = '0.1.0'
+
+# The highest accepted exponent of a case's time against the document size
+# (2 is quadratic), see test_scaling.py
+MAX_SLOPE = 1.3
+
+# Cases
+#
+# A case gets the generated document of a size and returns the function to
+# time and its (untimed) prepare, see bench_util.measure. The function must
+# do work proportional to the document, so a growth faster than the
+# document's shows a quadratic hot spot.
+
+
+def _merger(name):
+    return importlib.import_module(name)
+
+
+def _channel_name(root, tag):
+    channel = util.xml_elem_find(root, tag)
+    assert channel is not None, "Element %s is not found!" % tag
+    return channel[0].text
+
+
+def case_xml_elem_extend(doc):
+    # All the signals again under new names, plus clashing ones
+    root = doc.xml.getroot()
+    signals = util.xml_elem_findall(root, 'I-SIGNAL')
+    dst_isig = util.xml_ar_package_find(root, 'ISignal')[1]
+
+    def prepare():
+        dst = copy.deepcopy(dst_isig)
+        doc.parents[dst] = doc.parents[dst_isig]
+        new = util.xml_elems_take(signals, doc)
+        for signal in new:
+            signal[0].text += 'Scaled'
+        return new + util.xml_elems_take(signals[:10], doc), dst
+
+    def extend(src, dst):
+        util.xml_elem_extend(src, dst, doc, doc, graceful=True)
+    return extend, prepare
+
+
+def case_update_isignal_and_pdu_triggerings(doc):
+    # HIC: the CAN channel of the document into a copy of itself
+    merger = _merger('HIC_com_merger')
+    channel = _channel_name(doc.xml.getroot(), 'CAN-PHYSICAL-CHANNEL')
+
+    def prepare():
+        return (util.ArxmlFile(copy.deepcopy(doc.xml), 'scaled.arxml'),
+                util.ArxmlFile(copy.deepcopy(doc.xml), 'base.arxml'),
+                channel)
+    return merger.update_isignal_and_pdu_triggerings, prepare
+
+
+def _mr_com_doc(doc, merger):
+    # The document with the CAN frames of its first CAN channel over its
+    # Ethernet channel, like an MR COM DP has them. Returns it with the
+    # frames, the MR COM PDUs and the Ethernet channel's name. The PDUs
+    # without signal mapping (there are some in SRC.arxml) can't be MR COM
+    # PDUs and are left out.
+    doc = util.ArxmlFile(copy.deepcopy(doc.xml), doc.filename)
+    root = doc.xml.getroot()
+    for can_ch in util.xml_elem_findall(root, 'CAN-PHYSICAL-CHANNEL')[1:]:
+        for trigs in util.xml_elem_findall(can_ch, 'FRAME-TRIGGERINGS'):
+            trigs[:] = []
+    pdus = []
+    for pdu in util.xml_elem_findall(root, 'I-SIGNAL-I-PDU'):
+        if util.xml_elem_find(pdu, 'I-SIGNAL-TO-I-PDU-MAPPING') is None:
+            doc.parents[pdu].remove(pdu)
+        else:
+            pdus.append(pdu[0].text)
+    channel = _channel_name(root, 'ETHERNET-PHYSICAL-CHANNEL')
+    frames = merger.fetch_can_frame_triggering_info(doc, True)
+    # Only the PDUs the Ethernet channel triggers once, the others aren't a
+    # DP's MR COM PDUs either. Their triggerings get the (empty)
+    # I-SIGNAL-TRIGGERINGS the MR COM signals are referenced from.
+    # The channel's triggerings as the merge prepares them
+    merger.prepare_ethernet_physical_channel(doc, channel)
+    eth_ch = merger.xml_get_physical_channel(doc, 'ETHERNET-PHYSICAL-CHANNEL',
+                                             channel)
+    trigs = {}
+    for trig in util.xml_elem_findall(eth_ch, 'PDU-TRIGGERING'):
+        trigs.setdefault(trig[0].text.replace('PduTr', ''), []).append(trig)
+    pdus = [pdu for pdu in pdus if pdu in frames
+            and len(trigs.get(pdu, [])) == 1
+            and len(util.PDU_TRIGGERING_SHAPE.get(trigs[pdu][0])[1]) == 1]
+    for pdu in pdus:
+        if util.PDU_TRIGGERING_SHAPE.get(trigs[pdu][0])[2] is None:
+            trigs[pdu][0].insert(3, factory.xml_isignal_triggerings_create())
+    assert pdus, "No MR COM PDUs are found in %s!" % doc.filename
+    return doc, frames, pdus, channel
+
+
+def case_add_mr_com_flavour(doc):
+    # HIC: the MR COM PDUs of the document, see _mr_com_doc
+    merger = _merger('HIC_com_merger')
+    doc, frames, pdus, channel = _mr_com_doc(doc, merger)
+    # And the channel's connector an I-SIGNAL-PORT per I-PDU-PORT direction
+    for port in util.xml_elem_findall(doc.xml.getroot(), 'I-PDU-PORT'):
+        isig_port = copy.deepcopy(port)
+        isig_port.tag = port.tag.replace('I-PDU-PORT', 'I-SIGNAL-PORT')
+        isig_port[0].text = port[0].text.replace('IPduPort', 'ISignalPort')
+        doc.parents[port].append(isig_port)
+
+    def prepare():
+        return (util.ArxmlFile(copy.deepcopy(doc.xml), 'base.arxml'), frames,
+                pdus, channel)
+    return merger.add_mr_com_flavour, prepare
+
+
+def case_copy_isignal_and_pdu_triggerings(doc):
+    # HIC: the triggerings of the document's MR COM PDUs from its CAN channel
+    # into its Ethernet channel, under new names
+    merger = _merger('HIC_com_merger')
+    doc, _, pdus, channel = _mr_com_doc(doc, merger)
+    src_ch = util.xml_elem_find(doc.xml.getroot(), 'CAN-PHYSICAL-CHANNEL')
+    for trig in util.xml_elem_findall(src_ch, 'I-SIGNAL-TRIGGERING') + \
+            util.xml_elem_findall(src_ch, 'PDU-TRIGGERING'):
+        trig[0].text += 'Scaled'
+
+    def prepare():
+        return (util.ArxmlFile(copy.deepcopy(doc.xml), 'scaled.arxml'),
+                util.ArxmlFile(copy.deepcopy(doc.xml), 'base.arxml'),
+                pdus, channel, True)
+    return merger.copy_isignal_and_pdu_triggerings, prepare
+
+
+def case_create_socket_connection_bundle(doc):
+    # HIC: the bundle of the document's MR COM PDUs on its Ethernet channel,
+    # whose connector references the bundle's server network endpoint
+    merger = _merger('HIC_com_merger')
+    bundle = merger._SOCKET_CONNECTION_BUNDLE_
+    doc, frames, pdus, channel = _mr_com_doc(doc, merger)
+    eth_ch = merger.xml_get_physical_channel(doc, 'ETHERNET-PHYSICAL-CHANNEL',
+                                             channel)
+    end = bundle['server_port']['network_endpoint']
+    net_end = factory.xml_network_endpoint_ipv4_create(
+        end['name'].replace('Hix', util.xml_ecu_sys_name_get(doc)),
+        end['address'], end['source'], end['mask'])
+    util.xml_elem_append(util.xml_elem_find(eth_ch, 'NETWORK-ENDPOINTS'),
+                         net_end, doc.parents)
+    net_end_refs = util.xml_elem_find(doc.xml.getroot(),
+                                      'NETWORK-ENDPOINT-REFS')
+    assert net_end_refs is not None, "Element NETWORK-ENDPOINT-REFS is "\
+                                     "not found!"
+    net_end_ref = copy.deepcopy(net_end_refs[0])
+    net_end_ref.text = util.xml_elem_get_abs_path(net_end, doc)
+    net_end_refs.append(net_end_ref)
+
+    def prepare():
+        return (bundle, doc,
+                util.ArxmlFile(copy.deepcopy(doc.xml), 'base.arxml'),
+                frames, pdus, channel)
+    return merger.create_socket_connection_bundle, prepare
+
+
+def case_remove_empty_triggerings(doc):
+    # HIC: every I-SIGNAL-TRIGGERINGS of the document emptied
+    merger = _merger('HIC_com_merger')
+
+    def prepare():
+        dst = util.ArxmlFile(copy.deepcopy(doc.xml), 'base.arxml')
+        root = dst.xml.getroot()
+        for trig in util.xml_elem_findall(root, 'I-SIGNAL-TRIGGERINGS'):
+            trig[:] = []
+        # The merge has built the parent map long before
+        dst.parents.get(root)
+        return (dst, )
+    return merger.remove_empty_triggerings, prepare
+
+
+_CASES_ = {'xml_elem_extend': case_xml_elem_extend,
+           'update_isignal_and_pdu_triggerings':
+               case_update_isignal_and_pdu_triggerings,
+           'add_mr_com_flavour': case_add_mr_com_flavour,
+           'copy_isignal_and_pdu_triggerings':
+               case_copy_isignal_and_pdu_triggerings,
+           'create_socket_connection_bundle':
+               case_create_socket_connection_bundle,
+           'remove_empty_triggerings': case_remove_empty_triggerings}
+
+
+def slope(sizes, seconds):
+    # The least squares exponent k of seconds ~ sizes^k
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(second, 1e-9)) for second in seconds]
+    x_mean, y_mean = sum(xs) / len(xs), sum(ys) / len(ys)
+    return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / \
+        sum((x - x_mean) ** 2 for x in xs)
+
+
+def docs_make(donor_path, scale):
+    # The generated documents of size N, 2N and 4N
+    donor = ET.parse(donor_path)
+    return [bench_util.make_doc(donor, scale * factor) for factor in (1, 2, 4)]
+
+
+def case_run(name, docs, repeat):
+    # Returns the case's (elements per size, seconds per size)
+    sizes = [sum(1 for _ in doc.xml.getroot().iter()) for doc in docs]
+    seconds = [bench_util.measure(*_CASES_[name](doc), repeat=repeat)[0]
+               for doc in docs]
+    return sizes, seconds
+
+
+def run(donor_path, cases, scale, repeat):
+    # Returns case -> (elements per size, seconds per size); a case that
+    # can't run gets the error instead
+    docs = docs_make(donor_path, scale)
+    results = {}
+    for name in cases:
+        try:
+            results[name] = case_run(name, docs, repeat)
+        except (ImportError, AssertionError) as e:
+            results[name] = '%s: %s' % (type(e).__name__, e)
+    return results
+
+
+def get_options(args):
+    usage = "Usage: %prog [-s DONOR.arxml] [-c CASE,...] [--max_slope K]"
+    parser = OptionParser(usage=usage,
+                          description="Script to check that the merge hot "
+                          "spots scale near-linearly: every case runs on "
+                          "generated documents of size N, 2N and 4N and "
+                          "fails if its time grows faster than "
+                          "size^max_slope.",
+                          version="%%prog %s" % VERSION)
+    parser.add_option('-s', '--source', dest='source', default='SRC.arxml',
+                      help="The donor .arxml the documents are generated "
+                           "from (default SRC.arxml).")
+    parser.add_option('-c', '--cases', dest='cases',
+                      default=','.join(_CASES_),
+                      help="Comma separated cases to run (default all: %s)."
+                           % ', '.join(_CASES_))
+    parser.add_option('--scale', dest='scale', type='int', default=4,
+                      help="Scale factor of the donor's PDUs and signals "
+                           "for size N (default 4).")
+    parser.add_option('--repeat', dest='repeat', type='int', default=3,
+                      help="Rounds per size, the median is kept (default 3).")
+    parser.add_option('--max_slope', dest='max_slope', type='float',
+                      default=MAX_SLOPE,
+                      help="The highest accepted exponent of the time "
+                           "against the size (default %.1f, 2 is "
+                           "quadratic)." % MAX_SLOPE)
+    (options, _) = parser.parse_args(args)
+    assert os.path.isfile(options.source), "File %s is not found!" \
+        % options.source
+    cases = options.cases.split(',')
+    for case in cases:
+        assert case in _CASES_, "Unknown case %s, expected one of %s!" \
+            % (case, ', '.join(_CASES_))
+    return cases, options
+
+
+def main(args):
+    cases, options = get_options(args)
+    # The merger functions log on every call
+    logging.basicConfig(stream=sys.stdout, level=logging.ERROR)
+
+    failed = []
+    results = run(options.source, cases, options.scale, options.repeat)
+    for name, result in results.items():
+        if isinstance(result, str):
+            print('%-36s FAILED to run: %s' % (name, result))
+            failed.append(name)
+            continue
+        sizes, seconds = result
+        exponent = slope(sizes, seconds)
+        print('%-36s %s slope %.2f' % (name, '  '.join(
+            '%d el %.3f ms' % (size, second * 1e3)
+            for size, second in zip(sizes, seconds)), exponent))
+        if exponent > options.max_slope:
+            failed.append(name)
+    if failed:
+        logging.error('Superlinear or failing cases: %s', ', '.join(failed))
+        return 1
+    return 0
+
+
+# Run scaling check
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -2,7 +2,6 @@ import xml.etree.ElementTree as ET
 import uuid
 import logging
 from typing import Optional
-from xml.dom import minidom
 from pathlib import Path
 import util
 import HIA_Com_merger_ref as hair
@@ -37,30 +36,7 @@ def read_arxml_contents(file_path: str) -> Optional[ET.ElementTree]:
         print(f"\n[ERROR] An unexpected error occurred: {e}")
 
 # --- Helper function for logging, as provided by you ---
-def xml_elem_str(elem: ET.Element, *, indent_with:str ="    ") -> str:
-    """
-    Returns a pretty formated string representation of the specified element.
-
-    Args:
-        elem (ET.Element): The element to stringify.
-        indent_with (str, optional): Indent nested tags with this. Defaults to "    ".
-    Returns:
-        str: The string representation of the specified element.
-    """
-    if elem is None:
-        return ""
-    if isinstance(elem, ET.Element):
-        raw_elem_str = ET.tostring(elem,
-                                   encoding='utf-8',
-                                   short_empty_elements=False)
-        minidom_elem = minidom.parseString(raw_elem_str)
-        pretty_elem_str = minidom_elem.toprettyxml(indent=indent_with)
-        # Remove (potential) empty lines and the initial
-        # <?xml version="1.0" ?> added by minidom
-        return "\n".join([s for s in pretty_elem_str.split("\n")
-                          if s.strip()][1:])
-
-    raise TypeError
+xml_elem_str = util.xml_elem_str
 
 
 
@@ -112,7 +88,7 @@ def replace_uuid(elem: ET.Element) -> Optional[str]:
         
         logging.debug(
             "Replacing UUID of element %s with new UUID %s",
-            xml_elem_str(elem).split('\n', 2)[0:2],
+            xml_elem_str(elem, head_only=True),
             new_uuid
         )
         
@@ -125,7 +101,7 @@ def replace_uuid(elem: ET.Element) -> Optional[str]:
         # This warning is now correctly triggered if the attribute is missing.
         logging.warning(
             "Trying to replace UUID of element %s with no UUID",
-            xml_elem_str(elem).split('\n', 2)[0:2]
+            xml_elem_str(elem, head_only=True)
         )
         # Return None to indicate no action was taken. The original function
         # would have crashed with a NameError here.
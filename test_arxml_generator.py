@@ -0,0 +1,45 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+# The generator builds its elements with factory, which needs autosar
+pytest.importorskip('autosar')
+
+import arxml_generator
+import util
+
+_DONOR_ = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       'SRC.arxml')
+
+
+def test_help():
+    with pytest.raises(SystemExit) as e:
+        arxml_generator.main(['-h'])
+    assert e.value.code == 0
+
+
+def test_generate_small(tmp_path, capsys):
+    # A small run with every option, like bench_merge generates its inputs
+    rc = arxml_generator.main(['-s', _DONOR_, '-o', str(tmp_path),
+                               '--dps', '2', '--pdus', '10',
+                               '--signals', '20',
+                               '--channels', 'VlanA,VlanB',
+                               '--channel_endpoints', 'EpHix',
+                               '--services', 'ServiceA'])
+    assert rc == 0
+    files = capsys.readouterr().out.strip().split(',')
+    assert [os.path.basename(f) for f in files] == \
+        ['base.arxml'] + [arxml_generator._DP_FILENAME_ % i for i in range(2)]
+    for f in files:
+        assert os.path.getsize(f) > 0, "File %s is not found!" % f
+
+
+def test_scale_counts():
+    # A count between multiples of the donor's is rounded up, and the
+    # returned counts are the ones in the document
+    root = ET.parse(_DONOR_).getroot()
+    have = len(util.xml_elem_findall(root, 'I-SIGNAL-I-PDU'))
+    counts = arxml_generator.arxml_scale(root, {'pdus': have + 1})
+    assert counts['pdus'] == 2 * have
+    assert counts['pdus'] == len(util.xml_elem_findall(root, 'I-SIGNAL-I-PDU'))
@@ -10,12 +10,9 @@ from test import read_arxml_contents
 import copy
 
 # --- Helper Class ---
-class ArxmlFile:
-    """A simple wrapper to hold the XML tree and parent map, replacing the MagicMock."""
-    def __init__(self, tree):
-        self.xml = tree
-        # The parent map is populated by the util functions as elements are added.
-        self.parents = {}
+# util.ArxmlFile builds the parent map on demand, so paths of the loaded
+# elements resolve too (not only of the ones added by the util functions).
+ArxmlFile = util.ArxmlFile
 
 # --- Refactored Functions ---
 # This section contains the functions we are testing.
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+# The cases build their fixtures with factory, which needs autosar
+pytest.importorskip('autosar')
+
+import scaling_check
+
+_DONOR_ = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       'SRC.arxml')
+
+# Size N is smaller than the script's default to keep the run short, the
+# slope of a quadratic hot spot is still well above MAX_SLOPE at it
+_SCALE_ = 2
+_REPEAT_ = 3
+
+
+@pytest.fixture(scope='module')
+def docs():
+    return scaling_check.docs_make(_DONOR_, _SCALE_)
+
+
+@pytest.mark.parametrize('case', list(scaling_check._CASES_))
+def test_slope(docs, case):
+    # The case's time over sizes N, 2N and 4N grows near-linearly
+    sizes, seconds = scaling_check.case_run(case, docs, _REPEAT_)
+    slope = scaling_check.slope(sizes, seconds)
+    assert slope <= scaling_check.MAX_SLOPE, \
+        "%s grows as size^%.2f (%s)!" % (case, slope, ', '.join(
+            '%d el %.3f ms' % (size, second * 1e3)
+            for size, second in zip(sizes, seconds)))
@@ -1,20 +1,231 @@
 #!/usr/bin/python3
 from optparse import OptionParser
-from typing import List, Optional, Tuple, Union
-from xml.dom import minidom
+from typing import Dict, List, Optional, Tuple, Union
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+from xml.sax.saxutils import escape, quoteattr
+import atexit
+import copy
+import functools
+import inspect
+import json
 import logging
+import logging.handlers
 import os
 import pprint
+import queue
 import sys
+import time
 import uuid
+import weakref
 import xml.etree.ElementTree as ET
 
 from factory import xml_ar_package_create
 # from log_utils.log_wrappers import error
 import autosar
 
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
 pp = pprint.PrettyPrinter(indent=4)
 
+# Merge stage timings
+#
+# The mergers mark their pipeline stages (see timed_stage and stage). The
+# stages are only measured while a StageTimer is set, e.g. by the merge
+# benchmark, otherwise they cost one global lookup per call.
+
+def peak_rss_kb() -> int:
+    # The peak resident set size of the process so far in kB (Linux), 0 if
+    # it can't be read
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def rss_kb() -> int:
+    # The current resident set size of the process in kB, 0 if it can't be
+    # read (only on Linux)
+    try:
+        with open('/proc/self/statm') as f:
+            resident = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return 0
+    return resident * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def traced_kb() -> int:
+    # The memory traced by tracemalloc in kB, 0 if it isn't tracing
+    tracemalloc = sys.modules.get('tracemalloc')
+    if tracemalloc is None or not tracemalloc.is_tracing():
+        return 0
+    return tracemalloc.get_traced_memory()[0] // 1024
+
+
+class StageTimer:
+    """
+    Accumulates the wall time, CPU time and peak RSS of every stage.
+
+    A stage run from within another stage is counted in the outer one only,
+    so the stages add up to no more than the merge. With trace set, every
+    stage and Device Proxy is also kept as a trace event (see trace_event).
+    """
+    def __init__(self, trace=False):
+        self.stages = {}
+        self.active = None
+        self.dps = {}
+        self.dp = None
+        self.dp_start = None
+        self.events = [] if trace else None
+
+    def record(self, name, wall, cpu, rss_before, rss_after, start=None):
+        entry = self.stages.setdefault(name, {'calls': 0, 'wall': 0.0,
+                                              'cpu': 0.0, 'peak_rss_kb': 0,
+                                              'rss_growth_kb': 0})
+        entry['calls'] += 1
+        entry['wall'] += wall
+        entry['cpu'] += cpu
+        entry['peak_rss_kb'] = max(entry['peak_rss_kb'], rss_after)
+        entry['rss_growth_kb'] += rss_after - rss_before
+        if self.dp is not None:
+            dp_stages = self.dps[self.dp]['stages']
+            dp_stages[name] = dp_stages.get(name, 0.0) + wall
+        if self.events is not None and start is not None:
+            args = {'cpu': cpu, 'rss_growth_kb': rss_after - rss_before}
+            if self.dp is not None:
+                args['dp'] = self.dp
+            self.events.append(trace_event(name, 'stage', start, wall,
+                                           args=args))
+
+    def dp_switch(self, dp):
+        # Ends the costs of the current Device Proxy and starts the ones of
+        # dp (None when the Device Proxies are done). The memory deltas are
+        # what the DP leaves behind, after its source is released.
+        now = (time.perf_counter(), time.process_time(), peak_rss_kb(),
+               rss_kb(), traced_kb(), time.time())
+        if self.dp is not None:
+            entry = self.dps[self.dp]
+            if self.events is not None:
+                self.events.append(trace_event(
+                    os.path.basename(self.dp), 'dp', self.dp_start[5],
+                    now[0] - self.dp_start[0],
+                    args={'path': self.dp,
+                          'rss_delta_kb': now[3] - self.dp_start[3]}))
+            entry['wall'] += now[0] - self.dp_start[0]
+            entry['cpu'] += now[1] - self.dp_start[1]
+            entry['rss_growth_kb'] += now[2] - self.dp_start[2]
+            entry['rss_delta_kb'] += now[3] - self.dp_start[3]
+            entry['traced_delta_kb'] += now[4] - self.dp_start[4]
+            logging.info('%s: %.3f s, peak RSS %+d kB, RSS %+d kB, traced '
+                         '%+d kB', self.dp, now[0] - self.dp_start[0],
+                         now[2] - self.dp_start[2], now[3] - self.dp_start[3],
+                         now[4] - self.dp_start[4])
+        if dp is not None:
+            self.dps.setdefault(dp, {'iterations': 0, 'wall': 0.0,
+                                     'cpu': 0.0, 'rss_growth_kb': 0,
+                                     'rss_delta_kb': 0, 'traced_delta_kb': 0,
+                                     'stages': {}})
+            self.dps[dp]['iterations'] += 1
+        self.dp = dp
+        self.dp_start = now
+
+    def report(self) -> Dict[str, dict]:
+        return {name: dict(entry) for name, entry in self.stages.items()}
+
+    def dp_report(self) -> Dict[str, dict]:
+        return {dp: dict(entry, stages=dict(entry['stages']))
+                for dp, entry in self.dps.items()}
+
+
+STAGE_TIMER: Optional[StageTimer] = None
+
+
+class stage:
+    """
+    Context manager measuring the block as the stage name.
+    """
+    __slots__ = ('name', 'timer', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.timer = None
+
+    def __enter__(self):
+        timer = STAGE_TIMER
+        if timer is not None and timer.active is None:
+            timer.active = self.name
+            self.timer = timer
+            self.start = (time.perf_counter(), time.process_time(),
+                          peak_rss_kb(), time.time())
+        return self
+
+    def __exit__(self, *exc):
+        timer = self.timer
+        if timer is not None:
+            wall, cpu, rss, start = self.start
+            timer.record(self.name, time.perf_counter() - wall,
+                         time.process_time() - cpu, rss, peak_rss_kb(),
+                         start)
+            timer.active = None
+            self.timer = None
+        return False
+
+
+def trace_event(name, cat, start, duration, pid=None, args=None) -> dict:
+    """
+    Returns a complete ('X') event of the Chrome trace event format, as
+    Perfetto and chrome://tracing open it.
+
+    Args:
+        name (str): The span's name.
+        cat (str): The span's category (stage, dp, worker...).
+        start (float): The start as time.time(), comparable between the
+            processes of a run.
+        duration (float): The duration in seconds.
+        pid (int): The process the span ran in, default this one.
+        args (dict): Extra values shown with the span.
+    """
+    return {'name': name, 'cat': cat, 'ph': 'X',
+            'ts': int(start * 1e6), 'dur': int(duration * 1e6),
+            'pid': os.getpid() if pid is None else pid, 'tid': 0,
+            'args': args or {}}
+
+
+def trace_process_name(pid, name) -> dict:
+    # The metadata event naming a process in the trace viewer
+    return {'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+            'args': {'name': name}}
+
+
+def trace_save(path: str, events: List[dict]) -> None:
+    # Saves the events as a trace file for Perfetto or chrome://tracing
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    logging.info('Saved trace %s with %d events', path, len(events))
+
+
+def stage_dp(dp):
+    # Marks the start of a Device Proxy iteration of a merger's main, None
+    # after the last one. The DP's stages and total costs are reported apart.
+    timer = STAGE_TIMER
+    if timer is not None:
+        timer.dp_switch(dp)
+
+
+def timed_stage(name):
+    # Decorator measuring every call of the function as the stage name
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
 # Utility functions
 #
 
@@ -63,28 +274,98 @@ def removeprefix(string: str, prefix: str) -> str:
     raise TypeError  # string must be a str
 
 
-def xml_elem_str(elem: ET.Element, *, indent_with:str ="    ") -> str:
+def substring_matcher(names):
+    """
+    Returns a predicate telling if a text contains one of the names.
+
+    The same as any(name in text for name in names), but the text's
+    substrings are looked up in a set, so the cost per text doesn't grow
+    with the number of names.
+
+    Args:
+        names (Iterable[str]): The names to look for.
+
+    Returns:
+        Callable[[str], bool]: The predicate.
+    """
+    names = set(names)
+    lengths = sorted(set(map(len, names)))
+
+    def matches(text):
+        for length in lengths:
+            if length > len(text):
+                break
+            for start in range(len(text) - length + 1):
+                if text[start:start + length] in names:
+                    return True
+        return False
+    return matches
+
+
+def _xml_local_name(name: str) -> str:
+    # Tag or attribute name without its {namespace}
+    return name[name.rfind('}') + 1:]
+
+
+def _xml_elem_start(elem: ET.Element, top: bool = False) -> str:
+    # Start tag content (name and attributes) of elem
+    start = _xml_local_name(elem.tag)
+    if top and elem.tag.startswith('{'):
+        start += ' xmlns=' + quoteattr(elem.tag[1:elem.tag.find('}')])
+    for name, value in elem.attrib.items():
+        start += ' %s=%s' % (_xml_local_name(name), quoteattr(value))
+    return start
+
+
+def _xml_elem_lines(elem: ET.Element, indent: str, indent_with: str,
+                    lines: List[str], top: bool = False) -> None:
+    # Appends the indented lines of elem (and its children) to lines
+    tag = _xml_local_name(elem.tag)
+    text = elem.text.strip() if elem.text else ''
+    if len(elem) == 0:
+        if text:
+            lines.append('%s<%s>%s</%s>' % (indent, _xml_elem_start(elem, top),
+                                            escape(text), tag))
+        else:
+            lines.append('%s<%s/>' % (indent, _xml_elem_start(elem, top)))
+        return
+    lines.append('%s<%s>' % (indent, _xml_elem_start(elem, top)))
+    if text:
+        lines.append(indent + indent_with + escape(text))
+    for child in elem:
+        _xml_elem_lines(child, indent + indent_with, indent_with, lines)
+    lines.append('%s</%s>' % (indent, tag))
+
+
+def xml_elem_str(elem: ET.Element, *, indent_with: str = "    ",
+                 head_only: bool = False) -> str:
     """
     Returns a pretty formated string representation of the specified element.
 
+    The lines are written directly from the tree (the element is not changed),
+    so the cost is proportional to what is printed.
+
     Args:
         elem (ET.Element): The element to stringify.
         indent_with (str, optional): Indent nested tags with this. Defaults to "    ".
+        head_only (bool, optional): Only return the start tag and the
+            SHORT-NAME (if any), e.g. for log messages. Defaults to False.
     Returns:
         str: The string representation of the specified element.
     """
     if elem is None:
         return ""
     if isinstance(elem, ET.Element):
-        raw_elem_str = ET.tostring(elem,
-                                   encoding='utf-8',
-                                   short_empty_elements=False)
-        minidom_elem = minidom.parseString(raw_elem_str)
-        pretty_elem_str = minidom_elem.toprettyxml(indent=indent_with)
-        # Remove (potential) empty lines and the initial
-        # <?xml version="1.0" ?> added by minidom
-        return "\n".join([s for s in pretty_elem_str.split("\n")
-                          if s.strip()][1:])
+        if head_only:
+            head = '<%s>' % _xml_elem_start(elem, True)
+            short_name = elem.find(elem.tag[:elem.tag.rfind('}') + 1] + 'SHORT-NAME')
+            if short_name is not None:
+                head += '\n%s<SHORT-NAME>%s</SHORT-NAME>' % (
+                    indent_with, escape(short_name.text or ''))
+            return head
+        lines = []
+        _xml_elem_lines(elem, '', indent_with, lines, True)
+        return "\n".join(lines)
 
     raise TypeError
 
@@ -104,13 +385,17 @@ def xml_get_namespace(elem: ET.Element) -> str:
     return ''
 
 
-def xml_elements_equal(e1: ET.Element, e2: ET.Element) -> bool:
+def xml_elements_equal(e1: ET.Element, e2: ET.Element,
+                       hasher: Optional['XmlSubtreeHasher'] = None) -> bool:
     """
     Returns True if the two input elements contains the same content (i.e are equal).
 
     Args:
         e1 (ET.Element): The first XML element.
         e2 (ET.Element): The second XML element.
+        hasher (XmlSubtreeHasher, optional): Compare the cached subtree hashes
+            instead of walking both subtrees. Note the hashes ignore tails
+            and the hasher's ignored attributes.
 
     Returns:
         bool: True if the elements are considered equal, False otherwise.
@@ -118,6 +403,8 @@ def xml_elements_equal(e1: ET.Element, e2: ET.Element) -> bool:
     if e1 is None and e2 is None:
         return True
     if isinstance(e1, ET.Element) and isinstance(e2, ET.Element):
+        if hasher is not None:
+            return hasher.equal(e1, e2)
         if e1.tag != e2.tag:
             return False
         if e1.text is not None and e2.text is not None:
@@ -133,6 +420,71 @@ def xml_elements_equal(e1: ET.Element, e2: ET.Element) -> bool:
     return False
 
 
+class XmlSubtreeHasher:
+    """
+    Merkle-style structural hashes of subtrees, cached per element.
+
+    The hash of an element covers its tag, stripped text, attributes (except
+    the ignored ones) and the hashes of its children in order. Tails
+    (formatting) are not part of it.
+
+    A hash is computed once per element and reused as is, so comparing two
+    hashed subtrees costs O(1). The cache is not checked against the tree:
+    an element edited in place must be invalidated, which drops its hash and
+    the hashes of the ancestors it was hashed under. The util helpers that
+    edit a tree (xml_elem_append, xml_elem_child_remove_all,
+    xml_ref_transform_all...) do so, other edits must call invalidate
+    themselves. The cache of SUBTREE_HASHER is cleared when a source document
+    is released (see arxml_release), so edits the mergers make directly
+    don't outlive the merge of one source.
+    """
+    __slots__ = ('ignore', '_cache', '_parents')
+
+    def __init__(self, ignore: Tuple[str, ...] = ()):
+        self.ignore = frozenset(ignore)
+        self._cache = weakref.WeakKeyDictionary()
+        # The element a child was last hashed under, held weakly so a moved
+        # element doesn't keep its old tree alive
+        self._parents = weakref.WeakKeyDictionary()
+
+    def digest(self, elem: ET.Element) -> bytes:
+        cached = self._cache.get(elem)
+        if cached is not None:
+            return cached
+        h = blake2b(digest_size=16)
+        h.update(elem.tag.encode())
+        for name in sorted(elem.attrib):
+            if name not in self.ignore:
+                h.update(('\0%s=%s' % (name, elem.attrib[name])).encode())
+        h.update(('\1%s\1' % (elem.text.strip() if elem.text else '')).encode())
+        parent = weakref.ref(elem)
+        for child in elem:
+            h.update(self.digest(child))
+            self._parents[child] = parent
+        digest = h.digest()
+        self._cache[elem] = digest
+        return digest
+
+    def equal(self, e1: ET.Element, e2: ET.Element) -> bool:
+        return self.digest(e1) == self.digest(e2)
+
+    def invalidate(self, elem: ET.Element) -> None:
+        # An ancestor can only be hashed if elem is, so stop at the first
+        # element without a hash
+        while elem is not None and self._cache.pop(elem, None) is not None:
+            parent = self._parents.get(elem)
+            elem = parent() if parent is not None else None
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._parents.clear()
+
+
+# The subtree hashes xml_elem_extend classifies the clashes with, shared by
+# the documents of a merge until the next source is released
+SUBTREE_HASHER = XmlSubtreeHasher(ignore=('UUID',))
+
+
 def xml_get_child_value_by_tag(elem: ET.Element, tag: str) -> Optional[str]:
     """
     Get the value of a direct child element from its tag.
@@ -172,6 +524,7 @@ def xml_set_child_value_by_tag(elem: ET.Element, tag: str, value: str) -> None:
     for child in list(elem):
         if child.tag == f"{{{xml_get_namespace(elem)}}}{tag}":
             child.text = value
+            SUBTREE_HASHER.invalidate(child)
             assert value is not None
 
 
@@ -260,8 +613,10 @@ def assert_elem_tag(elem: ET.Element, tag: Union[Tuple, str]) -> None:
     """
     if isinstance(tag, str):
         tag = (tag, )
-    assert elem.tag in (f"{{{xml_get_namespace(elem)}}}{t}" for t in tag),\
-        "Expected tags differ!"
+    # Raised rather than asserted so the check survives python -O
+    prefix = elem.tag[:elem.tag.rfind('}') + 1]
+    if not any(elem.tag == prefix + t for t in tag):
+        raise XmlShapeError("Expected tags differ!")
     
 
 def is_elem_tag(elem: ET.Element, tag: Union[Tuple, str]) -> bool:
@@ -293,6 +648,187 @@ def get_elem_tag_without_schema(elem: ET.Element) -> str:
     return elem.tag[elem.tag.rfind('}') + 1:]
 
 
+# Element shapes
+#
+# The positional layout of the elements the mergers index into (frame[5],
+# trig[3], ...) is declared once as an XmlShape. A shape is compiled per
+# namespace to sets of fully qualified tags, so checking an element is a few
+# set lookups, and XmlShape.get returns the checked children in declaration
+# order for the merge code to use. Errors are raised, not asserted, so the
+# checks still run under python -O.
+
+
+class XmlShapeError(AssertionError):
+    """Raised when an element does not have the expected shape."""
+
+
+class XmlShape:
+    """
+    The expected positional layout of an element.
+
+    Args:
+        tag (str): The element's tag (without namespace).
+        fields (Tuple): (index, tag or tuple of tags[, optional]) per checked
+            child. An optional child may be missing but must match if there.
+        max_children (int, optional): The maximum number of children.
+    """
+    __slots__ = ('tag', 'fields', 'max_children', '_compiled')
+
+    def __init__(self, tag: str, fields: Tuple, max_children: Optional[int] = None):
+        self.tag = tag
+        self.fields = tuple((f[0], (f[1], ) if isinstance(f[1], str) else f[1],
+                             len(f) > 2 and f[2]) for f in fields)
+        self.max_children = max_children
+        self._compiled = {}
+
+    def compile(self, prefix: str) -> tuple:
+        """
+        Returns the shape compiled for a namespace prefix ('{ns}').
+        """
+        compiled = self._compiled.get(prefix)
+        if compiled is None:
+            fields = tuple((index, frozenset(prefix + t for t in tags), optional)
+                           for index, tags, optional in self.fields)
+            required = [index + 1 for index, _, optional in self.fields
+                        if not optional]
+            compiled = (prefix + self.tag, fields, max(required, default=0))
+            self._compiled[prefix] = compiled
+        return compiled
+
+    def error(self, elem: ET.Element) -> Optional[str]:
+        """
+        Returns why elem doesn't match the shape, or None if it does.
+        """
+        prefix = elem.tag[:elem.tag.rfind('}') + 1]
+        tag, fields, min_children = self.compile(prefix)
+        if elem.tag != tag:
+            return "Expected %s, got %s" % (self.tag, elem.tag[len(prefix):])
+        count = len(elem)
+        if count < min_children or \
+                (self.max_children is not None and count > self.max_children):
+            return "Unhandled %s detected (%d children)" % (self.tag, count)
+        for (index, tags, _), (_, local_tags, _) in zip(fields, self.fields):
+            if index < count and elem[index].tag not in tags:
+                return "Expected %s at %s[%d], got %s" % \
+                    ('/'.join(local_tags), self.tag, index,
+                     elem[index].tag[len(prefix):])
+        return None
+
+    def check(self, elem: ET.Element) -> None:
+        """
+        Raises XmlShapeError if elem doesn't match the shape.
+        """
+        error = self.error(elem)
+        if error is not None:
+            raise XmlShapeError("%s!" % error)
+
+    def get(self, elem: ET.Element) -> tuple:
+        """
+        Checks elem and returns its children in the order of the fields
+        (None for a missing optional child).
+        """
+        self.check(elem)
+        return self.fields_get(elem)
+
+    def fields_get(self, elem: ET.Element) -> tuple:
+        """
+        Returns the children of elem in the order of the fields, like get,
+        without checking elem. Only for elements already checked, e.g. by
+        xml_shapes_check.
+        """
+        count = len(elem)
+        return tuple(elem[index] if index < count else None
+                     for index, _, _ in self.fields)
+
+
+AR_PACKAGE_SHAPE = XmlShape('AR-PACKAGE',
+                            ((0, 'SHORT-NAME'),
+                             (1, 'ELEMENTS'),
+                             (2, 'AR-PACKAGES', True)),
+                            max_children=3)
+CAN_FRAME_TRIGGERING_SHAPE = XmlShape('CAN-FRAME-TRIGGERING',
+                                      ((0, 'SHORT-NAME'),
+                                       (2, 'FRAME-REF'),
+                                       (4, 'CAN-ADDRESSING-MODE'),
+                                       (5, ('CAN-FRAME-RX-BEHAVIOR',
+                                            'CAN-FRAME-TX-BEHAVIOR')),
+                                       (6, 'IDENTIFIER')))
+PDU_TRIGGERING_SHAPE = XmlShape('PDU-TRIGGERING',
+                                ((0, 'SHORT-NAME'),
+                                 (1, 'I-PDU-PORT-REFS'),
+                                 (3, 'I-SIGNAL-TRIGGERINGS', True)))
+PDU_TO_FRAME_MAPPING_SHAPE = XmlShape('PDU-TO-FRAME-MAPPING',
+                                      ((0, 'SHORT-NAME'),
+                                       (2, 'PDU-REF')))
+I_SIGNAL_TO_I_PDU_MAPPING_SHAPE = XmlShape('I-SIGNAL-TO-I-PDU-MAPPING',
+                                           ((0, 'SHORT-NAME'),
+                                            (2, 'PACKING-BYTE-ORDER'),
+                                            (3, 'START-POSITION')))
+
+# The shapes every element of a Device Proxy .arxml is expected to have
+# (AR-PACKAGEs vary, only the merged ones are checked)
+XML_DOCUMENT_SHAPES = (CAN_FRAME_TRIGGERING_SHAPE,
+                       PDU_TRIGGERING_SHAPE,
+                       PDU_TO_FRAME_MAPPING_SHAPE,
+                       I_SIGNAL_TO_I_PDU_MAPPING_SHAPE)
+
+# The shapes the mergers read the CAN frame information of a Device Proxy
+# with (see their fetch_can_frame_triggering_info)
+XML_FRAME_INFO_SHAPES = (CAN_FRAME_TRIGGERING_SHAPE,
+                         PDU_TO_FRAME_MAPPING_SHAPE,
+                         I_SIGNAL_TO_I_PDU_MAPPING_SHAPE)
+
+
+def xml_shapes_validate(root: ET.Element, shapes: Tuple = XML_DOCUMENT_SHAPES,
+                        samples: int = 10) -> List[str]:
+    """
+    Checks every element of a document against the shapes in one pass.
+
+    Args:
+        root (ET.Element): The document root.
+        shapes (Tuple, optional): The XmlShapes to check.
+        samples (int, optional): How many of the errors to log.
+
+    Returns:
+        List[str]: The errors, with the SHORT-NAME of the element.
+    """
+    prefix = root.tag[:root.tag.rfind('}') + 1]
+    by_tag = {shape.compile(prefix)[0]: shape for shape in shapes}
+    errors = []
+    for elem in root.iter():
+        shape = by_tag.get(elem.tag)
+        if shape is None:
+            continue
+        error = shape.error(elem)
+        if error is not None:
+            name = elem[0].text if len(elem) else None
+            errors.append("%s:%s: %s" % (shape.tag, name, error))
+    for error in errors[:samples]:
+        logging.warning(error)
+    if len(errors) > samples:
+        logging.warning("... and %d more shape errors", len(errors) - samples)
+    return errors
+
+
+def xml_shapes_check(arxml, shapes: Tuple = XML_DOCUMENT_SHAPES) -> None:
+    """
+    Checks every element of a document against the shapes in one pass and
+    raises if any doesn't match, so the elements can then be read with
+    XmlShape.fields_get.
+
+    Args:
+        arxml: The document (e.g. ArxmlFile).
+        shapes (Tuple, optional): The XmlShapes to check.
+
+    Raises:
+        XmlShapeError: Some elements don't match, they are logged.
+    """
+    errors = xml_shapes_validate(arxml.xml.getroot(), shapes)
+    if errors:
+        raise XmlShapeError("%d elements of %s have an unexpected shape!" %
+                            (len(errors), arxml.filename))
+
+
 def xml_elem_namespace(elem: ET.Element) -> str:
     """
     Returns the namespace of a specified tag.
@@ -415,17 +951,7 @@ def xml_ar_package_validate(elem: ET.Element) -> bool:
     Returns:
         bool: True if the package has an AR-PACKAGES sub-container, False otherwise.
     """
-    assert_elem_tag(elem, 'AR-PACKAGE')
-    assert_elem_tag(elem[0], 'SHORT-NAME')
-    assert_elem_tag(elem[1], 'ELEMENTS')
-
-    elems = len(elem)
-    if elems > 2:
-        assert elems == 3, "Unhandled AR-PACKAGE "\
-                           "detected (children > 3)!"
-        assert_elem_tag(elem[2], 'AR-PACKAGES')
-        return True
-    return False
+    return AR_PACKAGE_SHAPE.get(elem)[2] is not None
 
 
 def xml_ref_transform_all(refs: List[ET.Element], src_path, dst_path) -> None:
@@ -445,12 +971,77 @@ def xml_ref_transform_all(refs: List[ET.Element], src_path, dst_path) -> None:
                                      "subpath %s" % (ref.text, src_path)
         if ref.text:
             ref.text = ref.text.replace(src_path, dst_path)
+            SUBTREE_HASHER.invalidate(ref)
 
 
 def xml_elem_child_remove_all(elem, children):
-    # Remove elem elements
-    for child in children:
-        elem.remove(child)
+    # Remove elem elements, in one pass over elem (removing them one by one
+    # is quadratic)
+    removed = set(map(id, children))
+    if not removed:
+        return
+    kept = [child for child in elem if id(child) not in removed]
+    if len(elem) - len(kept) != len(removed):
+        raise ValueError("Element.remove(x): x not in list")
+    elem[:] = kept
+    SUBTREE_HASHER.invalidate(elem)
+
+
+def xml_empty_containers_prune(arxml, tags) -> int:
+    """
+    Removes the empty elements with one of tags from a document, e.g. the
+    I-SIGNAL-TRIGGERINGS left without triggerings. A parent that becomes
+    empty and has one of tags is removed as well.
+
+    The candidates come from ElementTree's tag filtered iteration and their
+    parents from arxml.parents (a full parent scan is only done if the map
+    is stale). Every parent's children are rebuilt once, so the removal is
+    linear in the candidates.
+
+    Args:
+        arxml: The document (e.g. ArxmlFile), modified in place.
+        tags (Iterable): The container tags to prune.
+
+    Returns:
+        int: The number of removed elements.
+    """
+    root = arxml.xml.getroot()
+    ns = xml_get_namespace(root)
+    tags = {f"{{{ns}}}{tag}" for tag in tags}
+    empty = [elem for tag in tags for elem in root.iter(tag) if len(elem) == 0]
+    scanned = None
+    removed = 0
+    while empty:
+        groups = {}
+        for elem in empty:
+            parent = arxml.parents.get(elem)
+            if parent is None and elem is not root:
+                # Added without a parent record, see xml_elem_append
+                if scanned is None:
+                    scanned = {id(child): parent for parent in root.iter()
+                               for child in parent}
+                parent = scanned.get(id(elem))
+            if parent is not None:
+                groups.setdefault(id(parent), (parent, []))[1].append(elem)
+        touched = []
+        for parent, children in groups.values():
+            try:
+                xml_elem_child_remove_all(parent, children)
+                touched.append(parent)
+            except ValueError:
+                # The map has an old parent, the elements moved since
+                if scanned is None:
+                    scanned = {id(child): parent for parent in root.iter()
+                               for child in parent}
+                for child in children:
+                    actual = scanned[id(child)]
+                    actual.remove(child)
+                    SUBTREE_HASHER.invalidate(actual)
+                    touched.append(actual)
+            removed += len(children)
+        empty = [parent for parent in {id(p): p for p in touched}.values()
+                 if parent.tag in tags and len(parent) == 0]
+    return removed
 
 
 def xml_elem_get_abs_path(elem, arxml):
@@ -472,22 +1063,46 @@ def xml_elem_get_abs_path(elem, arxml):
     return '/' + '/'.join(path)
 
 
+def xml_elem_paths_under(root, elems):
+    # The SHORT-NAME paths of elems below root (their absolute paths if root
+    # is the document root), found in one walk without a parent map
+    wanted = set(elems)
+    paths = {}
+
+    def walk(elem, path):
+        if len(elem) and is_elem_tag(elem[0], 'SHORT-NAME'):
+            path = path + '/' + elem[0].text
+        if elem in wanted:
+            paths[elem] = path
+        for child in elem:
+            walk(child, path)
+
+    walk(root, '')
+    return paths
+
+
+# Containers whose children xml_elem_append appends instead of themselves
+_XML_ELEM_LISTS_ = ("ELEMENTS", "SOCKET-ADDRESSS", "DATA-TRANSFORMATIONS",
+                    "TRANSFORMATION-TECHNOLOGYS", "CONNECTION-BUNDLES")
+
+
+def xml_elem_is_list(child):
+    # True if xml_elem_append appends the children of child, not child
+    return isinstance(child, list) or is_elem_tag(child, _XML_ELEM_LISTS_)
+
+
 def xml_elem_append(elem, child, parents):
     # Append child to elem (child can be a list)
     # Updates parent list (needed for path retrieval)
 
-    if isinstance(child, list) \
-      or is_elem_tag(child, "ELEMENTS")\
-      or is_elem_tag(child, "SOCKET-ADDRESSS") \
-      or is_elem_tag(child, "DATA-TRANSFORMATIONS") \
-      or is_elem_tag(child, "TRANSFORMATION-TECHNOLOGYS") \
-      or is_elem_tag(child, "CONNECTION-BUNDLES"):
+    if xml_elem_is_list(child):
         for el in child:
             elem.append(el)
             parents[el] = elem
     else:
         elem.append(child)
         parents[child] = elem
+    SUBTREE_HASHER.invalidate(elem)
 
 
 def xml_elem_append_at_index(elem, child, index, parents):
@@ -506,6 +1121,7 @@ def xml_elem_append_at_index(elem, child, index, parents):
 
     elem.insert(index, child)
     parents[child] = elem
+    SUBTREE_HASHER.invalidate(elem)
 
 
 def xml_elem_add_ar_packages(elem, parents):
@@ -513,6 +1129,72 @@ def xml_elem_add_ar_packages(elem, parents):
     child = autosar.base.create_element('AR-PACKAGES')
     elem.append(child.xmlref)
     parents[child] = elem
+    SUBTREE_HASHER.invalidate(elem)
+
+
+# Subtree ownership
+#
+# Elements taken from a source document are copied by default so the source
+# stays usable. A source marked as consumed is not used after the current
+# merge step, so its elements are moved into the destination as they are.
+
+def arxml_consume(arxml, consumed=True):
+    # Marks the source arxml as consumed (or not)
+    arxml.consumed = consumed
+
+
+def xml_elems_take(elems, arxml) -> List[ET.Element]:
+    """
+    Returns the elements of a source arxml ready to be added to another tree.
+
+    The elements themselves are returned if the arxml is consumed, deep copies
+    otherwise. A copy gets the parent of its original in arxml.parents, so its
+    source path (e.g. for the path map of xml_elem_extend) still resolves.
+
+    Args:
+        elems (List[ET.Element]): The source elements.
+        arxml: The source arxml the elements belong to.
+
+    Returns:
+        List[ET.Element]: The elements to add.
+    """
+    if getattr(arxml, 'consumed', False):
+        return list(elems)
+    copies = []
+    for el in elems:
+        el_copy = copy.deepcopy(el)
+        parent = arxml.parents.get(el)
+        if parent is not None:
+            arxml.parents[el_copy] = parent
+        copies.append(el_copy)
+    return copies
+
+
+def xml_elem_shared_clone(elem: ET.Element) -> ET.Element:
+    """
+    Returns a clone of elem that shares its plain leaves with elem.
+
+    For subtrees added to several places of a document (e.g. the ports of
+    ECU-COMM-PORT-INSTANCES, added to every Ethernet connector). Elements
+    with children or attributes (the containers and the UUID-bearing ports)
+    are cloned, so every clone gets its own UUIDs and can be extended. Leaves
+    without attributes (SHORT-NAME, COMMUNICATION-DIRECTION...) are shared
+    between elem and all its clones: they must be replaced, not edited in
+    place, and their parent in a parent map is the one of elem.
+
+    Args:
+        elem (ET.Element): The element to clone.
+
+    Returns:
+        ET.Element: The clone.
+    """
+    clone = elem.makeelement(elem.tag, dict(elem.attrib))
+    clone.text = elem.text
+    clone.tail = elem.tail
+    clone.extend(child if len(child) == 0 and not child.attrib
+                 else xml_elem_shared_clone(child)
+                 for child in elem)
+    return clone
 
 
 def xml_ecu_sys_name_get(arxml):
@@ -529,16 +1211,88 @@ def xml_ecu_sys_name_get(arxml):
     return ecu_sys[1][0][0].text
 
 
+# Logging
+#
+# The mergers log through a queue (see logging_setup): a listener thread
+# formats and writes the records, so a merge doesn't wait on the console.
+# Messages that are expensive to build are guarded by the logger level and
+# long name lists are shortened with names_summary.
+
+# The names logged by names_summary at most
+_LOG_NAMES_MAX_ = 10
+LOG_LISTENER = None
+
+
+def logging_setup(level=logging.INFO, stream=None):
+    """
+    Sets up logging like logging.basicConfig(stream=stream, level=level),
+    but the root logger only queues the records and a QueueListener thread
+    writes them to stream (default sys.stdout). Like basicConfig, does
+    nothing if the root logger has handlers already.
+
+    The queue is flushed at exit, see logging_stop.
+
+    Returns:
+        logging.handlers.QueueListener: The started listener, None if
+        logging was set up already.
+    """
+    global LOG_LISTENER
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+    handler = logging.StreamHandler(sys.stdout if stream is None else stream)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    records = queue.SimpleQueue()
+    LOG_LISTENER = logging.handlers.QueueListener(records, handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(level)
+    LOG_LISTENER.start()
+    atexit.register(logging_stop)
+    return LOG_LISTENER
+
+
+def logging_stop():
+    # Writes the queued records and stops the listener thread. The records
+    # logged afterwards are written directly.
+    global LOG_LISTENER
+    if LOG_LISTENER is None:
+        return
+    LOG_LISTENER.stop()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, logging.handlers.QueueHandler) \
+                and handler.queue is LOG_LISTENER.queue:
+            root.removeHandler(handler)
+            for target in LOG_LISTENER.handlers:
+                root.addHandler(target)
+    LOG_LISTENER = None
+
+
+def names_summary(names, limit: int = _LOG_NAMES_MAX_) -> str:
+    """
+    Returns the first limit names comma separated and the count of the rest,
+    e.g. "a, b, c ... and 12 more".
+    """
+    names = list(names)
+    if len(names) <= limit:
+        return ', '.join(map(str, names))
+    return '%s ... and %d more' % (', '.join(map(str, names[:limit])),
+                                   len(names) - limit)
+
+
 # Error handling
 ELEMENTS_NAME_CLASH: List[bool] = []
 MISSING_SRC_PACKAGE: List[bool] = []
+# DP name -> pdu_frame_lengths_join result, for the DPs with issues
+PDU_LENGTH_ISSUES: Dict[str, dict] = {}
 NAME_CLASH_IS_ERROR = ()
 NAME_CLASH_IS_ALLOWED = None
 
 
 def xml_elem_extend_name_clashed():
     if any(ELEMENTS_NAME_CLASH):
-        logging.warning("Elements Clashed: %s",ELEMENTS_NAME_CLASH)
+        logging.warning("Elements Clashed: %d name clashes",
+                        ELEMENTS_NAME_CLASH.count(True))
     return any(ELEMENTS_NAME_CLASH)
 
 
@@ -559,7 +1313,9 @@ def xml_elem_extend_clashed_ports(el, prefixed_el, dst_arxml):
     dst_el = xml_elem_type_find(dst_sw_comp_type, get_elem_tag_without_schema(el), el[0].text)
     #saving dst_el path before removing it:
     dst_el_path = xml_elem_get_abs_path(dst_el, dst_arxml)
-    xml_elem_find(dst_sw_comp_type, 'PORTS').remove(dst_el)
+    dst_ports = xml_elem_find(dst_sw_comp_type, 'PORTS')
+    dst_ports.remove(dst_el)
+    SUBTREE_HASHER.invalidate(dst_ports)
 
     #keeping the old unprefixed port interface reference (we will use the none prefixed prot interfaces)
     xml_set_child_value_by_tag(prefixed_el, 'PROVIDED-INTERFACE-TREF', xml_get_child_value_by_tag(el, 'PROVIDED-INTERFACE-TREF'))
@@ -605,6 +1361,14 @@ def xml_elem_extend(
     - dst_name: Function to extract the name of a destination element.
     - graceful: If True, handles name clashes by keeping unique elements; otherwise, logs an error.
 
+    A source element with the same name and content (apart from its UUID) as
+    a destination element is already present: it is skipped and not counted
+    as a clash. Only differing elements with the same name are conflicts.
+
+    A single element as src_elems (see xml_elem_is_list) is added as a whole:
+    its children's names are checked for conflicts, but it is never split
+    into its children. With a conflict and graceful it is skipped.
+
     Example:
     >>> src_elems = [<Element 'A'>, <Element 'B'>]
     >>> dst_elems = [<Element 'B'>, <Element 'C'>]
@@ -612,40 +1376,77 @@ def xml_elem_extend(
     """
     path_map = {}
 
-    for elem in src_elems:
-        name = src_name(elem)
+    # Index the destination names once (the first element wins, as before)
+    dst_by_name = {}
+    for el in dst_elems:
+        dst_by_name.setdefault(dst_name(el), el)
+    src_names = [src_name(el) for el in src_elems]
+    dst_elems_path = None
+
+    for elem, name in zip(src_elems, src_names):
         src_path = xml_elem_get_abs_path(elem, src_arxml)
-        duplicate = next((x for x in dst_elems if name == dst_name(x)), None)
+        duplicate = dst_by_name.get(name)
 
         # Determine the new path for the element in the destination XML
-        dst_path = (
-            xml_elem_get_abs_path(duplicate, dst_arxml)
-            if duplicate else
-            f"{xml_elem_get_abs_path(dst_elems, dst_arxml)}{src_path[src_path.rfind('/'):]}")
+        # (a leaf duplicate such as a ref has no path of its own)
+        if duplicate is not None and len(duplicate):
+            dst_path = xml_elem_get_abs_path(duplicate, dst_arxml)
+        else:
+            if dst_elems_path is None:
+                dst_elems_path = xml_elem_get_abs_path(dst_elems, dst_arxml)
+            dst_path = f"{dst_elems_path}{src_path[src_path.rfind('/'):]}"
 
         path_map[src_path] = dst_path
 
-    # Identify name clashes
-    src_names = {src_name(el) for el in src_elems}
-    dst_names = {dst_name(el) for el in dst_elems}
-    intersection = sorted(src_names & dst_names)
+    # Identify name clashes, and among them the elements that are already
+    # present as they are (same content apart from the UUID)
+    present, intersection = set(), set()
+    for elem, name in zip(src_elems, src_names):
+        duplicate = dst_by_name.get(name)
+        if duplicate is None:
+            continue
+        if SUBTREE_HASHER.equal(elem, duplicate):
+            present.add(name)
+        else:
+            intersection.add(name)
+    # A name is a conflict if any of its source elements differs
+    present -= intersection
+    whole = not xml_elem_is_list(src_elems)
+    if whole:
+        # The parts of a single element can't be skipped
+        present = set()
+    intersection = sorted(intersection)
+
+    if present and logging.getLogger().isEnabledFor(logging.INFO):
+        logging.info("%d elements already present in %s", len(present),
+                     xml_elem_get_abs_path(dst_elems, dst_arxml))
 
     if intersection:
-        src_path = xml_elem_get_abs_path(src_elems[0], src_arxml).rsplit('/', 1)[0]
-        dst_path = xml_elem_get_abs_path(dst_elems, dst_arxml)
-
-        logging.warning("%d name clashes found in %s and %s", len(intersection), src_path, dst_path)
-        logging.warning("Conflicting elements: %s", intersection)
+        if logging.getLogger().isEnabledFor(logging.WARNING):
+            src_path = xml_elem_get_abs_path(src_elems[0], src_arxml).rsplit('/', 1)[0]
+            dst_path = xml_elem_get_abs_path(dst_elems, dst_arxml)
+            logging.warning("%d name clashes found in %s and %s", len(intersection), src_path, dst_path)
+            logging.warning("Conflicting elements: %s", names_summary(intersection))
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("All conflicting elements: %s", ', '.join(intersection))
 
         if graceful:
             # Copy only elements without clashes
-            diff_elems = [el for el in src_elems if src_name(el) not in intersection]
+            clashes = set(intersection)
+            diff_elems = [] if whole else \
+                [el for el, name in zip(src_elems, src_names)
+                 if name not in clashes and name not in present]
             xml_elem_append(dst_elems, diff_elems, dst_arxml.parents)
         else:
             # Log the clash error
             ELEMENTS_NAME_CLASH.append(True)
     else:
-        # No clashes, append all elements
+        # No conflicts, append all elements that are not already present
+        # (src_elems is passed on as is otherwise, xml_elem_append appends
+        # a single element as a whole)
+        if present:
+            src_elems = [el for el, name in zip(src_elems, src_names)
+                         if name not in present]
         xml_elem_append(dst_elems, src_elems, dst_arxml.parents)
 
     return path_map
@@ -666,7 +1467,8 @@ def xml_ar_package_copy(src, dst_parent, src_arxml, dst_arxml, grace_list=()):
         # and append it to the destination AR-PACKAGES
         path = xml_elem_get_abs_path(src, src_arxml)
         dst = xml_ar_package_create(name,
-                                    str(uuid.uuid4()) + path.replace('/', '-'))
+                                    new_uuid(path, 'AR-PACKAGE') +
+                                    path.replace('/', '-'))
         # Add 'AR-PACKAGES'
         if src_have_pkgs:
             xml_elem_add_ar_packages(dst, dst_arxml.parents)
@@ -690,6 +1492,7 @@ def xml_ar_package_copy(src, dst_parent, src_arxml, dst_arxml, grace_list=()):
             xml_ar_package_copy(pkg, dst[2], src_arxml, dst_arxml, grace_list)
 
 
+@timed_stage('root copy')
 def xml_ar_package_root_copy(src_arxml,
                              dst_arxml,
                              root_pkgs,
@@ -712,8 +1515,42 @@ def xml_ar_package_root_copy(src_arxml,
                             grace_list)
 
 
+# UUID generation
+#
+# New UUIDs are random (version 4) by default, so every run gives a different
+# output. With a UUID namespace set (ScriptOptions --uuid_namespace) they are
+# derived (version 5) from the namespace, the element's absolute path and
+# its role instead, and identical inputs give byte-identical outputs.
+
+UUID_NAMESPACE: Optional[uuid.UUID] = None
+
+
+def uuid_namespace_set(name: Optional[str]) -> None:
+    # Enables the deterministic UUIDs derived from name (None disables them)
+    global UUID_NAMESPACE
+    UUID_NAMESPACE = None if name is None else uuid.uuid5(uuid.NAMESPACE_URL, name)
+
 
-def replace_uuid(elem: ET.Element) -> Optional[str]:
+def new_uuid(path: str, role: str = '') -> str:
+    """
+    Returns a new UUID for the element at path.
+
+    Args:
+        path (str): The absolute path of the element (or another name that
+            identifies it in the output).
+        role (str, optional): Tells apart several UUIDs made for the same path.
+
+    Returns:
+        str: A uuid5 of the namespace, role and path in deterministic mode,
+        a random uuid4 otherwise.
+    """
+    if UUID_NAMESPACE is None:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(UUID_NAMESPACE, role + ':' + path))
+
+
+
+def replace_uuid(elem: ET.Element, path: Optional[str] = None) -> Optional[str]:
     """
         Given an Autosar element, replace its UUID with a newly generated one.
         Used to avoid duplicate UUIDs in .arxmls since DaVinci tools complain
@@ -723,6 +1560,9 @@ def replace_uuid(elem: ET.Element) -> Optional[str]:
 
     Args:
         elem: The XML element whose UUID should be replaced.
+        path: The element's absolute path, the seed of its deterministic UUID.
+            Required when a UUID namespace is set, the original UUID can't
+            be the seed since the duplicates share it.
 
     Returns:
         The new UUID as a string if a replacement was made, otherwise None.
@@ -731,46 +1571,107 @@ def replace_uuid(elem: ET.Element) -> Optional[str]:
     original_uuid = elem.get("UUID")
 
     if original_uuid is not None:
-        new_uuid = str(uuid.uuid4())
-        
-        logging.debug(
-            "Replacing UUID of element %s with new UUID %s",
-            xml_elem_str(elem).split('\n', 2)[0:2],
-            new_uuid
-        )
+        assert path is not None or UUID_NAMESPACE is None, \
+            "The path of the element is needed for a deterministic UUID!"
+        replacement = new_uuid(path or '',
+                               'REPLACED-' + get_elem_tag_without_schema(elem))
         
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(
+                "Replacing UUID of element %s with new UUID %s",
+                xml_elem_str(elem, head_only=True),
+                replacement
+            )
+
         # Directly set the new UUID. No need to call attrib.pop.
-        elem.set("UUID", new_uuid)
+        elem.set("UUID", replacement)
         
-        return new_uuid
+        return replacement
     else:
         # This warning is now correctly triggered if the attribute is missing.
         logging.warning(
             "Trying to replace UUID of element %s with no UUID",
-            xml_elem_str(elem).split('\n', 2)[0:2]
+            xml_elem_str(elem, head_only=True)
         )
         # Return None to indicate no action was taken. The original function
         # would have crashed with a NameError here.
         return None
 
 
+def uuid4_bulk(count: int) -> List[str]:
+    """
+    Generates random (version 4) UUIDs from a single os.urandom call.
+
+    Args:
+        count (int): The number of UUIDs to generate.
+
+    Returns:
+        List[str]: The generated UUIDs.
+    """
+    data = os.urandom(16 * count)
+    return [str(uuid.UUID(bytes=data[i:i + 16], version=4))
+            for i in range(0, 16 * count, 16)]
 
-def ensure_unique_uuids(arxml: ET.ElementTree):
+
+@timed_stage('uuid pass')
+def ensure_unique_uuids(arxml) -> Dict[str, List[str]]:
     """
     Ensures every XML element with a UUID attribute has a unique UUID.
-    Updates duplicate UUIDs and writes changes back to the ARXML file.
+
+    The tree is traversed once to collect the duplicates (every occurrence of
+    a UUID after the first one), which then get new UUIDs generated in bulk.
+    The element details are only formatted if debug logging is enabled.
+
+    Args:
+        arxml: The arxml to update.
+
+    Returns:
+        Dict[str, List[str]]: The duplicate report, maps every duplicated
+        UUID to the new UUIDs given to its duplicates.
     """
-    root = arxml.xml.getroot()
-    seen = {}
-    for elem in root.findall('.//*[@UUID]'):
-        # current_uuid = elem.attrib['UUID']
+    seen = set()
+    duplicates = []
+    for elem in arxml.xml.getroot().iter():
         current_uuid = elem.get('UUID')
-        logging.debug("Checking UUID %s", current_uuid)
+        if current_uuid is None:
+            continue
         if current_uuid in seen:
-            new_uuid = replace_uuid(elem)
-            seen[new_uuid] = elem
+            duplicates.append(elem)
         else:
-            seen[current_uuid] = elem
+            seen.add(current_uuid)
+
+    report = {}
+    if not duplicates:
+        return report
+
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+    if UUID_NAMESPACE is None:
+        replacements = uuid4_bulk(len(duplicates))
+    else:
+        # The n-th duplicate of a UUID is named by its path and n
+        counts = {}
+        replacements = []
+        for elem in duplicates:
+            n = counts[elem.get('UUID')] = counts.get(elem.get('UUID'), 0) + 1
+            replacements.append(new_uuid(xml_elem_get_abs_path(elem, arxml),
+                                         'DUPLICATE-%d' % n))
+    for elem, replacement in zip(duplicates, replacements):
+        retry = 0
+        while replacement in seen:
+            retry += 1
+            replacement = new_uuid(elem.get('UUID'), 'RETRY-%d' % retry)
+        seen.add(replacement)
+        old_uuid = elem.get('UUID')
+        elem.set('UUID', replacement)
+        report.setdefault(old_uuid, []).append(replacement)
+        if debug:
+            logging.debug("Replacing UUID of element %s with new UUID %s",
+                          xml_elem_str(elem, head_only=True), replacement)
+
+    logging.info("Replaced %d duplicates of %d UUIDs",
+                 len(duplicates), len(report))
+    return report
+
 
 def add_prefix_to_elements_of_type(parent_elem, prefix, elem_type):
     """
@@ -793,10 +1694,15 @@ def add_prefix_to_elements_of_type(parent_elem, prefix, elem_type):
     """
 
     elements = xml_elem_findall(parent_elem, elem_type)
+    # The paths seed the deterministic UUIDs (see replace_uuid)
+    paths = {}
+    if UUID_NAMESPACE is not None:
+        paths = xml_elem_paths_under(parent_elem, elements)
     for elem in elements:
-        replace_uuid(elem)
+        replace_uuid(elem, paths.get(elem))
         elem_name = xml_elem_find(elem, 'SHORT-NAME')
         elem_name.text = prefix + elem_name.text
+        SUBTREE_HASHER.invalidate(elem_name)
 
 
 def add_prefix_to_refs_of_type(parent_elem,
@@ -845,6 +1751,7 @@ def add_prefix_to_refs_of_type(parent_elem,
                 ref.text = ref.text[:ref.text.rfind('/') + 1] +\
                        prefix +\
                        ref.text[ref.text.rfind('/') + 1:]
+            SUBTREE_HASHER.invalidate(ref)
 
 
 
@@ -882,6 +1789,138 @@ def xml_get_elem_from_path(src_arxml, path):
         elem = found_child
     return elem
 
+
+def xml_path_index(root: ET.Element,
+                   refs: Optional[List[ET.Element]] = None) -> Dict[str, ET.Element]:
+    """
+    Returns the absolute path -> element map of all the named elements under
+    root, built in a single traversal.
+
+    The paths are made of the SHORT-NAMEs (first child) of the ancestors, as
+    in xml_elem_get_abs_path, so the REF values can be looked up directly.
+
+    Args:
+        root (ET.Element): The element to index (usually the AUTOSAR root).
+        refs (List[ET.Element], optional): If given, the *-REF/*-TREF
+            elements with a value are appended to it in the same traversal.
+
+    Returns:
+        Dict[str, ET.Element]: The path index.
+    """
+    short_name_tag = root.tag[:root.tag.rfind('}') + 1] + 'SHORT-NAME'
+    index = {}
+    stack = [(root, '')]
+    while stack:
+        elem, path = stack.pop()
+        if len(elem):
+            first = elem[0]
+            if first.tag == short_name_tag and first.text:
+                path = path + '/' + first.text
+                index.setdefault(path, elem)
+            stack.extend((child, path) for child in reversed(elem))
+        elif refs is not None and elem.text \
+                and elem.tag.endswith(('-REF', '-TREF')):
+            refs.append(elem)
+    return index
+
+
+def xml_refs_by_value(elem: ET.Element, tag: str) -> Dict[str, ET.Element]:
+    """
+    Returns value -> first element for all the tag elements under elem
+    (usually *-REFs), built in a single pass.
+
+    A lookup gives the same element as xml_elem_type_find(elem, tag, value).
+
+    Args:
+        elem (ET.Element): The element to search.
+        tag (str): The tag (without namespace) of the elements to index.
+
+    Returns:
+        Dict[str, ET.Element]: The index.
+    """
+    index = {}
+    for ref in elem.iter(f"{{{xml_get_namespace(elem)}}}{tag}"):
+        if len(ref) == 0 and ref is not elem:
+            index.setdefault(ref.text, ref)
+    return index
+
+
+class XmlRefIndex:
+    """
+    xml_refs_by_value of a document kept across calls, e.g. for a whole
+    merge instead of a document scan per lookup.
+
+    A value that isn't indexed, or whose indexed element has another value
+    by now, rebuilds the index, so the refs added since are found.
+    """
+    __slots__ = ('arxml', 'tag', '_index')
+
+    def __init__(self, arxml, tag: str):
+        self.arxml = arxml
+        self.tag = tag
+        self._index = None
+
+    def get(self, value: str) -> Optional[ET.Element]:
+        if self._index is not None:
+            ref = self._index.get(value)
+            if ref is not None and ref.text == value:
+                return ref
+        self._index = xml_refs_by_value(self.arxml.xml.getroot(), self.tag)
+        return self._index.get(value)
+
+
+def xml_refs_check(arxml, samples: int = 10) -> dict:
+    """
+    Checks that every *-REF/*-TREF of the arxml resolves.
+
+    The path index and the refs are collected in one traversal, then every
+    absolute ref is looked up and its DEST compared to the referenced tag.
+    Relative refs (with a BASE) are not checked.
+
+    Args:
+        arxml: The arxml to check (usually the merged output).
+        samples (int, optional): How many examples to keep per problem.
+
+    Returns:
+        dict: 'refs' (number of checked refs), 'dangling' and 'dest_mismatch'
+        (counts) and 'dangling_samples'/'dest_mismatch_samples' (lists of
+        (ref tag, value[, DEST, referenced tag])).
+    """
+    refs = []
+    index = xml_path_index(arxml.xml.getroot(), refs)
+    report = {'refs': 0,
+              'dangling': 0, 'dangling_samples': [],
+              'dest_mismatch': 0, 'dest_mismatch_samples': []}
+    for ref in refs:
+        value = ref.text.strip()
+        if 'BASE' in ref.attrib or not value.startswith('/'):
+            continue
+        report['refs'] += 1
+        target = index.get(value)
+        if target is None:
+            report['dangling'] += 1
+            if len(report['dangling_samples']) < samples:
+                report['dangling_samples'].append(
+                    (get_elem_tag_without_schema(ref), value))
+            continue
+        dest = ref.get('DEST')
+        target_tag = get_elem_tag_without_schema(target)
+        if dest is not None and dest != target_tag:
+            report['dest_mismatch'] += 1
+            if len(report['dest_mismatch_samples']) < samples:
+                report['dest_mismatch_samples'].append(
+                    (get_elem_tag_without_schema(ref), value, dest, target_tag))
+
+    logging.info("Checked %d references in %s", report['refs'], arxml.filename)
+    if report['dangling']:
+        logging.warning("%d dangling references, e.g. %s",
+                        report['dangling'], report['dangling_samples'])
+    if report['dest_mismatch']:
+        logging.warning("%d references with a wrong DEST, e.g. %s",
+                        report['dest_mismatch'],
+                        report['dest_mismatch_samples'])
+    return report
+
 def get_root_sw_composition_type(arxml):
     """
         Find the COMPOSITION-SW-COMPONENT-TYPE which is associated with the
@@ -940,7 +1979,729 @@ def xml_get_physical_channel(arxml, ch_type, name):
 
 
 ##################################### END ADDITIONS #################################################
-    
+
+
+# Document wrappers
+#
+# A dict of element -> parent costs roughly one hash table entry per XML
+# node on top of ElementTree's own memory. ParentMap keeps the same mapping
+# as flat arrays (elements sorted by id, their ids and the position of their
+# parent) that are only built when a parent is first looked up. Parents set
+# by the merge code (xml_elem_append etc.) go into a small dict that takes
+# precedence.
+
+class ParentMap:
+    """
+    Compact, lazily built element -> parent mapping of an ElementTree.
+
+    Behaves like the dict that autosar.arxml.load keeps as `parents`.
+    """
+    __slots__ = ('_tree', '_nodes', '_ids', '_parent', '_set')
+
+    _DELETED = object()
+
+    def __init__(self, tree):
+        self._tree = tree
+        self._nodes = None
+        self._ids = None
+        self._parent = None
+        self._set = {}
+
+    def _build(self):
+        # _nodes keeps the indexed elements alive, so their ids stay unique
+        nodes = list(self._tree.getroot().iter())
+        nodes.sort(key=id)
+        ids = array('Q', map(id, nodes))
+        parent = array('i', [-1]) * len(nodes)
+        for n, elem in enumerate(nodes):
+            for child in elem:
+                parent[bisect_left(ids, id(child))] = n
+        self._nodes = nodes
+        self._ids = ids
+        self._parent = parent
+
+    def _lookup(self, elem):
+        if self._nodes is None:
+            self._build()
+        k = bisect_left(self._ids, id(elem))
+        if k < len(self._ids) and self._nodes[k] is elem \
+                and self._parent[k] >= 0:
+            return self._nodes[self._parent[k]]
+        return None
+
+    def get(self, elem, default=None):
+        parent = self._set.get(elem)
+        if parent is None:
+            parent = self._lookup(elem)
+        elif parent is self._DELETED:
+            parent = None
+        return default if parent is None else parent
+
+    def __getitem__(self, elem):
+        parent = self.get(elem)
+        if parent is None:
+            raise KeyError(elem)
+        return parent
+
+    def __setitem__(self, elem, parent):
+        self._set[elem] = parent
+
+    def __delitem__(self, elem):
+        if self.get(elem) is None:
+            raise KeyError(elem)
+        self._set[elem] = self._DELETED
+
+    def __contains__(self, elem):
+        return self.get(elem) is not None
+
+    def pop(self, elem, *default):
+        parent = self.get(elem)
+        if parent is None:
+            if default:
+                return default[0]
+            raise KeyError(elem)
+        self._set[elem] = self._DELETED
+        return parent
+
+    def clear(self):
+        # Drops the index and the references it keeps to the tree
+        self._nodes = self._ids = self._parent = None
+        self._set.clear()
+
+
+class ArxmlFile:
+    """
+    Minimal .arxml document: tree, parent map and filename.
+    """
+    __slots__ = ('xml', 'parents', 'filename', 'consumed')
+
+    def __init__(self, tree, filename=""):
+        self.xml = tree
+        self.parents = ParentMap(tree)
+        self.filename = filename
+        self.consumed = False
+
+    @classmethod
+    def load(cls, filename):
+        return cls(ET.parse(filename), filename)
+
+    def save(self, filename=None):
+        if filename is None:
+            filename = self.filename
+        self.xml.write(filename, encoding='UTF-8', xml_declaration=True)
+
+
+def arxml_compact(doc):
+    # Replace the full parent dict of a loaded document with a ParentMap.
+    # autosar.arxml.load has already built the dict at this point, so this
+    # only lowers the memory held while merging, not the peak of the load.
+    doc.parents = ParentMap(doc.xml)
+    return doc
+
+
+# Shared source documents
+#
+# A batch run merges several HI targets in one process. The Device Proxy
+# .arxmls overlap between the targets (SRSR is used by all of them), so each
+# input is parsed only once and every target works on its own view of it.
+
+class ArxmlView:
+    """
+    Lazily copied view of a parsed source .arxml.
+
+    The view refers to the pristine document of an ArxmlSourceCache until
+    the tree or the parent map is accessed. The mergers move elements out of
+    the source documents, so the first access deep copies the whole tree and
+    rebuilds the parent map for this view only, nothing of the tree is shared
+    after that. A source is parsed once, but every target that reads it
+    still holds a full copy. The filename can be changed without touching
+    the shared document.
+    """
+    def __init__(self, doc, filename):
+        self._doc = doc
+        self._own = None
+        self.filename = filename
+
+    def _materialize(self):
+        if self._own is None:
+            own = copy.copy(self._doc)
+            own.xml = ET.ElementTree(copy.deepcopy(self._doc.xml.getroot()))
+            own.parents = ParentMap(own.xml)
+            self._own = own
+        return self._own
+
+    @property
+    def xml(self):
+        return self._materialize().xml
+
+    @property
+    def parents(self):
+        return self._materialize().parents
+
+    def save(self, *args, **kwargs):
+        own = self._materialize()
+        own.filename = self.filename
+        return own.save(*args, **kwargs)
+
+    def release(self):
+        # Drops this view's copy, the shared document stays in the cache
+        if self._own is not None:
+            arxml_release(self._own)
+            self._own = None
+
+
+class ArxmlSourceCache:
+    """
+    Parses every source .arxml once and hands out ArxmlView objects.
+    """
+    def __init__(self):
+        self.docs = {}
+
+    def get(self, path):
+        key = os.path.abspath(path)
+        doc = self.docs.get(key)
+        if doc is None:
+            logging.info('Parsing shared source %s', path)
+            doc = ArxmlFile.load(path)
+            self.docs[key] = doc
+        return doc
+
+    def load(self, path):
+        doc = self.get(path)
+        return ArxmlView(doc, doc.filename)
+
+    def clear(self):
+        self.docs.clear()
+
+
+def arxml_release(arxml) -> None:
+    """
+    Releases a source document once its contribution is merged.
+
+    The parent map is cleared and the tree dropped, so only the elements moved
+    into the destination stay alive, not the whole source tree. The document
+    can't be used afterwards. A view of a shared document releases its own
+    copy only.
+
+    Args:
+        arxml: The source document (see arxml_load).
+    """
+    # The mergers edit the merged elements directly, see XmlSubtreeHasher
+    SUBTREE_HASHER.clear()
+    release = getattr(arxml, 'release', None)
+    if release is not None:
+        release()
+        return
+    parents = getattr(arxml, 'parents', None)
+    if parents is not None:
+        parents.clear()
+    arxml.parents = None
+    arxml.xml = None
+
+
+# Set by the batch merger, None means every load parses the file
+ARXML_SOURCE_CACHE: Optional[ArxmlSourceCache] = None
+
+
+@timed_stage('load')
+def arxml_load(path, shared=True):
+    """
+    Loads an .arxml with a compact parent map, through the shared cache if a
+    batch run is active.
+
+    The sources are only read, so they are parsed as an ArxmlFile and their
+    parent map is built lazily from the tree, no full parent dict is ever
+    made for them. The documents of one merge are saved, they are loaded by
+    autosar.arxml.load and compacted after it (see arxml_compact).
+
+    Args:
+        path (str): The path of the .arxml file.
+        shared (bool): False for documents that are specific to one merge
+            (e.g. the base .arxml), these always get parsed.
+
+    Returns:
+        The loaded document, or a lazily copied view of the shared one.
+    """
+    if not shared:
+        return arxml_compact(autosar.arxml.load(path))
+    if ARXML_SOURCE_CACHE is not None:
+        return ARXML_SOURCE_CACHE.load(path)
+    return ArxmlFile.load(path)
+
+
+def is_xml_tag_present(xml_file_path: str, tag_name: str) -> bool:
+    """
+    Checks if the specified tag is present in an .arxml file.
+
+    Uses the shared document if a batch run is active, so the file is not
+    parsed again just to classify it.
+
+    Args:
+        xml_file_path (str): The path of the .arxml file.
+        tag_name (str): The tag to look for.
+
+    Returns:
+        bool: True if the tag is present, False otherwise.
+    """
+    try:
+        if ARXML_SOURCE_CACHE is not None:
+            root = ARXML_SOURCE_CACHE.get(xml_file_path).xml.getroot()
+        else:
+            root = ET.parse(xml_file_path).getroot()
+        return xml_elem_find(root, tag_name) is not None
+    except ET.ParseError as e:
+        logging.error("Error parsing XML file %s: %s", xml_file_path, e)
+        return False
+
+
+# PDU/frame length consistency
+#
+# The I-SIGNAL-I-PDU lengths and the lengths of the CAN-FRAMEs carrying them
+# are put in tables keyed by the PDU name and joined, so every PDU is
+# compared with its own frames and a missing frame doesn't shift the other
+# comparisons.
+
+
+def pdu_frame_lengths(elem: ET.Element, pdu_types: Tuple = ('I-SIGNAL-I-PDU', )
+                      ) -> Tuple[Dict[str, str], Dict[str, List[Tuple[str, str]]]]:
+    """
+    Collects the PDU and CAN-FRAME lengths under elem.
+
+    Args:
+        elem (ET.Element): The element to search (e.g. the Communication package).
+        pdu_types (Tuple, optional): The PDU tags to collect, only the frames
+            carrying these are collected.
+
+    Returns:
+        Tuple: PDU name -> LENGTH and PDU name -> [(frame name, FRAME-LENGTH)].
+    """
+    pdu_lengths = {}
+    for pdu_type in pdu_types:
+        for pdu in xml_elem_findall(elem, pdu_type):
+            length = xml_elem_find(pdu, 'LENGTH')
+            pdu_lengths[pdu[0].text] = length.text.strip() \
+                if length is not None and length.text else None
+    frame_lengths = {}
+    for frame in xml_elem_findall(elem, 'CAN-FRAME'):
+        pdu_ref = xml_elem_find(frame, 'PDU-REF')
+        # Frames of the other PDU types are not checked
+        if pdu_ref is None or not pdu_ref.text \
+                or pdu_ref.get('DEST', pdu_types[0]) not in pdu_types:
+            continue
+        length = xml_elem_find(frame, 'FRAME-LENGTH')
+        pdu = pdu_ref.text[pdu_ref.text.rfind('/') + 1:]
+        frame_lengths.setdefault(pdu, []).append(
+            (frame[0].text, length.text.strip()
+             if length is not None and length.text else None))
+    return pdu_lengths, frame_lengths
+
+
+def pdu_frame_lengths_join(pdu_lengths: Dict[str, str],
+                           frame_lengths: Dict[str, List[Tuple[str, str]]]) -> dict:
+    """
+    Joins the tables of pdu_frame_lengths on the PDU name.
+
+    Returns:
+        dict: 'mismatch' [(pdu, PDU length, frame, frame length)],
+        'missing_frame' [PDUs no frame carries] and 'orphan_pdu' [PDUs
+        referenced by a frame but not defined]. Empty lists if there are no
+        frames at all (e.g. an Ethernet only DP).
+    """
+    report = {'mismatch': [], 'missing_frame': [], 'orphan_pdu': []}
+    if not frame_lengths:
+        return report
+    for pdu, length in sorted(pdu_lengths.items()):
+        frames = frame_lengths.get(pdu)
+        if frames is None:
+            report['missing_frame'].append(pdu)
+            continue
+        report['mismatch'].extend((pdu, length, frame, frame_length)
+                                  for frame, frame_length in frames
+                                  if frame_length != length)
+    report['orphan_pdu'] = sorted(pdu for pdu in frame_lengths
+                                  if pdu not in pdu_lengths)
+    return report
+
+
+def pdu_frame_lengths_check(elem: ET.Element, name: str,
+                            pdu_types: Tuple = ('I-SIGNAL-I-PDU', )) -> dict:
+    """
+    Checks the PDU/frame lengths of one DP and records its issues in
+    PDU_LENGTH_ISSUES for pdu_frame_lengths_summary.
+
+    Args:
+        elem (ET.Element): The element to search (e.g. the Communication package).
+        name (str): The DP name to report the issues under.
+        pdu_types (Tuple, optional): The PDU tags to check.
+
+    Returns:
+        dict: See pdu_frame_lengths_join.
+    """
+    report = pdu_frame_lengths_join(*pdu_frame_lengths(elem, pdu_types))
+    for pdu, length, frame, frame_length in report['mismatch']:
+        logging.warning("Found a mismatch: in PDU: %s, frame %s length: %s, "
+                        "PDU length: %s", pdu, frame, frame_length, length)
+    if any(report.values()):
+        PDU_LENGTH_ISSUES[name] = report
+    return report
+
+
+def pdu_frame_lengths_summary() -> bool:
+    """
+    Logs one summary of the PDU/frame length issues of all the checked DPs.
+
+    Returns:
+        bool: True if there were issues.
+    """
+    for name, report in sorted(PDU_LENGTH_ISSUES.items()):
+        logging.warning("%s: %d length mismatches, %d PDUs without frame, "
+                        "%d frames with undefined PDU", name,
+                        len(report['mismatch']), len(report['missing_frame']),
+                        len(report['orphan_pdu']))
+        if report['missing_frame']:
+            logging.info("%s: PDUs without frame: %s", name,
+                         names_summary(report['missing_frame']))
+        if report['orphan_pdu']:
+            logging.info("%s: Undefined PDUs: %s", name,
+                         names_summary(report['orphan_pdu']))
+    return bool(PDU_LENGTH_ISSUES)
+
+
+def _pdu_frame_lengths_file(path: str, pdu_types: Tuple, traced=False):
+    # Worker of pdu_frame_lengths_report, only the small tables leave it.
+    # Traced, it returns the report and the trace events of the file.
+    start = time.time()
+    if ARXML_SOURCE_CACHE is not None:
+        root = ARXML_SOURCE_CACHE.get(path).xml.getroot()
+    else:
+        root = ET.parse(path).getroot()
+    parsed = time.time()
+    report = pdu_frame_lengths_join(*pdu_frame_lengths(root, pdu_types))
+    if not traced:
+        return report
+    name = os.path.basename(path)
+    return report, [trace_event('parse ' + name, 'worker', start,
+                                parsed - start),
+                    trace_event('check ' + name, 'worker', parsed,
+                                time.time() - parsed)]
+
+
+def pdu_frame_lengths_report(paths: List[str], jobs: int = 1,
+                             pdu_types: Tuple = ('I-SIGNAL-I-PDU', ),
+                             events: Optional[List[dict]] = None
+                             ) -> Dict[str, dict]:
+    """
+    Checks the PDU/frame lengths of every DP .arxml.
+
+    Args:
+        paths (List[str]): The DP .arxml files.
+        jobs (int, optional): The number of processes parsing the files,
+            1 checks them in this process.
+        pdu_types (Tuple, optional): The PDU tags to check.
+        events (List[dict], optional): Gets the trace events of the parse and
+            check of every file, in the process that ran them.
+
+    Returns:
+        Dict[str, dict]: Path -> pdu_frame_lengths_join result.
+    """
+    traced = events is not None
+    if jobs > 1 and len(paths) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_pdu_frame_lengths_file, paths,
+                                    [pdu_types] * len(paths),
+                                    [traced] * len(paths)))
+    else:
+        results = [_pdu_frame_lengths_file(path, pdu_types, traced)
+                   for path in paths]
+    if traced:
+        for _, file_events in results:
+            events.extend(file_events)
+        results = [report for report, _ in results]
+    return dict(zip(paths, results))
+
+
+def reset_error_state():
+    # Clear the clash/missing package records between two merges
+    del ELEMENTS_NAME_CLASH[:]
+    del MISSING_SRC_PACKAGE[:]
+    PDU_LENGTH_ISSUES.clear()
+
+
+def reset_merge_state():
+    # Clear everything a merge leaves in this module, so that the next merge
+    # of the same process starts like a fresh run
+    global MERGE_PROFILE, STAGE_TIMER
+    reset_error_state()
+    uuid_namespace_set(None)
+    MERGE_PROFILE = None
+    STAGE_TIMER = None
+    if SEARCH_COUNTERS is not None:
+        search_counters_disable()
+
+
+# Merge profiling
+#
+# With ScriptOptions --profile a merge times its stages and Device Proxies
+# and writes the report next to the output .arxml (see profile_report_save).
+
+# Modes of --profile, the last two add the top call or allocation sites
+PROFILE_MODES = ('stages', 'cprofile', 'tracemalloc')
+_PROFILE_TOP_ = 25
+
+
+class MergeProfile:
+    """
+    Stage and Device Proxy costs of one merge, with the top cProfile call
+    sites or tracemalloc allocation sites depending on the mode.
+    """
+    def __init__(self, mode, trace=False):
+        assert mode is None or mode in PROFILE_MODES, \
+            "Unknown profile mode %s!" % mode
+        self.mode = mode
+        self.timer = StageTimer(trace)
+        self.profiler = None
+        self.start = (time.perf_counter(), time.process_time())
+        self.epoch = time.time()
+        if mode == 'cprofile':
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif mode == 'tracemalloc':
+            import tracemalloc
+            tracemalloc.start()
+
+    def _call_sites(self):
+        # The functions with the most own time
+        import pstats
+        self.profiler.disable()
+        stats = pstats.Stats(self.profiler).stats
+        top = sorted(stats.items(), key=lambda item: item[1][2],
+                     reverse=True)[:_PROFILE_TOP_]
+        return [{'site': '%s:%d(%s)' % site, 'calls': calls, 'self': own,
+                 'cumulative': cumulative}
+                for site, (_, calls, own, cumulative, _) in top]
+
+    def _allocation_sites(self):
+        # The source lines holding the most memory at the end of the merge
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        return [{'site': str(stat.traceback[0]),
+                 'size_kb': stat.size // 1024,
+                 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:_PROFILE_TOP_]]
+
+    def report(self) -> dict:
+        self.timer.dp_switch(None)
+        report = {'mode': self.mode,
+                  'wall': time.perf_counter() - self.start[0],
+                  'cpu': time.process_time() - self.start[1],
+                  'peak_rss_kb': peak_rss_kb(),
+                  'stages': self.timer.report(),
+                  'dps': self.timer.dp_report()}
+        if SEARCH_COUNTERS is not None:
+            report['searches'] = search_counters_report()
+        if self.mode == 'cprofile':
+            report['call_sites'] = self._call_sites()
+        elif self.mode == 'tracemalloc':
+            report['allocation_sites'] = self._allocation_sites()
+        return report
+
+
+MERGE_PROFILE: Optional[MergeProfile] = None
+
+
+def profile_start(mode, trace=False):
+    # mode None only traces, see ScriptOptions --profile and --trace
+    global MERGE_PROFILE, STAGE_TIMER
+    MERGE_PROFILE = MergeProfile(mode, trace)
+    STAGE_TIMER = MERGE_PROFILE.timer
+
+
+def profile_report_save(output_arxml: str) -> Optional[str]:
+    """
+    Ends the merge profile and saves its report as <output>.profile.json,
+    and its trace as <output>.trace.json if the merge is traced.
+
+    Does nothing if the merge isn't profiled.
+
+    Args:
+        output_arxml (str): The path of the merged .arxml.
+
+    Returns:
+        str: The path of the report, None if the merge isn't profiled.
+    """
+    global MERGE_PROFILE, STAGE_TIMER
+    profile = MERGE_PROFILE
+    if profile is None:
+        return None
+    MERGE_PROFILE = None
+    if STAGE_TIMER is profile.timer:
+        STAGE_TIMER = None
+    report = profile.report()
+    base = os.path.splitext(output_arxml)[0]
+    if profile.timer.events is not None:
+        events = [trace_process_name(os.getpid(),
+                                     os.path.basename(output_arxml)),
+                  trace_event('merge', 'merge', profile.epoch, report['wall'])]
+        trace_save(base + '.trace.json', events + profile.timer.events)
+    if profile.mode is None:
+        return None
+    path = base + '.profile.json'
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    logging.info('Saved profile report %s', path)
+    return path
+
+
+# Search counters
+#
+# search_counters_enable swaps the search primitives for counting wrappers,
+# so they cost nothing while disabled. Every call is attributed to the first
+# caller outside util, a primitive called by another one is counted in the
+# outer call only.
+
+_SEARCH_PRIMITIVES_ = ('xml_elem_find', 'xml_elem_findall',
+                       'xml_elem_type_find', 'xml_get_elem_from_path',
+                       'xml_elem_get_abs_path')
+_SEARCH_SUMMARY_TOP_ = 30
+
+# (primitive, caller) -> [calls, elements scanned, seconds]
+SEARCH_COUNTERS: Optional[Dict[Tuple[str, str], list]] = None
+_SEARCH_ORIGINALS_ = {}
+_SEARCH_ACTIVE_ = []
+
+
+def _subtree_size(elem, until=None):
+    # The elements iterated from elem until until is reached
+    count = 0
+    for sub in elem.iter():
+        count += 1
+        if sub is until:
+            break
+    return count
+
+
+def _path_scanned(src_arxml, path):
+    # The elements xml_get_elem_from_path iterates to resolve path
+    count = 0
+    elem = src_arxml.xml.getroot()
+    for name in path.strip('/').split('/'):
+        short_name_tag = f"{{{xml_get_namespace(elem)}}}SHORT-NAME"
+        for child in elem.iter():
+            count += 1
+            if child.findtext(short_name_tag) == name:
+                elem = child
+                break
+    return count
+
+
+def _ancestors(elem, arxml):
+    count = 0
+    while elem is not None:
+        count += 1
+        elem = arxml.parents.get(elem)
+    return count
+
+
+# Primitive -> elements it scanned, from its arguments and result
+_SEARCH_SCANNED_ = {
+    'xml_elem_find': lambda result, elem, tag: _subtree_size(elem, result),
+    'xml_elem_findall': lambda result, elem, tag: _subtree_size(elem),
+    'xml_elem_type_find':
+        lambda result, elem, elem_type, name: _subtree_size(elem),
+    'xml_get_elem_from_path':
+        lambda result, src_arxml, path: _path_scanned(src_arxml, path),
+    'xml_elem_get_abs_path':
+        lambda result, elem, arxml: _ancestors(elem, arxml),
+}
+
+
+def _search_caller():
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_globals.get('__name__') == __name__:
+        frame = frame.f_back
+    if frame is None:
+        return '?'
+    return '%s.%s' % (frame.f_globals.get('__name__'), frame.f_code.co_name)
+
+
+def _search_counted(name, func):
+    signature = inspect.signature(func)
+    scanned = _SEARCH_SCANNED_[name]
+    active = _SEARCH_ACTIVE_
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        counters = SEARCH_COUNTERS
+        if counters is None or active:
+            return func(*args, **kwargs)
+        active.append(name)
+        try:
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            seconds = time.perf_counter() - start
+        finally:
+            active.pop()
+        entry = counters.setdefault((name, _search_caller()), [0, 0, 0.0])
+        entry[0] += 1
+        entry[1] += scanned(result,
+                            **signature.bind(*args, **kwargs).arguments)
+        entry[2] += seconds
+        return result
+    return wrapper
+
+
+def search_counters_enable():
+    global SEARCH_COUNTERS
+    if SEARCH_COUNTERS is not None:
+        return
+    SEARCH_COUNTERS = {}
+    module = globals()
+    for name in _SEARCH_PRIMITIVES_:
+        _SEARCH_ORIGINALS_[name] = module[name]
+        module[name] = _search_counted(name, module[name])
+
+
+def search_counters_disable():
+    global SEARCH_COUNTERS
+    SEARCH_COUNTERS = None
+    globals().update(_SEARCH_ORIGINALS_)
+    _SEARCH_ORIGINALS_.clear()
+
+
+def search_counters_report() -> List[dict]:
+    # The counters by time spent, the most expensive first
+    rows = [{'primitive': name, 'caller': caller, 'calls': calls,
+             'scanned': scanned, 'seconds': seconds}
+            for (name, caller), (calls, scanned, seconds)
+            in (SEARCH_COUNTERS or {}).items()]
+    return sorted(rows, key=lambda row: row['seconds'], reverse=True)
+
+
+def search_counters_summary(top: int = _SEARCH_SUMMARY_TOP_) -> None:
+    """
+    Logs the search counters as a table and disables them.
+
+    Does nothing if the counters aren't enabled.
+
+    Args:
+        top (int): The number of most expensive (primitive, caller) rows.
+    """
+    if SEARCH_COUNTERS is None:
+        return
+    rows = search_counters_report()
+    logging.info('%-24s %-48s %8s %12s %10s', 'Primitive', 'Caller',
+                 'Calls', 'Scanned', 'Seconds')
+    for row in rows[:top]:
+        logging.info('%-24s %-48s %8d %12d %10.3f', row['primitive'],
+                     row['caller'], row['calls'], row['scanned'],
+                     row['seconds'])
+    if len(rows) > top:
+        logging.info('... %d more rows', len(rows) - top)
+    search_counters_disable()
+
 
 class ScriptOptions:
     @classmethod
@@ -970,9 +2731,37 @@ class ScriptOptions:
         for opt, t in help_desc.items():
             dest, desc = t
             cls.parser.add_option('-' + opt, '--' + dest, dest=dest, help=desc)
+        cls.parser.add_option('--uuid_namespace', dest='uuid_namespace',
+                              help="Generate new UUIDs deterministically "
+                                   "from this namespace and the element "
+                                   "paths instead of randomly.")
+        cls.parser.add_option('--profile', dest='profile', type='choice',
+                              choices=PROFILE_MODES,
+                              help="Save the time of every merge stage and "
+                                   "Device Proxy to <output>.profile.json. "
+                                   "One of %s, cprofile adds the top call "
+                                   "sites and tracemalloc the top allocation "
+                                   "sites (both slow the merge down)."
+                                   % ', '.join(PROFILE_MODES))
+        cls.parser.add_option('--trace', dest='trace', action='store_true',
+                              default=False,
+                              help="Save the merge stages and Device Proxies "
+                                   "as spans to <output>.trace.json, to open "
+                                   "in Perfetto or chrome://tracing.")
+        cls.parser.add_option('--search_counters', dest='search_counters',
+                              action='store_true', default=False,
+                              help="Count the calls, scanned elements and "
+                                   "time of the util search functions per "
+                                   "calling function and log the table at "
+                                   "the end.")
 
         # Read the script's arguments
         (options, args) = cls.parser.parse_args(args)
+        uuid_namespace_set(options.uuid_namespace)
+        if options.profile or options.trace:
+            profile_start(options.profile, options.trace)
+        if options.search_counters:
+            search_counters_enable()
 
         # Print help if input files are not specified
         dest, _ = help_desc['i']